@@ -0,0 +1,551 @@
+"""
+Utilitas media bersama untuk Macan Player.
+
+Berisi cache thumbnail dua tingkat (memori + disk), proxy HTTP lokal dengan read-ahead untuk
+thumbnail stream jaringan, dan indeks PTS/keyframe per file yang dipakai pemutar-pemutar
+berbasis FFmpeg/OpenCV. Modul ini tidak bergantung pada Qt, jadi aman
+dipanggil dari thread mana pun.
+"""
+import os
+import re
+import sys
+import time
+import struct
+import bisect
+import hashlib
+import threading
+import subprocess
+import http.client
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from array import array
+from collections import OrderedDict
+
+
+class ThumbnailCache:
+    """
+    Cache thumbnail dua tingkat: LRU di memori (dibatasi byte) di atas store di disk
+    (dibatasi total ukuran, eviksi LRU). Kunci = (path, ukuran, mtime, bucket timestamp),
+    sehingga file yang diganti otomatis tidak memakai thumbnail lama.
+    """
+    def __init__(self, cache_dir, memory_budget=32 * 1024 * 1024, disk_budget=256 * 1024 * 1024, bucket_ms=1000):
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.bucket_ms = bucket_ms
+        self._lock = threading.Lock()
+        self._memory = OrderedDict() # key -> bytes JPEG
+        self._memory_size = 0
+        self._disk_index = None # OrderedDict nama file -> ukuran, urutan LRU (paling lama dipakai di depan)
+        self._disk_size = 0
+
+    def bucket_timestamp(self, timestamp_ms):
+        """Timestamp representatif (awal bucket) yang di-decode dan disimpan untuk bucket ini."""
+        return (timestamp_ms // self.bucket_ms) * self.bucket_ms
+
+    def make_key(self, video_path, timestamp_ms):
+        if "://" in video_path:
+            # Stream jaringan tidak punya ukuran/mtime lokal, URL-nya sendiri yang jadi identitas
+            return f"{video_path}|{timestamp_ms // self.bucket_ms}"
+        try:
+            st = os.stat(video_path)
+        except OSError:
+            return None
+        return f"{os.path.abspath(video_path)}|{st.st_size}|{st.st_mtime_ns}|{timestamp_ms // self.bucket_ms}"
+
+    def _file_name(self, key):
+        return hashlib.sha1(key.encode('utf-8')).hexdigest() + ".jpg"
+
+    def _load_disk_index(self):
+        if self._disk_index is not None: return
+        self._disk_index = OrderedDict()
+        self._disk_size = 0
+        found = []
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(".jpg"):
+                        st = entry.stat()
+                        found.append((st.st_mtime, entry.name, st.st_size))
+        except OSError as e:
+            print(f"Gagal membaca cache thumbnail: {e}")
+        # Urutkan sekali saat start (mtime = akses terakhir); selanjutnya urutan dijaga move_to_end
+        for _, name, size in sorted(found):
+            self._disk_index[name] = size
+            self._disk_size += size
+
+    def _remember(self, key, data):
+        old = self._memory.pop(key, None)
+        if old is not None: self._memory_size -= len(old)
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_budget and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, key):
+        if key is None: return None
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            self._load_disk_index()
+            name = self._file_name(key)
+            if name not in self._disk_index: return None
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path, 'rb') as f: data = f.read()
+                now = time.time()
+                os.utime(path, (now, now)) # mtime dipakai sebagai penanda LRU di disk antar sesi
+                self._disk_index.move_to_end(name)
+            except OSError:
+                self._disk_size -= self._disk_index.pop(name)
+                return None
+            self._remember(key, data)
+            return data
+
+    def put(self, key, data):
+        if key is None or not data: return
+        with self._lock:
+            self._remember(key, data)
+            self._load_disk_index()
+            name = self._file_name(key)
+            path = os.path.join(self.cache_dir, name)
+            try:
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'wb') as f: f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Gagal menulis cache thumbnail: {e}")
+                return
+            if name in self._disk_index: self._disk_size -= self._disk_index.pop(name)
+            self._disk_index[name] = len(data)
+            self._disk_size += len(data)
+            if self._disk_size > self.disk_budget: self._evict_disk()
+
+    def _evict_disk(self):
+        # Buang dari depan (paling lama tidak dipakai) sampai 90% anggaran, supaya tidak tiap put
+        low_water = self.disk_budget * 0.9
+        while self._disk_size > low_water and self._disk_index:
+            name, size = self._disk_index.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            self._disk_size -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            self._load_disk_index()
+            for name in list(self._disk_index):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+            self._disk_index = OrderedDict()
+            self._disk_size = 0
+
+
+class StreamSegmentFetcher:
+    """
+    Pengambil segmen byte dari URL HTTP(S) lewat Range request. Data dipotong per blok
+    berukuran tetap dan disimpan di LRU (dibatasi byte); blok sesudahnya diambil lebih dulu
+    (read-ahead) oleh pool thread terbatas yang memakai ulang koneksi keep-alive.
+    """
+    def __init__(self, url, block_size=512 * 1024, read_ahead=2, max_connections=3,
+                 memory_budget=48 * 1024 * 1024, timeout=15):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Skema URL tidak didukung: {parts.scheme}")
+        self.url = url
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        self.block_size = block_size
+        self.read_ahead = read_ahead
+        self.max_connections = max_connections
+        self.memory_budget = memory_budget
+        self.timeout = timeout
+        self.size = None
+        self.fetched_bytes = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._blocks = OrderedDict() # indeks blok -> bytes
+        self._blocks_size = 0
+        self._inflight = {} # indeks blok -> Future
+        self._idle_connections = []
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="stream-fetch")
+
+    def _take_connection(self, fresh=False):
+        with self._lock:
+            if not fresh and self._idle_connections:
+                return self._idle_connections.pop()
+        connection_cls = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+        return connection_cls(self._netloc, timeout=self.timeout)
+
+    def _return_connection(self, connection):
+        with self._lock:
+            if len(self._idle_connections) < self.max_connections:
+                self._idle_connections.append(connection)
+                return
+        connection.close()
+
+    def _fetch_block(self, index):
+        start = index * self.block_size
+        end = start + self.block_size - 1
+        if self.size is not None: end = min(end, self.size - 1)
+        headers = {'Range': f"bytes={start}-{end}", 'User-Agent': 'MacanPlayer'}
+        for attempt in range(2):
+            # Koneksi keep-alive lama bisa sudah ditutup server, coba sekali lagi dengan koneksi baru
+            connection = self._take_connection(fresh=attempt > 0)
+            try:
+                connection.request('GET', self._target, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if attempt: raise
+                continue
+            if response.status != 206:
+                connection.close()
+                raise OSError(f"Server tidak mendukung Range request (HTTP {response.status})")
+            total = response.getheader('Content-Range', '').rpartition('/')[2]
+            if self.size is None and total.isdigit(): self.size = int(total)
+            if response.will_close: connection.close()
+            else: self._return_connection(connection)
+            return data
+
+    def _load_block(self, index):
+        try:
+            data = self._fetch_block(index)
+        except Exception:
+            with self._lock: self._inflight.pop(index, None)
+            raise
+        with self._lock:
+            self._inflight.pop(index, None)
+            self._blocks[index] = data
+            self._blocks_size += len(data)
+            self.fetched_bytes += len(data)
+            while self._blocks_size > self.memory_budget and len(self._blocks) > 1:
+                _, evicted = self._blocks.popitem(last=False)
+                self._blocks_size -= len(evicted)
+        return data
+
+    def _submit(self, index):
+        # Dipanggil dengan self._lock sudah dipegang; setelah close() executor sudah mati
+        if self.closed: raise OSError("Stream sudah ditutup")
+        future = self._inflight.get(index)
+        if future is None:
+            future = self._executor.submit(self._load_block, index)
+            self._inflight[index] = future
+        return future
+
+    def get_block(self, index):
+        with self._lock:
+            data = self._blocks.get(index)
+            if data is not None:
+                self._blocks.move_to_end(index)
+                return data
+            future = self._submit(index)
+        try:
+            return future.result()
+        except CancelledError:
+            raise OSError("Stream ditutup saat blok sedang diambil") from None
+
+    def _schedule_read_ahead(self, index):
+        if self.size is None: return
+        last_index = (self.size - 1) // self.block_size
+        with self._lock:
+            if self.closed: return
+            for i in range(index + 1, min(index + self.read_ahead, last_index) + 1):
+                if i not in self._blocks: self._submit(i)
+
+    def ensure_size(self):
+        """Ambil blok pertama untuk mengetahui ukuran file (sekaligus cek dukungan Range)."""
+        if self.size is None: self.get_block(0)
+        if self.size is None: raise OSError("Server tidak mengirim ukuran file (Content-Range)")
+        return self.size
+
+    def iter_range(self, start, end):
+        """Hasilkan isi byte [start, end] sepotong demi sepotong, langsung dari cache blok."""
+        position = start
+        while position <= end:
+            index = position // self.block_size
+            block = self.get_block(index)
+            self._schedule_read_ahead(index)
+            offset = position - index * self.block_size
+            chunk = memoryview(block)[offset:offset + end - position + 1]
+            if not chunk: break
+            yield chunk
+            position += len(chunk)
+
+    def close(self):
+        with self._lock:
+            self.closed = True # Sebelum shutdown: _submit tidak boleh lagi memanggil executor
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            connections, self._idle_connections = self._idle_connections, []
+            self._blocks.clear()
+            self._blocks_size = 0
+        for connection in connections: connection.close()
+
+
+class _RangeProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive, FFmpeg memakai ulang koneksi antar seek
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        fetcher = self.server.proxy.fetcher_for(self.path.lstrip('/'))
+        if fetcher is None or fetcher.size is None:
+            self.send_error(404)
+            return
+        if fetcher.closed:
+            # Stream baru saja dilepas (ganti sumber/eviksi) di antara lookup dan respons
+            self.send_error(503)
+            return
+        size = fetcher.size
+        start, end = 0, size - 1
+        range_header = self.headers.get('Range')
+        match = re.match(r'bytes=(\d*)-(\d*)$', range_header.strip()) if range_header else None
+        if match and match.group(1):
+            start = int(match.group(1))
+            if match.group(2): end = min(int(match.group(2)), size - 1)
+        elif match and match.group(2):
+            start = max(0, size - int(match.group(2))) # Suffix range: N byte terakhir
+        if start >= size or start > end:
+            self.send_response(416)
+            self.send_header('Content-Range', f"bytes */{size}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if match: self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if not send_body: return
+        try:
+            for chunk in fetcher.iter_range(start, end):
+                self.wfile.write(chunk)
+        except (OSError, http.client.HTTPException):
+            # Klien menutup koneksi setelah seek, atau server asal gagal: hentikan respons ini saja
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RangeReadAheadProxy:
+    """
+    Server HTTP lokal (127.0.0.1) di depan StreamSegmentFetcher. cv2/FFmpeg membuka URL lokal
+    ini seperti file biasa; setiap seek menjadi Range request yang dilayani dari cache blok,
+    sehingga yang diunduh hanya byte di sekitar frame yang dibutuhkan.
+    """
+    def __init__(self, max_streams=2):
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+        self._fetchers = OrderedDict() # token -> StreamSegmentFetcher
+        self._unsupported = set() # URL yang server-nya tidak mendukung Range request
+        self._server = None
+
+    @staticmethod
+    def supports(url):
+        return urlsplit(url).scheme in ('http', 'https')
+
+    @staticmethod
+    def _token(url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _ensure_server(self):
+        if self._server is not None: return
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeProxyHandler)
+        self._server.daemon_threads = True
+        self._server.proxy = self
+        threading.Thread(target=self._server.serve_forever, name="stream-proxy", daemon=True).start()
+
+    def fetcher_for(self, token):
+        with self._lock:
+            return self._fetchers.get(token)
+
+    def local_url(self, url):
+        """URL lokal untuk dibuka cv2, atau None jika URL tidak bisa dilayani lewat proxy."""
+        if not self.supports(url) or url in self._unsupported: return None
+        token = self._token(url)
+        with self._lock:
+            fetcher = self._fetchers.get(token)
+            if fetcher is None:
+                fetcher = StreamSegmentFetcher(url)
+                self._fetchers[token] = fetcher
+                while len(self._fetchers) > self.max_streams:
+                    self._fetchers.popitem(last=False)[1].close()
+            else:
+                self._fetchers.move_to_end(token)
+            self._ensure_server()
+            port = self._server.server_address[1]
+        try:
+            fetcher.ensure_size()
+        except (OSError, http.client.HTTPException) as e:
+            print(f"Proxy stream tidak dipakai untuk thumbnail: {e}")
+            self._unsupported.add(url)
+            self.release(url)
+            return None
+        return f"http://127.0.0.1:{port}/{token}"
+
+    def release(self, url):
+        with self._lock:
+            fetcher = self._fetchers.pop(self._token(url), None)
+        if fetcher is not None: fetcher.close()
+
+    def close(self):
+        with self._lock:
+            fetchers = list(self._fetchers.values())
+            self._fetchers.clear()
+            server, self._server = self._server, None
+        for fetcher in fetchers: fetcher.close()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+class PacketIndex:
+    """
+    Indeks PTS semua paket video (urutan presentasi) beserta daftar keyframe-nya, dibangun
+    sekali per file lewat ffprobe lalu disimpan di disk. Data disimpan sebagai array int64
+    (mikrodetik) yang ringkas, dan semua lookup memakai binary search.
+    PTS disimpan relatif terhadap start_time stream, sama seperti CAP_PROP_POS_MSEC OpenCV dan
+    posisi QMediaPlayer (.ts/.m2ts dan sebagian MP4 tidak dimulai dari 0).
+    """
+    MAGIC = b'MVPIDX2\0' # Versi 2: PTS relatif terhadap start_time; file versi lama dibangun ulang
+
+    def __init__(self, video_path, pts_us, keyframe_us):
+        self.video_path = video_path
+        self.pts_us = pts_us
+        self.keyframe_us = keyframe_us
+
+    def frame_index(self, timestamp_ms):
+        """Indeks frame (urutan presentasi) yang sedang tampil pada timestamp_ms."""
+        return max(0, bisect.bisect_right(self.pts_us, int(timestamp_ms * 1000)) - 1)
+
+    def frames_between(self, start_ms, end_ms):
+        """Jumlah frame yang harus di-decode maju dari start_ms untuk sampai di end_ms."""
+        return max(0, self.frame_index(end_ms) - self.frame_index(start_ms))
+
+    def keyframe_before(self, timestamp_ms):
+        """Timestamp (ms) keyframe terakhir pada atau sebelum timestamp_ms."""
+        if not self.keyframe_us: return 0.0
+        i = bisect.bisect_right(self.keyframe_us, int(timestamp_ms * 1000)) - 1
+        return self.keyframe_us[max(0, i)] / 1000.0
+
+    def nearest_keyframe(self, timestamp_ms):
+        """Timestamp (ms) keyframe terdekat dari timestamp_ms, ke depan maupun ke belakang."""
+        if not self.keyframe_us: return float(timestamp_ms)
+        t = int(timestamp_ms * 1000)
+        i = bisect.bisect_left(self.keyframe_us, t)
+        candidates = self.keyframe_us[max(0, i - 1):i + 1]
+        return min(candidates, key=lambda k: abs(k - t)) / 1000.0
+
+    @staticmethod
+    def cache_path(cache_dir, video_path):
+        st = os.stat(video_path)
+        key = f"{os.path.abspath(video_path)}|{st.st_size}|{st.st_mtime_ns}"
+        return os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".idx")
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pts_us, keyframe_us = array('q', self.pts_us), array('q', self.keyframe_us)
+        if sys.byteorder != 'little':
+            pts_us.byteswap(); keyframe_us.byteswap()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(struct.pack('<8sQQ', self.MAGIC, len(pts_us), len(keyframe_us)))
+            f.write(pts_us.tobytes())
+            f.write(keyframe_us.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, video_path):
+        """Muat indeks dari disk; file terpotong, rusak, atau versi lama dihapus dan None dikembalikan."""
+        try:
+            with open(path, 'rb') as f:
+                magic, pts_count, keyframe_count = struct.unpack('<8sQQ', f.read(24))
+                valid = magic == cls.MAGIC
+                if valid:
+                    pts_us, keyframe_us = array('q'), array('q')
+                    pts_us.frombytes(f.read(pts_count * 8))
+                    keyframe_us.frombytes(f.read(keyframe_count * 8))
+                    valid = len(pts_us) == pts_count and len(keyframe_us) == keyframe_count
+        except (ValueError, struct.error):
+            valid = False
+        if not valid:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        if sys.byteorder != 'little':
+            pts_us.byteswap(); keyframe_us.byteswap()
+        return cls(video_path, pts_us, keyframe_us)
+
+    @staticmethod
+    def _stream_start_us(video_path, creation_flags):
+        """start_time stream video pertama (mikrodetik), atau None jika ffprobe tidak melaporkannya."""
+        command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                   '-show_entries', 'stream=start_time', '-of', 'csv=p=0', video_path]
+        try:
+            output = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                                    timeout=30, creationflags=creation_flags).stdout.strip()
+            return int(float(output.splitlines()[0].strip(',')) * 1000000)
+        except (OSError, subprocess.SubprocessError, ValueError, IndexError):
+            return None
+
+    @classmethod
+    def build(cls, video_path, is_cancelled=lambda: False):
+        """Scan container sekali dengan ffprobe (tanpa decode) dan catat PTS + flag keyframe."""
+        creation_flags = 0
+        if os.name == 'nt':
+            creation_flags = subprocess.CREATE_NO_WINDOW
+        start_us = cls._stream_start_us(video_path, creation_flags)
+        command = ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                   '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path]
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True, creationflags=creation_flags)
+        pts_list, keyframe_list = [], []
+        try:
+            for line in process.stdout:
+                if is_cancelled(): return None
+                fields = line.strip().split(',')
+                if len(fields) < 2 or fields[0] in ('', 'N/A'): continue
+                pts = int(float(fields[0]) * 1000000)
+                pts_list.append(pts)
+                if 'K' in fields[1]: keyframe_list.append(pts)
+        finally:
+            process.kill()
+            process.stdout.close()
+            process.wait()
+        if not pts_list: return None
+        # Tanpa start_time dari stream, PTS terkecil adalah awal stream
+        if start_us is None: start_us = min(pts_list)
+        # Paket keluar dalam urutan decode (B-frame), urutkan ke urutan presentasi
+        return cls(video_path, array('q', sorted(pts - start_us for pts in pts_list)),
+                   array('q', sorted(pts - start_us for pts in keyframe_list)))
+
+    @classmethod
+    def load_or_build(cls, video_path, cache_dir, is_cancelled=lambda: False):
+        """Muat indeks dari cache disk, atau bangun lalu simpan jika belum ada / cache rusak."""
+        index_path = cls.cache_path(cache_dir, video_path)
+        index = cls.load(index_path, video_path) if os.path.exists(index_path) else None
+        if index is None:
+            index = cls.build(video_path, is_cancelled)
+            if index is not None: index.save(index_path)
+        return index
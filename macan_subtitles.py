@@ -0,0 +1,857 @@
+"""
+Modul subtitle bersama untuk Macan Player.
+
+Parser SRT, WebVTT, dan ASS/SSA semuanya mengisi satu CueStore berbentuk kolom (array waktu
+mulai, array waktu selesai, dan indeks ke tabel teks), dan semua jalur render (overlay
+QGraphicsTextItem, burn-in PIL, QLabel) memakai mesin lookup waktu yang sama.
+Modul ini tidak bergantung pada Qt, jadi aman dipanggil dari thread mana pun.
+"""
+import os
+import re
+import json
+import math
+import bisect
+import hashlib
+import itertools
+import threading
+import subprocess
+import time
+from array import array
+from collections import OrderedDict
+
+# NumPy dibutuhkan untuk burn-in (SubtitleBurner) dan sinkronisasi otomatis, Pillow hanya untuk burn-in.
+# Diimpor terpisah agar Pillow yang tidak terpasang tidak ikut mematikan sinkronisasi otomatis.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = ImageDraw = ImageFont = None
+
+SUBTITLE_EXTENSIONS = ('.srt', '.vtt', '.ass', '.ssa')
+SUBTITLE_FILE_FILTER = "Subtitle Files (*.srt *.vtt *.ass *.ssa)"
+
+TIMING_PATTERN = re.compile(r'^\s*(\S+)\s*-->\s*(\S+)')
+TIME_PATTERN = re.compile(r'^(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})$')
+VTT_TAG_PATTERN = re.compile(r'<(?![/]?[ibu]>)[^>]*>') # Tag selain <i>, <b>, <u> (voice, class, timestamp)
+ASS_OVERRIDE_PATTERN = re.compile(r'\{[^}]*\}')
+ASS_DEFAULT_FORMAT = ['layer', 'start', 'end', 'style', 'name', 'marginl', 'marginr', 'marginv', 'effect', 'text']
+
+
+class CueStore:
+    """
+    Penyimpanan cue berbentuk kolom plus indeks interval untuk lookup cepat.
+    Semua waktu mulai/selesai dipecah menjadi segmen [batas_i, batas_i+1) yang masing-masing
+    menyimpan cue aktifnya: kursor maju satu langkah saat playback normal, dan binary search
+    hanya dipakai setelah seek. Kursor tidak thread-safe, jadi satu store dipakai satu thread.
+    """
+    def __init__(self, source_path=None):
+        self.source_path = source_path
+        self.start_ms = array('q')
+        self.end_ms = array('q')
+        self.text_ids = array('l') # cue i -> indeks di text_table
+        self.text_table = []
+        self.skipped_blocks = 0
+        self._text_ids = {} # teks -> indeks, hanya dipakai selama parsing
+        self._boundaries = array('q') # waktu (ms) tempat himpunan cue aktif berubah, terurut
+        self._segments = [] # segmen i = [boundaries[i], boundaries[i+1]) -> tuple indeks cue aktif
+        self._cursor = -1 # segmen terakhir yang dipakai; -1 = sebelum batas pertama
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    def add(self, start_ms, end_ms, text):
+        text = text.strip()
+        if not text: return
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            text_id = self._text_ids[text] = len(self.text_table)
+            self.text_table.append(text)
+        self.start_ms.append(start_ms)
+        self.end_ms.append(end_ms)
+        self.text_ids.append(text_id)
+
+    def finalize(self):
+        """Urutkan cue berdasarkan waktu mulai dan bangun indeks interval. Dipanggil sekali setelah parsing."""
+        self._text_ids = {}
+        starts = self.start_ms
+        if any(starts[i] > starts[i + 1] for i in range(len(starts) - 1)):
+            order = sorted(range(len(starts)), key=starts.__getitem__)
+            self.start_ms = array('q', (self.start_ms[i] for i in order))
+            self.end_ms = array('q', (self.end_ms[i] for i in order))
+            self.text_ids = array('l', (self.text_ids[i] for i in order))
+        events = {}
+        for i, (start, end) in enumerate(zip(self.start_ms, self.end_ms)):
+            if end <= start: continue
+            events.setdefault(start, []).append((1, i))
+            events.setdefault(end, []).append((0, i))
+        active = []
+        for boundary in sorted(events):
+            for is_start, i in events[boundary]:
+                if is_start: active.append(i)
+                else: active.remove(i)
+            self._boundaries.append(boundary)
+            self._segments.append(tuple(sorted(active)))
+        self._cursor = -1
+        return self
+
+    def _locate(self, position_ms):
+        """Indeks segmen yang memuat position_ms (-1 jika sebelum cue pertama)."""
+        boundaries, cursor = self._boundaries, self._cursor
+        count = len(boundaries)
+        # Jalur cepat: masih di segmen yang sama, atau baru lewat satu batas
+        for candidate in (cursor, cursor + 1):
+            if -1 <= candidate < count:
+                after_start = candidate < 0 or boundaries[candidate] <= position_ms
+                before_end = candidate + 1 >= count or position_ms < boundaries[candidate + 1]
+                if after_start and before_end:
+                    self._cursor = candidate
+                    return candidate
+        # Setelah seek: binary search
+        self._cursor = bisect.bisect_right(boundaries, position_ms) - 1
+        return self._cursor
+
+    def active_cue_ids(self, position_ms):
+        """Indeks semua cue yang aktif pada position_ms, urut berdasarkan waktu mulai."""
+        segment = self._locate(position_ms)
+        return self._segments[segment] if segment >= 0 else ()
+
+    def cue_text(self, cue_id):
+        return self.text_table[self.text_ids[cue_id]]
+
+    def active_cues(self, position_ms):
+        """Teks semua cue yang aktif pada position_ms, urut berdasarkan waktu mulai."""
+        return [self.cue_text(i) for i in self.active_cue_ids(position_ms)]
+
+    def upcoming_cue_ids(self, position_ms, count):
+        """Himpunan cue untuk `count` segmen tidak kosong setelah position_ms (untuk pre-render)."""
+        segment = self._locate(position_ms)
+        upcoming = []
+        for i in range(segment + 1, len(self._segments)):
+            if len(upcoming) >= count: break
+            if self._segments[i]: upcoming.append(self._segments[i])
+        return upcoming
+
+    def segment_start_ms(self, position_ms):
+        segment = self._locate(position_ms)
+        return self._boundaries[segment] if segment >= 0 else float('-inf')
+
+    def next_change_ms(self, position_ms):
+        """Waktu berikutnya himpunan cue aktif berubah; sampai saat itu hasil lookup tetap sama."""
+        segment = self._locate(position_ms)
+        if segment + 1 < len(self._boundaries): return self._boundaries[segment + 1]
+        return float('inf')
+
+    def get_subtitle(self, position_ms):
+        texts = self.active_cues(position_ms)
+        return "\n".join(texts) if texts else None
+
+    def shifted(self, offset_ms, scale=1.0):
+        """Salinan store dengan waktu cue t' = t * scale + offset_ms (untuk sinkronisasi ulang)."""
+        store = CueStore(self.source_path)
+        store.start_ms = array('q', (max(0, round(t * scale + offset_ms)) for t in self.start_ms))
+        store.end_ms = array('q', (max(0, round(t * scale + offset_ms)) for t in self.end_ms))
+        store.text_ids = array('l', self.text_ids)
+        store.text_table = self.text_table
+        store.skipped_blocks = self.skipped_blocks
+        return store.finalize()
+
+
+def parse_timestamp(time_str):
+    """'hh:mm:ss,mmm' (SRT), 'mm:ss.mmm' (WebVTT), atau 'h:mm:ss.cc' (ASS) -> milidetik, None jika tidak valid."""
+    match = TIME_PATTERN.match(time_str)
+    if not match: return None
+    h, m, s, frac = match.groups()
+    return (int(h or 0) * 3600 + int(m) * 60 + int(s)) * 1000 + int(frac.ljust(3, '0'))
+
+
+def _parse_cue_blocks(lines, store, is_cancelled, clean_text=None, ignored_blocks=()):
+    """
+    Parser baris demi baris untuk format berbasis blok (SRT dan WebVTT). Baris sebelum baris
+    waktu adalah identifier cue; blok rusak dilewati tanpa menggagalkan seluruh file.
+    """
+    timing, text_lines, header_lines = None, [], []
+
+    def flush():
+        if timing is not None:
+            text = "\n".join(text_lines)
+            store.add(timing[0], timing[1], clean_text(text) if clean_text else text)
+        elif header_lines and not header_lines[0].startswith(ignored_blocks):
+            store.skipped_blocks += 1
+
+    for line_number, line in enumerate(lines):
+        if line_number % 1000 == 0 and is_cancelled(): return
+        line = line.rstrip('\r\n')
+        match = TIMING_PATTERN.match(line)
+        if match and not (header_lines and header_lines[0].startswith(ignored_blocks)):
+            if timing is not None:
+                # Baris waktu baru tanpa baris kosong pemisah: baris angka terakhir adalah nomor cue berikutnya
+                if text_lines and text_lines[-1].strip().isdigit(): text_lines.pop()
+                flush()
+            start, end = parse_timestamp(match.group(1)), parse_timestamp(match.group(2))
+            if start is None or end is None:
+                # Waktu tidak valid: teks blok ini dihitung sebagai blok rusak
+                timing, header_lines = None, [line]
+            else:
+                timing, header_lines = (start, end), []
+            text_lines = []
+        elif not line.strip():
+            flush()
+            timing, text_lines, header_lines = None, [], []
+        elif timing is not None:
+            text_lines.append(line)
+        else:
+            header_lines.append(line)
+    flush() # Cue terakhir tetap masuk walau file tidak diakhiri baris kosong
+
+
+def parse_srt(lines, store, is_cancelled=lambda: False):
+    _parse_cue_blocks(lines, store, is_cancelled)
+
+
+def parse_vtt(lines, store, is_cancelled=lambda: False):
+    _parse_cue_blocks(lines, store, is_cancelled,
+                      clean_text=lambda text: VTT_TAG_PATTERN.sub('', text),
+                      ignored_blocks=('WEBVTT', 'NOTE', 'STYLE', 'REGION'))
+
+
+def _clean_ass_text(text):
+    text = ASS_OVERRIDE_PATTERN.sub('', text)
+    return text.replace('\\N', '\n').replace('\\n', '\n').replace('\\h', ' ')
+
+
+def parse_ass(lines, store, is_cancelled=lambda: False):
+    """Ambil baris 'Dialogue:' dari section [Events], urutan kolom mengikuti baris 'Format:'."""
+    in_events = False
+    fields = ASS_DEFAULT_FORMAT
+    for line_number, line in enumerate(lines):
+        if line_number % 1000 == 0 and is_cancelled(): return
+        line = line.strip()
+        if line.startswith('['):
+            in_events = line.lower() == '[events]'
+            continue
+        if not in_events: continue
+        key, _, value = line.partition(':')
+        key = key.strip().lower()
+        if key == 'format':
+            fields = [field.strip().lower() for field in value.split(',')]
+        elif key == 'dialogue':
+            values = value.split(',', len(fields) - 1)
+            cue = dict(zip(fields, values))
+            start, end = parse_timestamp(cue.get('start', '').strip()), parse_timestamp(cue.get('end', '').strip())
+            if start is None or end is None or 'text' not in cue:
+                store.skipped_blocks += 1
+                continue
+            store.add(start, end, _clean_ass_text(cue['text']))
+
+
+PARSERS = {'.srt': parse_srt, '.vtt': parse_vtt, '.ass': parse_ass, '.ssa': parse_ass}
+
+
+def detect_format(file_path, first_line):
+    """Tentukan format dari isi baris pertama, lalu dari ekstensi file."""
+    first_line = first_line.strip()
+    if first_line.startswith('WEBVTT'): return '.vtt'
+    if first_line.lower() == '[script info]': return '.ass'
+    ext = os.path.splitext(file_path)[1].lower()
+    return ext if ext in PARSERS else '.srt'
+
+
+def load_subtitles(file_path, is_cancelled=lambda: False):
+    """Parse file subtitle (format dideteksi otomatis) menjadi CueStore yang siap dipakai."""
+    store = CueStore(file_path)
+    # utf-8-sig membuang BOM, mode teks biasa sudah menormalkan CRLF
+    with open(file_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        lines = iter(f)
+        first_lines = []
+        for line in lines:
+            first_lines.append(line)
+            if line.strip(): break
+        parser = PARSERS[detect_format(file_path, first_lines[-1] if first_lines else '')]
+        parser(itertools.chain(first_lines, lines), store, is_cancelled)
+    return store.finalize()
+
+
+# Codec subtitle berbasis teks yang bisa dikonversi ffmpeg ke SRT (subtitle bitmap seperti PGS tidak bisa)
+TEXT_SUBTITLE_CODECS = {'subrip', 'srt', 'ass', 'ssa', 'webvtt', 'mov_text', 'text'}
+
+
+def _creation_flags():
+    return subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+
+
+def _identity_key(video_path):
+    st = os.stat(video_path)
+    key = f"{os.path.abspath(video_path)}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def probe_subtitle_tracks(video_path, cache_dir):
+    """
+    Daftar track subtitle teks di dalam container: [{'index', 'codec', 'language', 'title', 'default'}].
+    ffprobe hanya dijalankan sekali per file; hasilnya disimpan di cache_dir.
+    """
+    cache_path = os.path.join(cache_dir, _identity_key(video_path) + ".tracks.json")
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    command = ['ffprobe', '-v', 'error', '-select_streams', 's', '-of', 'json',
+               '-show_entries', 'stream=index,codec_name:stream_tags=language,title:stream_disposition=default',
+               video_path]
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                            encoding='utf-8', errors='replace', creationflags=_creation_flags())
+    if result.returncode != 0:
+        raise OSError(f"ffprobe gagal membaca track subtitle: {result.stderr.strip()}")
+    tracks = []
+    for stream in json.loads(result.stdout or '{}').get('streams', []):
+        if stream.get('codec_name') not in TEXT_SUBTITLE_CODECS: continue
+        tags = stream.get('tags', {})
+        tracks.append({'index': stream['index'], 'codec': stream['codec_name'],
+                       'language': tags.get('language', ''), 'title': tags.get('title', ''),
+                       'default': bool(stream.get('disposition', {}).get('default'))})
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(tracks, f)
+    os.replace(tmp_path, cache_path)
+    return tracks
+
+
+def _tee_lines(lines, f):
+    for line in lines:
+        f.write(line)
+        yield line
+
+
+def load_embedded_subtitles(video_path, cache_dir, track=None, is_cancelled=lambda: False):
+    """
+    Ekstrak satu track subtitle teks dari container (default: track 'default', atau yang pertama).
+    Output ffmpeg (SRT) langsung dialirkan ke parser sambil ditulis ke cache disk, sehingga file
+    yang sama berikutnya dimuat dari cache tanpa menjalankan ffmpeg. Return None jika tidak ada track.
+    """
+    tracks = probe_subtitle_tracks(video_path, cache_dir)
+    if not tracks: return None
+    if track is None:
+        track = next((t for t in tracks if t['default']), tracks[0])
+    cache_path = os.path.join(cache_dir, f"{_identity_key(video_path)}.{track['index']}.srt")
+    if os.path.exists(cache_path):
+        return load_subtitles(cache_path, is_cancelled)
+
+    store = CueStore(cache_path)
+    command = ['ffmpeg', '-nostdin', '-v', 'error', '-i', video_path,
+               '-map', f"0:{track['index']}", '-f', 'srt', '-']
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               text=True, encoding='utf-8', errors='replace', creationflags=_creation_flags())
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            parse_srt(_tee_lines(process.stdout, f), store, is_cancelled)
+    finally:
+        if is_cancelled(): process.kill()
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0 or is_cancelled():
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        if is_cancelled(): return None
+        raise OSError(f"ffmpeg gagal mengekstrak track subtitle #{track['index']}")
+    os.replace(tmp_path, cache_path)
+    return store.finalize()
+
+
+SYNC_HOP_MS = 10
+# Rasio framerate yang umum tertukar (23.976/24/25 fps), dicoba saat estimasi drift
+FRAMERATE_RATIOS = (1.0, 25 / 23.976, 23.976 / 25, 25 / 24, 24 / 25, 24 / 23.976, 23.976 / 24)
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy diperlukan untuk sinkronisasi subtitle otomatis. Install dengan: pip install numpy")
+
+
+def speech_activity_envelope(video_path, hop_ms=SYNC_HOP_MS, sample_rate=8000, is_cancelled=lambda: False):
+    """
+    Envelope aktivitas suara (0/1 per hop) dari audio video. ffmpeg men-decode audio ke PCM mono
+    8 kHz, lalu short-time energy dihitung per blok satu menit dengan NumPy (tanpa loop per sampel).
+    """
+    _require_numpy()
+    hop = sample_rate * hop_ms // 1000
+    block_bytes = hop * 2 * (60000 // hop_ms)
+    command = ['ffmpeg', '-nostdin', '-v', 'error', '-i', video_path, '-vn', '-ac', '1',
+               '-ar', str(sample_rate), '-f', 's16le', '-']
+    process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, creationflags=_creation_flags())
+    energies = []
+    try:
+        while True:
+            if is_cancelled(): return None
+            data = process.stdout.read(block_bytes)
+            if not data: break
+            usable = len(data) // (2 * hop) * (2 * hop)
+            frames = np.frombuffer(data[:usable], dtype='<i2').astype(np.float32).reshape(-1, hop)
+            energies.append(np.einsum('ij,ij->i', frames, frames) / hop)
+    finally:
+        process.kill()
+        process.stdout.close()
+        process.wait()
+    if not energies: return None
+    log_energy = np.log10(np.concatenate(energies) + 1.0)
+    # Ambang adaptif: hop di atas median dianggap aktif (dialog), di bawahnya latar/hening
+    return (log_energy > np.median(log_energy)).astype(np.float32)
+
+
+def cue_coverage(store, length, hop_ms=SYNC_HOP_MS, offset_ms=0, scale=1.0):
+    """Sinyal biner per hop: 1 jika ada cue yang aktif (setelah waktu cue diskalakan dan digeser)."""
+    starts = np.frombuffer(store.start_ms, dtype=np.int64) * scale + offset_ms
+    ends = np.frombuffer(store.end_ms, dtype=np.int64) * scale + offset_ms
+    starts = np.clip(starts // hop_ms, 0, length).astype(np.int64)
+    ends = np.clip(ends // hop_ms, 0, length).astype(np.int64)
+    edges = np.zeros(length + 1, dtype=np.int32)
+    np.add.at(edges, starts, 1)
+    np.add.at(edges, ends, -1)
+    return (np.cumsum(edges[:-1]) > 0).astype(np.float32)
+
+
+def estimate_subtitle_sync(activity, store, hop_ms=SYNC_HOP_MS, max_offset_ms=300000, estimate_drift=False):
+    """
+    Cari offset global terbaik lewat cross-correlation FFT antara aktivitas suara dan cakupan cue.
+    Dengan estimate_drift, beberapa rasio framerate umum ikut dicoba sebagai skala linear.
+    Return (offset_ms, scale, confidence): subtitle dikoreksi dengan t' = t * scale + offset_ms;
+    confidence = tinggi puncak korelasi dalam satuan standar deviasi.
+    """
+    _require_numpy()
+    length = len(activity)
+    size = 1 << (2 * length - 1).bit_length()
+    audio_spectrum = np.fft.rfft(activity - activity.mean(), size)
+    max_lag = min(max_offset_ms // hop_ms, length - 1)
+    lag_values = np.concatenate((np.arange(max_lag + 1), np.arange(-max_lag, 0)))
+    best = None
+    for scale in (FRAMERATE_RATIOS if estimate_drift else (1.0,)):
+        coverage = cue_coverage(store, length, hop_ms, scale=scale)
+        if not coverage.any(): continue
+        correlation = np.fft.irfft(audio_spectrum * np.conj(np.fft.rfft(coverage - coverage.mean(), size)), size)
+        # Lag k positif: audio[t + k] cocok dengan cue[t], jadi subtitle perlu dimundurkan k hop
+        window = np.concatenate((correlation[:max_lag + 1], correlation[size - max_lag:]))
+        i = int(np.argmax(window))
+        confidence = float((window[i] - window.mean()) / (window.std() + 1e-9))
+        if best is None or window[i] > best[0]:
+            best = (window[i], int(lag_values[i]) * hop_ms, scale, confidence)
+    if best is None: return 0, 1.0, 0.0
+    return best[1], best[2], best[3]
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.webm', '.avi', '.mov', '.m4v', '.wmv', '.flv', '.ts')
+SUBTITLE_FOLDERS = ('subs', 'subtitles', 'sub')
+SUBTITLE_FLAGS = {'forced', 'sdh', 'cc', 'hi', 'default'}
+LANGUAGE_ALIASES = {
+    'english': 'en', 'eng': 'en', 'indonesian': 'id', 'indonesia': 'id', 'ind': 'id', 'bahasa': 'id',
+    'malay': 'ms', 'may': 'ms', 'msa': 'ms', 'japanese': 'ja', 'jpn': 'ja', 'korean': 'ko', 'kor': 'ko',
+    'chinese': 'zh', 'chi': 'zh', 'zho': 'zh', 'spanish': 'es', 'spa': 'es', 'french': 'fr', 'fre': 'fr',
+    'fra': 'fr', 'german': 'de', 'ger': 'de', 'deu': 'de', 'arabic': 'ar', 'ara': 'ar',
+}
+LANGUAGE_TAG_PATTERN = re.compile(r'^[a-z]{2,3}(?:-[a-z]{2})?$')
+NAME_TOKEN_PATTERN = re.compile(r'[._\s\-\[\]()]+')
+
+
+def parse_subtitle_tags(tokens):
+    """Ambil kode bahasa dan flag (forced, sdh, ...) dari potongan nama file subtitle."""
+    language, flags = '', []
+    for token in tokens:
+        token = token.lower()
+        if not token: continue
+        if token in SUBTITLE_FLAGS: flags.append(token)
+        elif not language and token in LANGUAGE_ALIASES: language = LANGUAGE_ALIASES[token]
+        elif not language and LANGUAGE_TAG_PATTERN.match(token): language = token
+    return language, flags
+
+
+class SidecarIndex:
+    """
+    Indeks file subtitle per folder, dibangun dengan satu kali os.scandir dan di-cache.
+    Cache folder divalidasi ulang lewat mtime folder (paling sering sekali per `recheck_interval`
+    detik), jadi berpindah episode dalam satu folder season tidak men-stat share berulang kali.
+    Mencakup 'video.srt', 'video.en.forced.srt', 'Subs/video.id.srt', dan 'Subs/video/2_English.srt'.
+    """
+    def __init__(self, recheck_interval=5.0, max_dirs=64):
+        self.recheck_interval = recheck_interval
+        self.max_dirs = max_dirs
+        self._lock = threading.Lock()
+        self._dirs = OrderedDict() # path folder -> dict hasil scan
+
+    def _scan(self, dir_path, mtime_ns):
+        subtitles, videos, subdirs = [], [], {}
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    subdirs[entry.name.lower()] = entry.path
+                    continue
+                base, ext = os.path.splitext(entry.name)
+                ext = ext.lower()
+                if ext in SUBTITLE_EXTENSIONS: subtitles.append((base, entry.path))
+                elif ext in VIDEO_EXTENSIONS: videos.append(base.lower())
+        # Petakan setiap subtitle ke stem video terpanjang yang menjadi awalan namanya
+        by_stem = {}
+        stems = sorted(videos, key=len, reverse=True)
+        for base, path in subtitles:
+            base_lower = base.lower()
+            stem = next((s for s in stems if base_lower == s or base_lower.startswith(s + '.')), None)
+            if stem is not None:
+                by_stem.setdefault(stem, []).append(self._candidate(path, base[len(stem) + 1:].split('.')))
+        return {'mtime_ns': mtime_ns, 'checked': time.monotonic(), 'subtitles': subtitles,
+                'subdirs': subdirs, 'by_stem': by_stem}
+
+    @staticmethod
+    def _candidate(path, tokens):
+        language, flags = parse_subtitle_tags(tokens)
+        return {'path': path, 'language': language, 'flags': flags}
+
+    def _directory(self, dir_path):
+        """Hasil scan folder dari cache, di-scan ulang hanya jika mtime folder berubah."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._dirs.get(dir_path)
+            if cached is not None:
+                self._dirs.move_to_end(dir_path)
+                if now - cached['checked'] < self.recheck_interval: return cached
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+            if cached is not None and cached['mtime_ns'] == mtime_ns:
+                cached['checked'] = now
+                return cached
+            scanned = self._scan(dir_path, mtime_ns)
+        except OSError:
+            return None
+        with self._lock:
+            self._dirs[dir_path] = scanned
+            while len(self._dirs) > self.max_dirs:
+                self._dirs.popitem(last=False)
+        return scanned
+
+    def find(self, video_path, preferred_languages=()):
+        """Semua kandidat subtitle untuk video, kandidat terbaik lebih dulu."""
+        dir_path, file_name = os.path.split(os.path.abspath(video_path))
+        stem = os.path.splitext(file_name)[0].lower()
+        directory = self._directory(dir_path)
+        if directory is None: return []
+        candidates = list(directory['by_stem'].get(stem, []))
+        for folder_name in SUBTITLE_FOLDERS:
+            folder_path = directory['subdirs'].get(folder_name)
+            folder = self._directory(folder_path) if folder_path else None
+            if folder is None: continue
+            for base, path in folder['subtitles']:
+                base_lower = base.lower()
+                if base_lower == stem or base_lower.startswith(stem + '.'):
+                    candidates.append(self._candidate(path, base[len(stem) + 1:].split('.')))
+            # Subs/<nama video>/ berisi subtitle per bahasa (mis. '2_English.srt')
+            episode_path = folder['subdirs'].get(stem)
+            episode = self._directory(episode_path) if episode_path else None
+            if episode is not None:
+                candidates.extend(self._candidate(path, NAME_TOKEN_PATTERN.split(base)) for base, path in episode['subtitles'])
+
+        def rank(candidate):
+            language = candidate['language']
+            language_rank = preferred_languages.index(language) if language in preferred_languages else len(preferred_languages)
+            return ('forced' in candidate['flags'], language_rank, bool(language), candidate['path'].lower())
+        candidates.sort(key=rank)
+        return candidates
+
+
+_sidecar_index = SidecarIndex()
+
+
+def find_subtitle_candidates(video_path, preferred_languages=()):
+    return _sidecar_index.find(video_path, preferred_languages)
+
+
+def find_sibling_subtitle(video_path):
+    """File subtitle terbaik untuk video (dari indeks folder yang di-cache), atau None."""
+    candidates = find_subtitle_candidates(video_path)
+    return candidates[0]['path'] if candidates else None
+
+
+SEARCH_TOKEN_PATTERN = re.compile(r'\w+')
+SEARCH_MARKUP_PATTERN = re.compile(r'<[^>]*>')
+
+
+def normalize_search_text(text):
+    """Teks cue tanpa tag, huruf kecil, spasi tunggal; dipakai untuk tokenisasi dan cek frasa."""
+    return ' '.join(SEARCH_TOKEN_PATTERN.findall(SEARCH_MARKUP_PATTERN.sub(' ', text).lower()))
+
+
+class SubtitleSearchIndex:
+    """
+    Inverted index full-text atas teks cue semua subtitle di pustaka (playlist + riwayat).
+    Posting list per kata: {doc_id: array indeks cue}, dan indeks cue dipetakan ke waktu mulai
+    lewat array `starts` milik dokumen, jadi setiap posting setara (file, waktu cue).
+    Setiap file subtitle disimpan sebagai satu file JSON di `cache_dir` (beserta term -> indeks cue),
+    sehingga update cukup menulis ulang dokumen yang berubah dan memuat indeks tidak perlu tokenisasi ulang.
+    """
+    def __init__(self, cache_dir, max_prefix_terms=64):
+        self.cache_dir = cache_dir
+        self.max_prefix_terms = max_prefix_terms
+        self._lock = threading.Lock()
+        self._documents = {} # doc_id -> dict dokumen
+        self._doc_ids = {} # path subtitle -> doc_id
+        self._postings = {} # term -> {doc_id: array('l') indeks cue}
+        self._vocabulary = None # Daftar term terurut untuk pencarian awalan, dibangun ulang saat dibutuhkan
+        self._next_id = itertools.count()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _document_path(self, subtitle_path):
+        return os.path.join(self.cache_dir, hashlib.sha1(subtitle_path.encode('utf-8')).hexdigest() + ".json")
+
+    @staticmethod
+    def _build_terms(texts):
+        terms = {}
+        for i, text in enumerate(texts):
+            for term in set(normalize_search_text(text).split()):
+                terms.setdefault(term, []).append(i)
+        return terms
+
+    def _insert(self, document, terms):
+        """Pasang dokumen (sudah ditokenisasi) ke posting list. Dipanggil dengan lock dipegang."""
+        old_id = self._doc_ids.get(document['subtitle'])
+        if old_id is not None: self._remove(old_id)
+        doc_id = next(self._next_id)
+        document['terms'] = tuple(terms)
+        self._documents[doc_id] = document
+        self._doc_ids[document['subtitle']] = doc_id
+        for term, cue_ids in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = array('l', cue_ids)
+        self._vocabulary = None
+
+    def _remove(self, doc_id):
+        document = self._documents.pop(doc_id)
+        del self._doc_ids[document['subtitle']]
+        for term in document['terms']:
+            postings = self._postings.get(term)
+            if postings is None: continue
+            postings.pop(doc_id, None)
+            if not postings: del self._postings[term]
+        self._vocabulary = None
+
+    def load(self, is_cancelled=lambda: False):
+        """Muat semua dokumen yang tersimpan di disk ke memori."""
+        try:
+            entries = [entry.path for entry in os.scandir(self.cache_dir) if entry.name.endswith('.json')]
+        except OSError:
+            entries = []
+        for path in entries:
+            if is_cancelled(): return
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                terms = data.pop('terms')
+                data['starts'] = array('q', data['starts'])
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            with self._lock:
+                self._insert(data, terms)
+        self.loaded = True
+
+    def is_current(self, subtitle_path, st):
+        doc_id = self._doc_ids.get(subtitle_path)
+        if doc_id is None: return False
+        document = self._documents[doc_id]
+        return document['size'] == st.st_size and document['mtime_ns'] == st.st_mtime_ns
+
+    def update(self, video_path, title, subtitle_path, store, st):
+        """Indeks ulang satu file subtitle dari CueStore yang sudah diparse, lalu simpan ke disk."""
+        texts = [store.cue_text(i) for i in range(len(store))]
+        terms = self._build_terms(texts)
+        document = {'subtitle': subtitle_path, 'video': video_path, 'title': title,
+                    'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'starts': array('q', store.start_ms), 'texts': texts}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._document_path(subtitle_path)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(document, starts=list(document['starts']), terms=terms), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._insert(document, terms)
+
+    def prune(self, subtitle_paths):
+        """Buang dokumen yang subtitle-nya tidak lagi tertaut ke entri pustaka mana pun."""
+        with self._lock:
+            stale = [doc_id for path, doc_id in self._doc_ids.items() if path not in subtitle_paths]
+            for doc_id in stale:
+                path = self._documents[doc_id]['subtitle']
+                self._remove(doc_id)
+                try:
+                    os.remove(self._document_path(path))
+                except OSError:
+                    pass
+        return len(stale)
+
+    def refresh(self, entries, is_cancelled=lambda: False):
+        """
+        Samakan indeks dengan entri pustaka [(path video, judul)]: file subtitle baru atau yang
+        size/mtime-nya berubah diindeks ulang, dan dokumen yang tidak tertaut lagi dibuang.
+        Hasil: (jumlah diindeks ulang, jumlah dibuang), atau None jika dibatalkan.
+        """
+        if not self.loaded: self.load(is_cancelled)
+        linked, updated = set(), 0
+        for video_path, title in entries:
+            if "://" in video_path: continue
+            for candidate in find_subtitle_candidates(video_path):
+                if is_cancelled(): return None
+                subtitle_path = candidate['path']
+                linked.add(subtitle_path)
+                try:
+                    st = os.stat(subtitle_path)
+                    if self.is_current(subtitle_path, st): continue
+                    store = load_subtitles(subtitle_path, is_cancelled)
+                    if is_cancelled(): return None
+                    self.update(video_path, title, subtitle_path, store, st)
+                    updated += 1
+                except (OSError, ValueError) as e:
+                    print(f"Gagal mengindeks subtitle {subtitle_path}: {e}")
+        return updated, self.prune(linked)
+
+    def _prefix_postings(self, prefix):
+        """Gabungan posting list semua term berawalan `prefix` (untuk kata terakhir yang masih diketik)."""
+        if self._vocabulary is None: self._vocabulary = sorted(self._postings)
+        merged = {}
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for term in itertools.islice(self._vocabulary, start, start + self.max_prefix_terms):
+            if not term.startswith(prefix): break
+            for doc_id, cue_ids in self._postings[term].items():
+                merged.setdefault(doc_id, set()).update(cue_ids)
+        return merged
+
+    def search(self, query, limit=100):
+        """
+        Cari cue yang memuat semua kata di `query` (kata terakhir boleh berupa awalan) berurutan
+        sebagai frasa. Hasil: list dict {'video', 'title', 'subtitle', 'start_ms', 'text'}.
+        """
+        phrase = normalize_search_text(query)
+        words = phrase.split()
+        if not words: return []
+        with self._lock:
+            lists = [self._postings.get(word, {}) for word in words[:-1]]
+            lists.append(self._prefix_postings(words[-1]))
+            lists.sort(key=len)
+            if not lists[0]: return []
+            results = []
+            for doc_id in lists[0]:
+                if not all(doc_id in postings for postings in lists[1:]): continue
+                cue_ids = set(lists[0][doc_id])
+                for postings in lists[1:]:
+                    cue_ids.intersection_update(postings[doc_id])
+                    if not cue_ids: break
+                document = self._documents[doc_id]
+                for i in sorted(cue_ids):
+                    text = document['texts'][i]
+                    if len(words) > 1 and f" {phrase}" not in f" {normalize_search_text(text)}": continue
+                    results.append({'video': document['video'], 'title': document['title'], 'subtitle': document['subtitle'],
+                                    'start_ms': document['starts'][i], 'text': SEARCH_MARKUP_PATTERN.sub('', text)})
+                    if len(results) >= limit: return results
+        return results
+
+
+class SubtitleBurner:
+    """
+    Burn-in subtitle ke frame NumPy (uint8, 3 kanal). Setiap himpunan cue dirender sekali per
+    font menjadi overlay RGBA premultiplied, lalu di-blend secara vektor hanya ke ROI di bagian
+    bawah frame. Bagian frame lainnya tidak pernah disalin atau dikonversi warnanya.
+    """
+    OUTLINE_OFFSETS = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+    def __init__(self, font_path="arial.ttf", font_size=24, color=(255, 255, 255, 220),
+                 outline_color=(0, 0, 0, 220), bottom_margin=30, max_entries=32):
+        self.color = color
+        self.outline_color = outline_color
+        self.bottom_margin = bottom_margin
+        self.max_entries = max_entries
+        self._font = None
+        self._store = None
+        self._overlays = OrderedDict() # (indeks cue, urutan kanal) -> (premul x255 uint16, 255 - alpha uint16)
+        self.set_font(font_path, font_size)
+
+    def set_font(self, font_path, font_size):
+        self.font_path = font_path
+        self.font_size = font_size
+        self._font = None
+        self._overlays.clear()
+
+    def _get_font(self):
+        # Font TrueType dimuat sekali, bukan di setiap frame
+        if self._font is None:
+            try:
+                self._font = ImageFont.truetype(self.font_path, self.font_size)
+            except IOError:
+                self._font = ImageFont.load_default() # Fallback
+        return self._font
+
+    def _render_overlay(self, text, channel_order):
+        font = self._get_font()
+        probe = ImageDraw.Draw(Image.new('L', (1, 1)))
+        left, top, right, bottom = probe.textbbox((0, 0), text, font=font, align="center")
+        left, top, right, bottom = math.floor(left), math.floor(top), math.ceil(right), math.ceil(bottom)
+        pad = 1 # Ruang untuk outline 1px
+        size = (right - left + 2 * pad, bottom - top + 2 * pad)
+        origin = (pad - left, pad - top)
+        # Masker cakupan (0-255) untuk teks dan outline, warna dihitung belakangan di NumPy
+        text_mask = Image.new('L', size, 0)
+        ImageDraw.Draw(text_mask).text(origin, text, font=font, fill=255, align="center")
+        outline_mask = Image.new('L', size, 0)
+        outline_draw = ImageDraw.Draw(outline_mask)
+        for dx, dy in self.OUTLINE_OFFSETS:
+            outline_draw.text((origin[0] + dx, origin[1] + dy), text, font=font, fill=255, align="center")
+
+        text_alpha = np.asarray(text_mask, dtype=np.float32)[..., None] * (self.color[3] / 65025.0)
+        outline_alpha = np.asarray(outline_mask, dtype=np.float32)[..., None] * (self.outline_color[3] / 65025.0)
+        text_rgb = np.array(self.color[:3], dtype=np.float32)
+        outline_rgb = np.array(self.outline_color[:3], dtype=np.float32)
+        if channel_order == 'BGR':
+            text_rgb, outline_rgb = text_rgb[::-1], outline_rgb[::-1]
+        # Teks di atas outline (operator "over"), hasil dalam bentuk premultiplied
+        alpha = text_alpha + outline_alpha * (1.0 - text_alpha)
+        premultiplied = text_rgb * text_alpha + outline_rgb * outline_alpha * (1.0 - text_alpha)
+        return (np.rint(premultiplied * 255).astype(np.uint16),
+                np.rint((1.0 - alpha) * 255).astype(np.uint16))
+
+    def burn(self, frame, store, position_ms, channel_order='BGR'):
+        """Blend cue yang aktif pada position_ms ke frame (in-place jika bisa), lalu kembalikan frame."""
+        if store is not self._store:
+            self._store = store
+            self._overlays.clear()
+        cue_ids = store.active_cue_ids(position_ms) if store else ()
+        if not cue_ids: return frame
+        key = (cue_ids, channel_order)
+        overlay = self._overlays.get(key)
+        if overlay is None:
+            overlay = self._render_overlay("\n".join(store.cue_text(i) for i in cue_ids), channel_order)
+            self._overlays[key] = overlay
+            while len(self._overlays) > self.max_entries:
+                self._overlays.popitem(last=False)
+        else:
+            self._overlays.move_to_end(key)
+        premultiplied, inverse_alpha = overlay
+
+        frame_h, frame_w = frame.shape[:2]
+        overlay_h, overlay_w = inverse_alpha.shape[:2]
+        x = (frame_w - overlay_w) // 2
+        y = frame_h - overlay_h - self.bottom_margin
+        # Potong overlay jika lebih besar dari frame
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(frame_w, x + overlay_w), min(frame_h, y + overlay_h)
+        if x0 >= x1 or y0 >= y1: return frame
+        overlay_slice = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+        if not frame.flags.writeable: frame = frame.copy()
+        roi = frame[y0:y1, x0:x1]
+        blended = roi * inverse_alpha[overlay_slice] # uint8 x uint16 -> uint16
+        blended += premultiplied[overlay_slice]
+        blended += 127
+        blended //= 255
+        roi[...] = blended
+        return frame
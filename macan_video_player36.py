@@ -1,6 +1,5 @@
 import sys
 import os
-import re
 import threading
 import json
 import time
@@ -14,9 +13,11 @@ from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 from PyQt6.QtCore import (
     QUrl, Qt, QTime, QEvent, QSize, QTimer, pyqtSignal, QObject, QRect,
-    QThread, pyqtSlot
+    QThread, pyqtSlot, QBuffer, QIODevice
 )
 from PyQt6.QtGui import QIcon, QPixmap, QAction, QImage
+from macan_subtitles import load_subtitles, find_sibling_subtitle, SUBTITLE_FILE_FILTER
+from macan_media import ThumbnailCache
 
 # Try to import necessary libraries
 try:
@@ -54,55 +55,143 @@ class ThumbnailPreviewWidget(QWidget):
         else:
             self.label.setText("Gagal")
 
+class FFmpegFrameServer:
+    """
+    Sesi decoder FFmpeg yang hidup lama untuk satu file. Proses FFmpeg mengalirkan frame
+    rawvideo RGB yang sudah diskalakan (tanpa encode/decode JPEG) dengan laju sampel tetap,
+    dan frame dibaca langsung ke buffer yang sudah dialokasikan sebelumnya.
+    CLI FFmpeg tidak menerima perintah seek lewat stdin. Membaca lanjut tetap men-decode setiap
+    frame di antaranya, jadi seek maju hanya dilayani dari proses yang sama jika masih dalam
+    jendela 'max_forward_ms' (kira-kira satu GOP) dan biaya baca lanjut terukur lebih murah
+    daripada memulai ulang proses dengan input -ss; selain itu proses dimulai ulang.
+    """
+    def __init__(self, width=160, height=90, sample_interval_ms=1000, max_forward_ms=2000):
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 3
+        self.sample_interval_ms = sample_interval_ms
+        self.max_forward_ms = max_forward_ms
+        self.buffer = bytearray(self.frame_size)
+        self._view = memoryview(self.buffer)
+        self.video_path = None
+        self.process = None
+        self.next_frame_ms = 0.0 # Timestamp frame yang akan keluar berikutnya dari pipe
+        self.restart_cost = None # Rata-rata bergerak (detik): mulai proses + frame pertama
+        self.read_cost = None # Rata-rata bergerak (detik) per frame sampel yang dibaca lanjut
+
+    def _start(self, video_path, timestamp_ms):
+        self.close()
+        creation_flags = 0
+        if os.name == 'nt':
+            creation_flags = subprocess.CREATE_NO_WINDOW
+        sample_fps = 1000.0 / self.sample_interval_ms
+        command = [
+            'ffmpeg', '-nostdin', '-loglevel', 'error',
+            '-ss', str(timestamp_ms / 1000.0), # Input seeking, cepat
+            '-i', video_path,
+            '-an', '-sn',
+            '-vf', f'fps={sample_fps},scale={self.width}:{self.height}',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-'
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, creationflags=creation_flags)
+        self.video_path = video_path
+        self.next_frame_ms = float(timestamp_ms)
+
+    def _read_frame(self):
+        received = 0
+        while received < self.frame_size:
+            n = self.process.stdout.readinto(self._view[received:])
+            if not n: return False # EOF: akhir video atau FFmpeg gagal
+            received += n
+        self.next_frame_ms += self.sample_interval_ms
+        return True
+
+    @staticmethod
+    def _average(previous, sample):
+        return sample if previous is None else 0.8 * previous + 0.2 * sample
+
+    def frame_at(self, video_path, timestamp_ms):
+        """Isi self.buffer dengan frame terdekat ke timestamp_ms. Return True jika berhasil."""
+        delta = timestamp_ms - self.next_frame_ms
+        skip = max(0, round(delta / self.sample_interval_ms))
+        is_alive = self.process is not None and self.process.poll() is None
+        can_continue = is_alive and video_path == self.video_path and -self.sample_interval_ms / 2 <= delta <= self.max_forward_ms
+        if can_continue and skip and self.restart_cost is not None and self.read_cost is not None:
+            # Lompat maju: baca lanjut hanya jika lebih murah daripada seek ulang dengan -ss
+            can_continue = skip * self.read_cost < self.restart_cost
+        start = time.perf_counter()
+        if not can_continue:
+            self._start(video_path, timestamp_ms)
+            skip = 0
+        for _ in range(skip + 1):
+            if not self._read_frame():
+                self.close()
+                return False
+        elapsed = time.perf_counter() - start
+        if not can_continue: self.restart_cost = self._average(self.restart_cost, elapsed)
+        else: self.read_cost = self._average(self.read_cost, elapsed / (skip + 1))
+        return True
+
+    def close(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.stdout.close()
+            self.process.wait()
+            self.process = None
+        self.video_path = None
+
 class ThumbnailGenerator(QObject):
     """
     Worker yang berjalan di thread terpisah untuk generate thumbnail menggunakan FFmpeg.
     """
     thumbnail_ready = pyqtSignal(QPixmap, float)
 
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.frame_server = FFmpegFrameServer(sample_interval_ms=cache.bucket_ms)
+
+    @pyqtSlot()
+    def release_source(self):
+        """Hentikan proses FFmpeg milik file sebelumnya saat sumber berganti."""
+        self.frame_server.close()
+
+    def _encode_jpeg(self, image):
+        buffer = QBuffer()
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "JPG", 85)
+        return bytes(buffer.data())
+
     @pyqtSlot(str, int, float)
     def generate(self, video_path, timestamp_ms, request_time):
         """Mengekstrak frame dari video pada timestamp tertentu."""
         if not video_path or not os.path.exists(video_path) or timestamp_ms < 0:
             return
 
-        timestamp_sec = timestamp_ms / 1000.0
-        
-        # --- FIX: Optimasi command FFmpeg untuk generate lebih cepat ---
-        # 1. '-ss' ditempatkan sebelum '-i' untuk "input seeking" yang jauh lebih cepat.
-        # 2. Codec diubah dari 'png' ke 'mjpeg' yang lebih cepat untuk encoding frame tunggal.
-        command = [
-            'ffmpeg',
-            '-ss', str(timestamp_sec), # Pindah ke sebelum -i untuk fast seeking
-            '-i', video_path,
-            '-vframes', '1',          # Hanya 1 frame
-            '-s', '160x90',            # Ukuran output
-            '-f', 'image2pipe',        # Output ke pipe
-            '-vcodec', 'mjpeg',        # Gunakan mjpeg untuk kecepatan
-            '-'                        # Output ke stdout
-        ]
-
-        try:
-            # Siapkan flag untuk menyembunyikan jendela konsol di Windows
-            creation_flags = 0
-            if os.name == 'nt':
-                creation_flags = subprocess.CREATE_NO_WINDOW
-
-            # Jalankan command FFmpeg dengan flag tambahan untuk menyembunyikan jendela konsol
-            process = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-                creationflags=creation_flags
-            )
+        # Cek cache dulu, hover di posisi yang sama tidak perlu menjalankan FFmpeg lagi
+        key = self.cache.make_key(video_path, timestamp_ms)
+        data = self.cache.get(key)
+        if data is not None:
             pixmap = QPixmap()
-            # --- FIX: Gunakan format 'JPG' karena codec diubah ke mjpeg ---
-            pixmap.loadFromData(process.stdout, "JPG")
+            pixmap.loadFromData(data, "JPG")
             self.thumbnail_ready.emit(pixmap, request_time)
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            return
+
+        try:
+            if not self.frame_server.frame_at(video_path, self.cache.bucket_timestamp(timestamp_ms)):
+                self.thumbnail_ready.emit(QPixmap(), request_time)
+                return
+            server = self.frame_server
+            image = QImage(server.buffer, server.width, server.height, server.width * 3, QImage.Format.Format_RGB888)
+            # fromImage menyalin data, jadi buffer aman ditimpa frame berikutnya
+            self.thumbnail_ready.emit(QPixmap.fromImage(image), request_time)
+            self.cache.put(key, self._encode_jpeg(image))
+        except (OSError, ValueError) as e:
             # Jika gagal, kirim pixmap kosong
-            print(f"Kesalahan FFmpeg: {e.stderr.decode('utf-8') if hasattr(e, 'stderr') else e}")
+            print(f"Kesalahan FFmpeg: {e}")
+            self.frame_server.close()
             self.thumbnail_ready.emit(QPixmap(), request_time)
 
 # --- IMPLEMENTASI FITUR BARU: THUMBNAIL PREVIEW (SELESAI) ---
@@ -537,12 +626,14 @@ class ModernVideoPlayer(QWidget):
     """
     # --- PENAMBAHAN BARU: Sinyal untuk thumbnail worker ---
     request_thumbnail = pyqtSignal(str, int, float)
+    release_thumbnail_source = pyqtSignal()
 
     def __init__(self):
         super().__init__()
         self.is_fullscreen = False
         self.splash_label = None
-        self.subtitles = []
+        self.subtitle_store = None
+        self.subtitle_window = (0, -1) # Rentang posisi yang teks subtitle-nya masih berlaku
         self.is_muted = False
         self.last_volume = 50
         self.SKIP_INTERVAL = 10000
@@ -613,8 +704,10 @@ class ModernVideoPlayer(QWidget):
             return
 
         self.thumbnail_preview = ThumbnailPreviewWidget()
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "thumbnails")
+        self.thumbnail_cache = ThumbnailCache(cache_dir)
         self.thumbnail_thread = QThread()
-        self.thumbnail_generator = ThumbnailGenerator()
+        self.thumbnail_generator = ThumbnailGenerator(self.thumbnail_cache)
         self.thumbnail_generator.moveToThread(self.thumbnail_thread)
         self.thumbnail_thread.start()
 
@@ -958,6 +1051,9 @@ class ModernVideoPlayer(QWidget):
             self.position_slider.hover_leave.connect(self.thumbnail_preview.hide)
             self.thumbnail_generator.thumbnail_ready.connect(self._update_thumbnail)
             self.request_thumbnail.connect(self.thumbnail_generator.generate, Qt.ConnectionType.QueuedConnection)
+            self.release_thumbnail_source.connect(self.thumbnail_generator.release_source, Qt.ConnectionType.QueuedConnection)
+            # Semua jalur (playlist, riwayat, resume, URL) memanggil setSource, jadi cukup pantau sinyal ini
+            self.player.sourceChanged.connect(self.release_thumbnail_source)
     
     # --- PENAMBAHAN BARU: SLOT UNTUK THUMBNAIL PREVIEW ---
     def _show_thumbnail_preview(self, x_pos):
@@ -1059,6 +1155,9 @@ class ModernVideoPlayer(QWidget):
     def _clear_all_history_data(self):
         self.history.clear()
         self.history_window.populate_list()
+        # Riwayat dihapus, thumbnail film yang pernah ditonton ikut dihapus
+        if self.ffmpeg_available:
+            self.thumbnail_cache.clear()
         self._save_config()
     
     def _show_mini_player(self):
@@ -1136,8 +1235,8 @@ class ModernVideoPlayer(QWidget):
         self.player.play()
         self._add_to_history(file_path, title)
         
-        srt_path = os.path.splitext(file_path)[0] + ".srt"
-        if os.path.exists(srt_path): self._load_srt_file(srt_path)
+        subtitle_path = find_sibling_subtitle(file_path)
+        if subtitle_path: self._load_srt_file(subtitle_path)
         self._update_playlist_nav_buttons()
 
     def _play_next_video(self):
@@ -1173,49 +1272,28 @@ class ModernVideoPlayer(QWidget):
             self.playlist_widget.show()
 
     def _open_srt_dialog(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Pilih Subtitle", "", "SRT Files (*.srt)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Pilih Subtitle", "", SUBTITLE_FILE_FILTER)
         if file_path: self._load_srt_file(file_path)
 
-    def _time_to_ms(self, t):
-        return (t.hour() * 3600 + t.minute() * 60 + t.second()) * 1000 + t.msec()
-
     def _load_srt_file(self, file_path):
-        self.subtitles = []
+        self.subtitle_store = None
+        self.subtitle_window = (0, -1)
         try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                content = f.read()
-            subtitle_blocks = content.strip().replace('\r\n', '\n').split('\n\n')
-
-            for block in subtitle_blocks:
-                lines = block.split('\n')
-                if len(lines) >= 3:
-                    time_line = lines[1]
-                    text = "\n".join(lines[2:])
-                    time_match = re.match(r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})', time_line)
-                    if time_match:
-                        start_time_str, end_time_str = time_match.groups()
-                        start_time = QTime.fromString(start_time_str, "hh:mm:ss,zzz")
-                        end_time = QTime.fromString(end_time_str, "hh:mm:ss,zzz")
-                        self.subtitles.append({
-                            'start_ms': self._time_to_ms(start_time),
-                            'end_ms': self._time_to_ms(end_time),
-                            'text': text.strip()
-                        })
-            if self.subtitles:
-                QMessageBox.information(self, "Sukses", f"{len(self.subtitles)} baris subtitle berhasil dimuat.")
+            store = load_subtitles(file_path)
+            if store:
+                self.subtitle_store = store
+                QMessageBox.information(self, "Sukses", f"{len(store)} baris subtitle berhasil dimuat.")
             else:
                 QMessageBox.warning(self, "Gagal Memuat", "Tidak dapat menemukan subtitle yang valid di dalam file.")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Gagal memuat file subtitle: {e}")
-            self.subtitles = []
 
     def _update_subtitle(self, position):
-        if not self.subtitles: return
-        current_text = ""
-        for sub in self.subtitles:
-            if sub['start_ms'] <= position <= sub['end_ms']:
-                current_text = sub['text']
-                break
+        if not self.subtitle_store: return
+        window_start, window_end = self.subtitle_window
+        if window_start <= position < window_end: return # Cue aktif belum berubah sejak lookup terakhir
+        current_text = self.subtitle_store.get_subtitle(position)
+        self.subtitle_window = (self.subtitle_store.segment_start_ms(position), self.subtitle_store.next_change_ms(position))
         if current_text:
             self.subtitle_label.setText(current_text)
             if not self.subtitle_label.isVisible(): self.subtitle_label.show()
@@ -1471,6 +1549,7 @@ class ModernVideoPlayer(QWidget):
         if self.ffmpeg_available:
             self.thumbnail_thread.quit()
             self.thumbnail_thread.wait() # Tunggu hingga thread benar-benar berhenti
+            self.thumbnail_generator.frame_server.close()
             
         event.accept()
 
@@ -1,15 +1,16 @@
 import sys
 import os
-import re
 import threading
 import json
 import time
 import subprocess
 import tempfile
+import struct
+from collections import OrderedDict, deque
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
     QFileDialog, QLineEdit, QLabel, QSlider, QMessageBox, QListWidget, QListWidgetItem,
-    QAbstractItemView, QDialog
+    QAbstractItemView, QDialog, QToolTip
 )
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 # --- PERUBAHAN UTAMA: QVideoWidget tidak lagi digunakan ---
@@ -20,6 +21,8 @@ from PyQt6.QtCore import (
 )
 from PyQt6.QtGui import QIcon, QPixmap, QAction, QImage, QFont
 import numpy as np
+from macan_subtitles import load_subtitles, find_sibling_subtitle, SUBTITLE_FILE_FILTER, SubtitleBurner
+from macan_media import PacketIndex
 
 # --- PERUBAHAN UTAMA: Impor pustaka baru ---
 try:
@@ -67,6 +70,27 @@ class ThumbnailPreviewWidget(QWidget):
         else:
             self.label.setText("Gagal")
 
+class PacketIndexWorker(QThread):
+    """Memuat PacketIndex dari disk, atau membangunnya di background jika belum ada."""
+    index_ready = pyqtSignal(object)
+
+    def __init__(self, video_path, cache_dir, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.cache_dir = cache_dir
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            index = PacketIndex.load_or_build(self.video_path, self.cache_dir, lambda: self._cancelled)
+            if index is not None and not self._cancelled:
+                self.index_ready.emit(index)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Gagal membangun indeks keyframe: {e}")
+
 class ThumbnailGenerator(QObject):
     """
     --- PERUBAHAN UTAMA: Worker yang dioptimalkan untuk generate thumbnail menggunakan OpenCV ---
@@ -74,6 +98,14 @@ class ThumbnailGenerator(QObject):
     """
     thumbnail_ready = pyqtSignal(QPixmap, float)
 
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.packet_index = None
+
+    @pyqtSlot(object)
+    def set_packet_index(self, packet_index):
+        self.packet_index = packet_index
+
     @pyqtSlot(str, int, float)
     def generate(self, video_path, timestamp_ms, request_time):
         """Mengekstrak frame dari video pada timestamp tertentu menggunakan OpenCV."""
@@ -87,14 +119,18 @@ class ThumbnailGenerator(QObject):
                 self.thumbnail_ready.emit(QPixmap(), request_time)
                 return
 
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            if fps == 0: # Handle division by zero
-                self.thumbnail_ready.emit(QPixmap(), request_time)
-                cap.release()
-                return
-                
-            frame_number = int((timestamp_ms / 1000.0) * fps)
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            if self.packet_index and self.packet_index.video_path == video_path:
+                # Seek langsung ke keyframe terdekat, tanpa menebak nomor frame dari fps
+                cap.set(cv2.CAP_PROP_POS_MSEC, self.packet_index.nearest_keyframe(timestamp_ms))
+            else:
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                if fps == 0: # Handle division by zero
+                    self.thumbnail_ready.emit(QPixmap(), request_time)
+                    cap.release()
+                    return
+
+                frame_number = int((timestamp_ms / 1000.0) * fps)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
             
             ret, frame = cap.read()
             cap.release()
@@ -151,35 +187,405 @@ class ClickableSlider(QSlider):
 # --- MODIFIKASI SELESAI ---
 
 # --- PERUBAHAN UTAMA: Kelas Baru untuk Playback Video dengan OpenCV ---
+class FrameRing:
+    """
+    Ring buffer slot frame berukuran tetap antara tahap decode dan tahap presentasi.
+    Setiap slot adalah QImage RGB888 yang dialokasikan sekali dan ditulis ulang lewat view NumPy.
+    Jika QImage sebuah slot masih dipegang GUI saat slot dipakai ulang, bits() memicu detach
+    (copy-on-write Qt), sehingga frame yang sedang ditampilkan tidak pernah tertimpa.
+    """
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self._cond = threading.Condition()
+        self._images = [None] * capacity
+        self._pts_ms = [0.0] * capacity
+        self._read = 0
+        self._count = 0
+        self._closed = False
+        self.generation = 0 # Naik setiap clear() (seek/ganti video); frame generasi lama dibuang
+        self.eof = False
+
+    def __len__(self):
+        return self._count
+
+    def writable_slot(self, w, h, should_abort):
+        """Tunggu slot kosong lalu kembalikan (indeks, view NumPy RGB), atau None jika dibatalkan."""
+        with self._cond:
+            while self._count >= self.capacity and not self._closed and not should_abort():
+                self._cond.wait(0.05)
+            if self._closed or should_abort(): return None
+            index = (self._read + self._count) % self.capacity
+            image = self._images[index]
+            if image is None or image.width() != w or image.height() != h:
+                image = self._images[index] = QImage(w, h, QImage.Format.Format_RGB888)
+        ptr = image.bits() # Non-const: detach di sini jika GUI masih memegang frame lama slot ini
+        ptr.setsize(image.sizeInBytes())
+        view = np.ndarray((h, w, 3), np.uint8, buffer=ptr, strides=(image.bytesPerLine(), 3, 1))
+        return index, view
+
+    def commit(self, index, pts_ms, generation):
+        with self._cond:
+            if generation != self.generation: return # Ring sudah di-clear selama decode
+            self._pts_ms[index] = pts_ms
+            self._count += 1
+            self._cond.notify_all()
+
+    def peek(self, offset=0):
+        """
+        (QImage, pts_ms, generasi) frame ke-`offset` dari kepala antrean, atau None.
+        QImage yang dikembalikan adalah salinan dangkal: selama dipegang pemanggil, slot yang
+        ditulis ulang thread decode (mis. setelah clear()) akan detach dan tidak merobek frame ini.
+        """
+        with self._cond:
+            if offset >= self._count: return None
+            index = (self._read + offset) % self.capacity
+            return QImage(self._images[index]), self._pts_ms[index], self.generation
+
+    def wait_for_frame(self, timeout):
+        with self._cond:
+            if not self._count and not self._closed: self._cond.wait(timeout)
+            return self._count > 0
+
+    def release(self, generation):
+        """Lepas frame kepala; diabaikan jika ring sudah di-clear sejak frame itu di-peek."""
+        with self._cond:
+            if not self._count or generation != self.generation: return
+            self._read = (self._read + 1) % self.capacity
+            self._count -= 1
+            self._cond.notify_all()
+
+    def mark_eof(self, generation):
+        with self._cond:
+            if generation == self.generation: self.eof = True
+            self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            self._read = self._count = 0
+            self.generation += 1
+            self.eof = False
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class SeekEngine:
+    """
+    Antrean seek satu slot: permintaan beruntun (mis. saat slider digeser) digabung menjadi
+    target terbaru, jadi thread decode hanya mengerjakan seek yang masih relevan.
+    Latensi setiap seek (permintaan -> frame target siap) dicatat bersama jumlah permintaan
+    yang digabung ke dalamnya.
+    """
+    def __init__(self, history_size=100):
+        self._lock = threading.Lock()
+        self._pending = None
+        self.history = deque(maxlen=history_size) # (target_ms, mode, latensi ms, jumlah digabung)
+
+    def request(self, target_ms, precise=True):
+        with self._lock:
+            coalesced = self._pending['coalesced'] + 1 if self._pending else 0
+            self._pending = {'target_ms': target_ms, 'precise': precise,
+                             'requested_at': time.perf_counter(), 'coalesced': coalesced}
+
+    def has_pending(self):
+        return self._pending is not None
+
+    def take(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+            return pending
+
+    def clear(self):
+        with self._lock:
+            self._pending = None
+
+    def complete(self, request, mode):
+        latency_ms = (time.perf_counter() - request['requested_at']) * 1000
+        self.history.append((request['target_ms'], mode, latency_ms, request['coalesced']))
+
+    def summary(self):
+        """Ringkasan latensi seek terakhir per jenis (akurat/preview), atau None jika belum ada seek."""
+        history = list(self.history)
+        if not history: return None
+        parts = []
+        for label, precise in (("akurat", True), ("preview", False)):
+            latencies = [latency for _, mode, latency, _ in history if ("preview" not in mode) == precise]
+            if latencies: parts.append(f"{label} {sum(latencies) / len(latencies):.1f} ms rata-rata, maks {max(latencies):.1f} ms")
+        coalesced = sum(entry[3] for entry in history)
+        return f"Seek ({len(history)} terakhir): " + "; ".join(parts) + f"; {coalesced} permintaan digabung"
+
+
+class AudioClock:
+    """
+    Posisi audio QMediaPlayer yang bisa dibaca dari thread video. QMediaPlayer tidak thread-safe,
+    jadi thread GUI menyetor sampel position() setiap kali berubah dan pembaca mengekstrapolasi
+    dengan jam monotonic. Posisi dari backend bertingkat (update per puluhan ms), sehingga sampel
+    baru dihaluskan ke estimasi berjalan; lompatan besar (seek) langsung diikuti.
+    """
+    def __init__(self, smoothing=0.2, snap_ms=150):
+        self.smoothing = smoothing
+        self.snap_ms = snap_ms
+        self._lock = threading.Lock()
+        self._anchor = None # (waktu monotonic, posisi ms)
+        self._running = False
+        self._rate = 1.0
+        self._last_reported = None
+
+    def _estimate(self, now):
+        anchor_time, anchor_ms = self._anchor
+        return anchor_ms + (now - anchor_time) * 1000.0 * self._rate if self._running else anchor_ms
+
+    def update(self, position_ms, running, rate):
+        now = time.perf_counter()
+        with self._lock:
+            if self._anchor is None or not running or not self._running:
+                self._anchor = (now, float(position_ms))
+            elif position_ms != self._last_reported:
+                estimate = self._estimate(now)
+                error = position_ms - estimate
+                self._anchor = (now, float(position_ms) if abs(error) > self.snap_ms else estimate + error * self.smoothing)
+            else:
+                self._anchor = (now, self._estimate(now))
+            self._running, self._rate, self._last_reported = running, rate, position_ms
+
+    def seek(self, position_ms):
+        with self._lock:
+            self._anchor = (time.perf_counter(), float(position_ms))
+            self._last_reported = None
+
+    def reset(self):
+        with self._lock:
+            self._anchor, self._running, self._last_reported = None, False, None
+
+    def position_ms(self):
+        """Posisi audio saat ini (ms), atau None jika audio tidak sedang berjalan."""
+        with self._lock:
+            if self._anchor is None or not self._running: return None
+            return self._estimate(time.perf_counter())
+
+
+class FrameInterpolator:
+    """
+    Tahap interpolasi "Force 60 FPS": mensintesis frame di antara dua frame sumber bertetangga.
+    Mode 'blend' mencampur kedua frame secara linear (cv2.addWeighted). Mode 'flow' memakai
+    optical flow Farneback yang dihitung thread decode (prepare_flow) pada frame grayscale yang
+    diperkecil, satu kali per pasangan frame; thread presentasi hanya meng-upsample peta warp
+    untuk posisi waktu t, me-warp kedua frame, lalu mencampurnya.
+    Biaya dicatat terpisah: flow per pasangan (thread decode) dan sintesis per frame (thread
+    presentasi). Jika biaya sintesis melebihi anggaran, mode turun bertahap (flow -> blend ->
+    ulang frame) dan mode pilihan dicoba lagi secara berkala; jika flow sebuah pasangan belum
+    siap, frame itu dicampur biasa.
+    """
+    MODES = ("off", "blend", "flow")
+
+    def __init__(self, mode="off", target_fps=60.0, budget_ratio=0.6, flow_scale=0.25, probe_interval=120, max_flows=16):
+        self.mode = mode # Ditulis thread GUI; pembaca mengambil snapshot sekali per tick
+        self.target_fps = target_fps
+        self.budget_ratio = budget_ratio # Bagian interval keluaran yang boleh dipakai interpolasi
+        self.flow_scale = flow_scale
+        self.probe_interval = probe_interval # Jumlah frame fallback sebelum mode pilihan dicoba ulang
+        self.max_flows = max_flows
+        self.cost_ms = {"blend": None, "flow": None} # Rata-rata bergerak biaya sintesis per frame
+        self.flow_cost_ms = None # Rata-rata bergerak biaya optical flow per pasangan (thread decode)
+        self.last_mode = None
+        self.interpolated_frames = 0
+        self.repeated_frames = 0
+        self.flow_pairs = 0
+        self._fallback_ticks = 0
+        self._probing = False
+        self._flow_lock = threading.Lock()
+        self._flows = OrderedDict() # (generasi, pts_ms frame awal) -> flow kecil dalam satuan piksel penuh
+        self._previous = None # (generasi, pts_ms, grayscale kecil) frame terakhir yang di-decode
+        self._grid = None # (w, h, grid kecil (sh, sw, 2)) koordinat piksel penuh untuk titik-titik flow
+        self._output_times = deque(maxlen=int(target_fps))
+
+    @property
+    def budget_ms(self):
+        return 1000.0 / self.target_fps * self.budget_ratio
+
+    def is_active(self, source_fps, mode=None):
+        """Interpolasi hanya berguna jika fps sumber (sudah dikali kecepatan) di bawah target."""
+        mode = self.mode if mode is None else mode
+        return mode != "off" and 0 < source_fps < self.target_fps * 0.95
+
+    def reset(self):
+        with self._flow_lock:
+            self._flows.clear()
+        self._fallback_ticks = 0
+
+    def note_output(self):
+        """Catat satu frame yang dikirim ke GUI (sumber maupun sintetis) untuk mengukur fps keluaran."""
+        self._output_times.append(time.perf_counter())
+
+    def output_fps(self):
+        times = self._output_times
+        if len(times) < 2 or time.perf_counter() - times[-1] > 0.5: return None
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    @staticmethod
+    def _view(image, writable=False):
+        # constBits() untuk frame sumber: tidak memicu detach slot FrameRing yang juga dipegang GUI
+        ptr = image.bits() if writable else image.constBits()
+        ptr.setsize(image.sizeInBytes())
+        return np.ndarray((image.height(), image.width(), 3), np.uint8, buffer=ptr, strides=(image.bytesPerLine(), 3, 1))
+
+    def prepare_flow(self, frame_bgr, pts_ms, generation, source_fps):
+        """
+        Dipanggil thread decode untuk setiap frame yang masuk ring: hitung flow dari frame
+        sebelumnya (generasi sama) ke frame ini. Dilewati jika mode bukan 'flow' atau jika biaya
+        per pasangan sudah memakan lebih dari separuh interval frame sumber (decode jangan tertahan).
+        """
+        mode = self.mode
+        if mode != "flow" or not self.is_active(source_fps, mode):
+            self._previous = None
+            return
+        h, w = frame_bgr.shape[:2]
+        small_w, small_h = max(16, int(w * self.flow_scale)), max(16, int(h * self.flow_scale))
+        start = time.perf_counter()
+        small = cv2.cvtColor(cv2.resize(frame_bgr, (small_w, small_h), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        previous, self._previous = self._previous, (generation, pts_ms, small)
+        if previous is None or previous[0] != generation or previous[2].shape != small.shape: return
+        if self.flow_cost_ms is not None and self.flow_cost_ms > 500.0 / source_fps and self.flow_pairs % self.probe_interval:
+            self.flow_pairs += 1 # Terlalu mahal untuk CPU ini: presenter memakai blend, sesekali diukur ulang
+            return
+        flow = cv2.calcOpticalFlowFarneback(previous[2], small, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+        flow[..., 0] *= w / small_w # Satuan piksel frame penuh
+        flow[..., 1] *= h / small_h
+        with self._flow_lock:
+            self._flows[(generation, previous[1])] = flow
+            while len(self._flows) > self.max_flows: self._flows.popitem(last=False)
+        cost_ms = (time.perf_counter() - start) * 1000
+        self.flow_cost_ms = cost_ms if self.flow_cost_ms is None else 0.8 * self.flow_cost_ms + 0.2 * cost_ms
+        self.flow_pairs += 1
+
+    def _choose_mode(self, requested):
+        if requested not in self.cost_ms: return "repeat" # 'off' (dimatikan di tengah tick)
+        mode, budget = requested, self.budget_ms
+        if mode == "flow" and (self.cost_ms["flow"] or 0) > budget: mode = "blend"
+        if mode == "blend" and (self.cost_ms["blend"] or 0) > budget: mode = "repeat"
+        self._probing = False
+        if mode != requested:
+            self._fallback_ticks += 1
+            if self._fallback_ticks >= self.probe_interval:
+                # Sesekali coba lagi mode pilihan: beban CPU bisa sudah turun
+                self._fallback_ticks = 0
+                self._probing = True
+                mode = requested
+        return mode
+
+    def _warp_blend(self, a, b, t, flow, dst):
+        h, w = a.shape[:2]
+        small_h, small_w = flow.shape[:2]
+        if self._grid is None or self._grid[:2] != (w, h) or self._grid[2].shape[:2] != (small_h, small_w):
+            # Pusat piksel grid kecil dalam koordinat frame penuh (sejajar dengan cv2.resize)
+            xs = (np.arange(small_w, dtype=np.float32) + 0.5) * (w / small_w) - 0.5
+            ys = (np.arange(small_h, dtype=np.float32) + 0.5) * (h / small_h) - 0.5
+            self._grid = (w, h, np.dstack(np.meshgrid(xs, ys)).astype(np.float32))
+        grid = self._grid[2]
+        # Peta warp dibuat di resolusi flow lalu di-upsample: A ditarik mundur t, B ditarik maju (1 - t)
+        map_a = cv2.resize(grid - t * flow, (w, h), interpolation=cv2.INTER_LINEAR)
+        map_b = cv2.resize(grid + (1.0 - t) * flow, (w, h), interpolation=cv2.INTER_LINEAR)
+        warped_a = cv2.remap(a, map_a, None, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        warped_b = cv2.remap(b, map_b, None, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        cv2.addWeighted(warped_a, 1.0 - t, warped_b, t, 0, dst=dst)
+
+    def interpolate(self, first, second, t, pair_key, mode):
+        """
+        Frame sintetis (QImage RGB888 baru) pada posisi t (0..1) di antara QImage first dan second,
+        atau None jika frame yang sedang tampil cukup diulang. `mode` adalah snapshot self.mode
+        yang diambil presenter sekali per tick.
+        """
+        mode = self._choose_mode(mode)
+        w, h = first.width(), first.height()
+        if mode == "repeat" or second.width() != w or second.height() != h:
+            self.last_mode = "repeat"
+            self.repeated_frames += 1
+            return None
+        flow = None
+        if mode == "flow":
+            with self._flow_lock:
+                flow = self._flows.get(pair_key)
+            if flow is None: mode = "blend" # Flow pasangan ini belum/tidak dihitung thread decode
+        start = time.perf_counter()
+        output = QImage(w, h, QImage.Format.Format_RGB888)
+        a, b, dst = self._view(first), self._view(second), self._view(output, writable=True)
+        if flow is not None: self._warp_blend(a, b, t, flow, dst)
+        else: cv2.addWeighted(a, 1.0 - t, b, t, 0, dst=dst)
+        cost_ms = (time.perf_counter() - start) * 1000
+        previous = self.cost_ms[mode]
+        self.cost_ms[mode] = cost_ms if previous is None or self._probing else 0.8 * previous + 0.2 * cost_ms
+        self.last_mode = mode
+        self.interpolated_frames += 1
+        return output
+
+
 class OpenCVVideoThread(QThread):
     """
-    Thread ini menangani pembacaan frame video menggunakan OpenCV dan merender subtitle.
-    Ini memisahkan logika video dari UI thread utama untuk mencegah pembekuan.
+    Pemutaran video OpenCV dalam dua tahap. Thread decode membaca frame, merender subtitle,
+    dan mengonversinya ke slot FrameRing; thread ini (presentasi) menampilkan frame sesuai PTS
+    terhadap jam monotonic: frame yang terlambat lebih dari satu interval dibuang, dan jika
+    decode tertinggal frame terakhir tetap tampil (repeat) sampai frame berikutnya siap.
+    Jika audio_clock berjalan, audio menjadi master: setiap frame yang tampil mengukur selisih
+    A/V, selisih kecil dikoreksi perlahan (interval frame digeser), selisih lebih dari satu frame
+    dikoreksi penuh sehingga frame berikutnya dibuang (video tertinggal) atau ditahan (video mendahului).
+    Jika FrameInterpolator aktif, frame sumber yang sudah tampil ditahan di kepala ring dan, sampai
+    frame berikutnya jatuh tempo, frame sintetis dikirim pada setiap tick keluaran (1/60 detik).
     """
     frame_ready = pyqtSignal(QImage)
     position_changed = pyqtSignal(int)
     duration_changed = pyqtSignal(int)
     playback_finished = pyqtSignal()
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, ring_capacity=8, audio_clock=None, drift_gain=0.1):
         super().__init__(parent)
+        self.audio_clock = audio_clock
+        self.drift_gain = drift_gain
+        self.av_offset_ms = None # Selisih A/V terukur (rata-rata bergerak); + = video mendahului audio
+        self.last_av_offset_ms = None
         self.video_path = None
         self.cap = None
+        self.fps = 25
+        self.duration_ms = 0
         self.is_playing = False
         self.is_running = True
         self.playback_rate = 1.0
-        self.seek_position_ms = -1
-        self.subtitles = []
+        self.seek_engine = SeekEngine()
+        self.scrubbing = False # Slider sedang digeser: decode hanya frame preview di keyframe
+        self.subtitle_store = None # CueStore, lookup hanya dilakukan dari thread decode
+        self.packet_index = None # Diisi oleh PacketIndexWorker jika tersedia
+        self.frame_ring = FrameRing(ring_capacity)
+        self._cap_lock = threading.Lock() # Dipegang thread decode selama memakai self.cap
+        self._decode_buffer = None # Buffer BGR yang dipakai ulang oleh cap.read()
+        self._decoded_pts_ms = None # PTS frame terakhir yang di-decode; None = posisi decoder tidak diketahui
+        self._decoder = None
+        self._clock = None # (waktu monotonic, pts_ms) acuan presentasi; None = set ulang di frame berikutnya
+        self._clock_lock = threading.Lock() # _clock ditulis dari thread GUI, decode, dan presentasi
+        self.presented_frames = 0
+        self.dropped_frames = 0
+        self.interpolator = FrameInterpolator()
 
         # Pengaturan subtitle
         self.subtitle_font_path = "arial.ttf" # Coba ganti dengan font yang ada di sistem Anda
         self.subtitle_font_size = 24
         self.subtitle_color = (255, 255, 255, 220) # RGBA
         self.subtitle_outline_color = (0, 0, 0, 220) # RGBA
+        self.subtitle_burner = SubtitleBurner(self.subtitle_font_path, self.subtitle_font_size,
+                                              self.subtitle_color, self.subtitle_outline_color)
 
     def load_video(self, video_path):
+        if video_path != self.video_path: self.packet_index = None
         self.video_path = video_path
-        self.cap = cv2.VideoCapture(self.video_path)
+        cap = cv2.VideoCapture(self.video_path)
+        with self._cap_lock:
+            old_cap, self.cap = self.cap, cap
+            self.seek_engine.clear()
+            self._decoded_pts_ms = None
+            self.frame_ring.clear()
+            self._reset_clock()
+        if old_cap is not None: old_cap.release()
         if not self.cap.isOpened():
             print(f"Error: Tidak dapat membuka video {self.video_path}")
             return
@@ -193,95 +599,220 @@ class OpenCVVideoThread(QThread):
         self.duration_changed.emit(self.duration_ms)
         self.play()
 
+    def _decode_loop(self):
+        """Tahap decode: isi FrameRing sejauh kapasitasnya, terlepas dari tempo presentasi."""
+        ring = self.frame_ring
+        while self.is_running:
+            request = mode = None
+            with self._cap_lock:
+                cap = self.cap
+                ready = cap is not None and cap.isOpened()
+                if ready:
+                    # Logika seeking: hanya target terbaru yang dikerjakan
+                    request = self.seek_engine.take()
+                    if request is not None:
+                        ring.clear()
+                        self._reset_clock() # Sesudah clear(): _anchor_clock melihat generasi baru atau jam kosong
+                        mode = self._seek_to(request['target_ms'], request['precise'])
+                    generation = ring.generation
+                    # Selama scrubbing cukup satu frame preview per seek, ring tidak diisi
+                    ready = not ring.eof and not (self.scrubbing and request is None)
+                if ready:
+                    ret, frame = cap.read(self._decode_buffer)
+                    if not ret:
+                        self._decoded_pts_ms = None
+                        ring.mark_eof(generation)
+                        continue
+                    self._decode_buffer = frame
+                    pts_ms = self._decoded_pts_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+            if not ready:
+                time.sleep(0.01 if self.scrubbing else 0.02)
+                continue
+            # Render subtitle (in-place di buffer BGR, hanya area subtitle)
+            frame = self.draw_subtitle(frame, int(pts_ms))
+            h, w = frame.shape[:2]
+            if request is not None:
+                if not request['precise'] or not self.is_playing:
+                    # Tampilkan frame target langsung (presenter sedang diam saat scrubbing/pause)
+                    image = QImage(w, h, QImage.Format.Format_RGB888)
+                    ptr = image.bits()
+                    ptr.setsize(image.sizeInBytes())
+                    cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=np.ndarray((h, w, 3), np.uint8, buffer=ptr, strides=(image.bytesPerLine(), 3, 1)))
+                    self.frame_ready.emit(image)
+                    self.position_changed.emit(int(pts_ms))
+                self.seek_engine.complete(request, mode)
+                if not request['precise']: continue
+            # Seek baru membatalkan penantian slot, supaya seek saat ring penuh (pause) tetap diproses
+            slot = ring.writable_slot(w, h, lambda: not self.is_running or generation != ring.generation or self.seek_engine.has_pending())
+            if slot is None: continue
+            index, rgb_view = slot
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_view)
+            ring.commit(index, pts_ms, generation)
+            # Optical flow untuk mode 'flow' dihitung di sini, jauh di depan tenggat presentasi
+            self.interpolator.prepare_flow(frame, pts_ms, generation, self.fps * self.playback_rate)
+
     def run(self):
+        self._decoder = threading.Thread(target=self._decode_loop, name="OpenCVDecoder", daemon=True)
+        self._decoder.start()
+        ring = self.frame_ring
+        interpolator = self.interpolator
+        held = None # Generasi ring jika frame kepala sudah tampil dan ditahan sebagai dasar interpolasi
+        next_tick = 0.0
         while self.is_running:
-            if self.is_playing and self.cap:
-                start_time = time.perf_counter()
-
-                # Logika seeking
-                if self.seek_position_ms >= 0:
-                    frame_pos = int((self.seek_position_ms / 1000.0) * self.fps)
-                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                    self.seek_position_ms = -1
-
-                ret, frame = self.cap.read()
-                
-                if ret:
-                    current_pos_ms = int(self.cap.get(cv2.CAP_PROP_POS_MSEC))
-                    
-                    # Render subtitle
-                    frame = self.draw_subtitle(frame, current_pos_ms)
-
-                    # Konversi ke QImage
-                    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = rgb_image.shape
-                    bytes_per_line = ch * w
-                    qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-                    
-                    self.frame_ready.emit(qt_image)
-                    self.position_changed.emit(current_pos_ms)
-                    
-                    # Sinkronisasi frame rate
-                    elapsed = time.perf_counter() - start_time
-                    delay = (1.0 / (self.fps * self.playback_rate)) - elapsed
-                    if delay > 0:
-                        self.msleep(int(delay * 1000))
-                else:
+            if not self.is_playing or self.scrubbing or not ring.wait_for_frame(0.02):
+                if self.is_playing and not self.scrubbing and ring.eof and not len(ring):
                     self.is_playing = False
                     self.playback_finished.emit()
+                if not self.is_playing or self.scrubbing:
+                    self._reset_clock()
+                    self.msleep(10) # Tunggu jika tidak sedang playing
+                continue
+            if held is not None:
+                if held != ring.generation:
+                    # Seek/ganti video: frame yang ditahan sudah dibuang oleh clear()
+                    held = None
+                    interpolator.reset()
+                    continue
+                following = ring.peek(1)
+                mode = interpolator.mode # Snapshot sekali per tick: tombol GUI bisa mengubahnya kapan saja
+                if not interpolator.is_active(self.fps * self.playback_rate, mode) or (following is None and ring.eof):
+                    ring.release(held)
+                    held = None
+                    continue
+                head = ring.peek()
+                if following is None or head is None:
+                    time.sleep(0.002) # Decode tertinggal: frame yang tampil diulang
+                    continue
+                (image, pts_ms, generation), (next_image, next_pts_ms, next_generation) = head, following
+                if generation != held or next_generation != held: continue
+                audio_ms = self.audio_clock.position_ms() if self.audio_clock else None
+                now = time.perf_counter()
+                clock = self._anchor_clock(now, pts_ms if audio_ms is None else audio_ms, held)
+                if clock is None: continue
+                clock_time, clock_pts = clock
+                tick = 1.0 / interpolator.target_fps
+                next_due = clock_time + (next_pts_ms - clock_pts) / 1000.0 / self.playback_rate
+                if now >= next_due - tick / 2:
+                    # Frame sumber berikutnya jatuh tempo: lepas frame yang ditahan, tampilkan lewat jalur biasa
+                    ring.release(held)
+                    held = None
+                    continue
+                if now < next_tick:
+                    time.sleep(min(next_tick - now, next_due - tick / 2 - now, 0.02))
+                    continue
+                media_ms = clock_pts + (now - clock_time) * 1000.0 * self.playback_rate
+                t = min(max((media_ms - pts_ms) / (next_pts_ms - pts_ms), 0.0), 1.0) if next_pts_ms > pts_ms else 0.0
+                frame = interpolator.interpolate(image, next_image, t, (held, pts_ms), mode)
+                if frame is not None and held == ring.generation:
+                    self.frame_ready.emit(frame)
+                    interpolator.note_output()
+                next_tick += tick
+                if next_tick < now: next_tick = now + tick # Tertinggal lebih dari satu tick: jangan kejar
+                continue
+            head = ring.peek()
+            if head is None: continue
+            image, pts_ms, generation = head
+            audio_ms = self.audio_clock.position_ms() if self.audio_clock else None
+            now = time.perf_counter()
+            # Jam dibaca sekali ke variabel lokal: thread lain bisa mengosongkannya kapan saja
+            clock = self._anchor_clock(now, pts_ms if audio_ms is None else audio_ms, generation)
+            if clock is None: continue # Frame basi: ring di-clear (seek) setelah peek
+            clock_time, clock_pts = clock
+            frame_interval = 1.0 / (self.fps * self.playback_rate)
+            due = clock_time + (pts_ms - clock_pts) / 1000.0 / self.playback_rate
+            wait = due - now
+            if wait > 0:
+                # Tidur sampai tenggat frame (dipotong agar pause/seek tetap responsif)
+                time.sleep(min(wait, 0.02))
+                continue
+            if -wait > 0.5 and audio_ms is None:
+                # Tertinggal jauh (mis. decode tersendat): jangan kejar, set ulang jam presentasi
+                with self._clock_lock:
+                    if generation == ring.generation: self._clock = (now, pts_ms)
+            elif -wait > frame_interval and ring.peek(1) is not None:
+                ring.release(generation)
+                self.dropped_frames += 1
+                continue
+            if generation != ring.generation: continue # Seek selama menunggu tenggat: jangan tampilkan frame lama
+            self.frame_ready.emit(image)
+            self.position_changed.emit(int(pts_ms))
+            interpolator.note_output()
+            if interpolator.is_active(self.fps * self.playback_rate):
+                held = generation # Tahan frame ini di kepala ring sebagai frame awal interpolasi
+                next_tick = now + 1.0 / interpolator.target_fps
             else:
-                self.msleep(50) # Tunggu jika tidak sedang playing
+                ring.release(generation)
+            self.presented_frames += 1
+            if audio_ms is not None: self._correct_drift(pts_ms, audio_ms)
 
+        ring.close()
+        self._decoder.join()
         if self.cap:
             self.cap.release()
 
-    def draw_subtitle(self, frame, current_pos_ms):
-        """Merender teks subtitle ke frame video menggunakan Pillow."""
-        text_to_draw = ""
-        for sub in self.subtitles:
-            if sub['start_ms'] <= current_pos_ms <= sub['end_ms']:
-                text_to_draw = sub['text']
-                break
-        
-        if not text_to_draw:
-            return frame
+    def _correct_drift(self, pts_ms, audio_ms):
+        """Geser jam presentasi ke arah audio berdasarkan selisih A/V frame yang baru tampil."""
+        offset_ms = pts_ms - audio_ms
+        self.last_av_offset_ms = offset_ms
+        self.av_offset_ms = offset_ms if self.av_offset_ms is None else 0.9 * self.av_offset_ms + 0.1 * offset_ms
+        # Di bawah satu frame cukup dorong sedikit (interval frame memanjang/memendek), di atasnya koreksi penuh
+        gain = 1.0 if abs(offset_ms) > 1000.0 / self.fps else self.drift_gain
+        with self._clock_lock:
+            clock = self._clock
+            if clock is not None:
+                self._clock = (clock[0] + offset_ms * gain / 1000.0 / self.playback_rate, clock[1])
+
+    def _reset_clock(self):
+        with self._clock_lock:
+            self._clock = None
+
+    def _anchor_clock(self, now, reference_ms, generation):
+        """Jam presentasi (diset dari reference_ms jika kosong), atau None jika frame generasi ini sudah basi."""
+        with self._clock_lock:
+            # Jangan set jam dari PTS frame lama: seek maju akan menunggu sejauh jarak seek
+            if generation != self.frame_ring.generation: return None
+            if self._clock is None: self._clock = (now, reference_ms)
+            return self._clock
+
+    def _seek_to(self, target_ms, precise=True):
+        """Posisikan decoder untuk target_ms; kembalikan mode yang dipakai (untuk laporan latensi)."""
+        index = self.packet_index
+        if not index or index.video_path != self.video_path:
+            frame_pos = int((target_ms / 1000.0) * self.fps)
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
+            self._decoded_pts_ms = None
+            return "frame" if precise else "frame (preview)"
+        if not precise:
+            # Preview saat drag: cukup keyframe terdekat, cukup decode satu frame
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, index.nearest_keyframe(target_ms))
+            self._decoded_pts_ms = None
+            return "preview"
+        keyframe_ms = index.keyframe_before(target_ms)
+        current_ms = self._decoded_pts_ms
+        if current_ms is not None and keyframe_ms <= current_ms < target_ms:
+            # Target masih di GOP yang sama di depan posisi decoder (mis. setelah preview): decode maju saja
+            skip = index.frames_between(current_ms, target_ms) - 1
+            mode = "akurat (maju)"
+        else:
+            # Seek ke keyframe sebelum target, lalu decode maju tepat sejumlah frame (akurat untuk VFR)
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, keyframe_ms)
+            skip = index.frames_between(keyframe_ms, target_ms)
+            mode = "akurat"
+        for _ in range(max(0, skip)):
+            if not self.cap.grab(): break
+        self._decoded_pts_ms = None
+        return mode
 
+    def draw_subtitle(self, frame, current_pos_ms):
+        """Blend overlay subtitle (sudah dirender per cue) ke bagian bawah frame BGR."""
         try:
-            # Konversi frame OpenCV ke gambar Pillow
-            pil_img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            draw = ImageDraw.Draw(pil_img, "RGBA")
-            
-            try:
-                font = ImageFont.truetype(self.subtitle_font_path, self.subtitle_font_size)
-            except IOError:
-                font = ImageFont.load_default() # Fallback
-
-            # Hitung posisi teks
-            text_bbox = draw.textbbox((0, 0), text_to_draw, font=font, align="center")
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            
-            img_width, img_height = pil_img.size
-            x = (img_width - text_width) / 2
-            y = img_height - text_height - 30 # 30 piksel dari bawah
-            
-            # Gambar outline/stroke
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    if dx != 0 or dy != 0:
-                        draw.text((x+dx, y+dy), text_to_draw, font=font, fill=self.subtitle_outline_color, align="center")
-
-            # Gambar teks utama
-            draw.text((x, y), text_to_draw, font=font, fill=self.subtitle_color, align="center")
-
-            # Konversi kembali ke format OpenCV
-            return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+            return self.subtitle_burner.burn(frame, self.subtitle_store, current_pos_ms, 'BGR')
         except Exception as e:
             print(f"Error saat merender subtitle: {e}")
             return frame
 
-
     def play(self):
+        self._reset_clock()
         self.is_playing = True
 
     def pause(self):
@@ -291,14 +822,22 @@ class OpenCVVideoThread(QThread):
         self.is_playing = False
         self.is_running = False
 
-    def seek(self, position_ms):
-        self.seek_position_ms = position_ms
+    def seek(self, position_ms, precise=True):
+        self.seek_engine.request(position_ms, precise)
+
+    def begin_scrub(self):
+        self.scrubbing = True
+
+    def end_scrub(self):
+        self._reset_clock()
+        self.scrubbing = False
 
     def set_speed(self, rate):
         self.playback_rate = rate
+        self._reset_clock() # Sesudah rate diganti, supaya jam baru tidak di-anchor dengan rate lama
 
-    def set_subtitles(self, subs):
-        self.subtitles = subs
+    def set_subtitles(self, store):
+        self.subtitle_store = store
 
 
 class MiniPlayerWindow(QWidget):
@@ -594,6 +1133,7 @@ class HistoryWindow(QDialog):
 
 class ModernVideoPlayer(QWidget):
     request_thumbnail = pyqtSignal(str, int, float)
+    thumbnail_packet_index_changed = pyqtSignal(object)
 
     def __init__(self):
         super().__init__()
@@ -610,6 +1150,8 @@ class ModernVideoPlayer(QWidget):
         self.history = []
         self.current_media_info = {}
         self.temp_audio_file = None
+        self.packet_index_worker = None
+        self.index_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "index")
 
         self.playlist_widget = PlaylistWidget()
         self.history_window = HistoryWindow(self.history, self)
@@ -660,8 +1202,9 @@ class ModernVideoPlayer(QWidget):
         self.audio_output = QAudioOutput()
         self.audio_player.setAudioOutput(self.audio_output)
 
-        # Thread untuk video OpenCV
-        self.video_thread = OpenCVVideoThread()
+        # Thread untuk video OpenCV, dengan audio sebagai jam master
+        self.audio_clock = AudioClock()
+        self.video_thread = OpenCVVideoThread(audio_clock=self.audio_clock)
         self.video_thread.start()
 
     def _setup_themes(self):
@@ -713,6 +1256,9 @@ class ModernVideoPlayer(QWidget):
             self.history = config.get('history', [])
             self.history_window.history_data = self.history
             self.history_window.populate_list()
+            interpolation_mode = config.get('interpolation_mode', 'off')
+            if interpolation_mode in FrameInterpolator.MODES:
+                self.video_thread.interpolator.mode = interpolation_mode
             # Fitur auto-resume disederhanakan/dihapus untuk fokus ke OpenCV
         except (FileNotFoundError, json.JSONDecodeError): pass
 
@@ -722,7 +1268,8 @@ class ModernVideoPlayer(QWidget):
             'last_volume': self.volume_slider.value(),
             'playlist': self.playlist_widget.get_playlist_data(),
             'theme': self.theme_names[self.current_theme_index],
-            'history': self.history
+            'history': self.history,
+            'interpolation_mode': self.video_thread.interpolator.mode
         }
         try:
             with open(self.config_path, "w") as f: json.dump(config, f, indent=4)
@@ -774,6 +1321,7 @@ class ModernVideoPlayer(QWidget):
         self.position_slider = ClickableSlider(Qt.Orientation.Horizontal)
         self.position_slider.setRange(0, 0)
         self.time_label = QLabel("00:00 / 00:00")
+        self.time_label.installEventFilter(self) # Tooltip statistik dibangun saat diminta
         
         self.btn_prev_playlist = QPushButton()
         if qta: self.btn_prev_playlist.setIcon(qta.icon('fa5s.step-backward'))
@@ -784,6 +1332,8 @@ class ModernVideoPlayer(QWidget):
         self.btn_stop = QPushButton()
         if qta: self.btn_stop.setIcon(qta.icon('fa5s.stop'))
         self.btn_speed = QPushButton(f"{self.playback_speeds[self.current_speed_index]}x")
+        self.btn_interpolation = QPushButton()
+        self._update_interpolation_button()
         self.btn_mute = QPushButton()
         self.volume_slider = QSlider(Qt.Orientation.Horizontal)
         self.volume_slider.setRange(0, 100)
@@ -822,6 +1372,7 @@ class ModernVideoPlayer(QWidget):
         bottom_controls_layout.addWidget(self.btn_toggle_url_bar)
         bottom_controls_layout.addWidget(self.btn_open_srt)
         bottom_controls_layout.addWidget(self.btn_speed)
+        bottom_controls_layout.addWidget(self.btn_interpolation)
         bottom_controls_layout.addWidget(self.btn_show_playlist)
         bottom_controls_layout.addWidget(self.btn_show_history)
         bottom_controls_layout.addWidget(self.btn_mute)
@@ -854,6 +1405,7 @@ class ModernVideoPlayer(QWidget):
         self.btn_fullscreen.clicked.connect(self._toggle_fullscreen)
         self.btn_mute.clicked.connect(self._toggle_mute)
         self.btn_speed.clicked.connect(self._change_playback_speed)
+        self.btn_interpolation.clicked.connect(self._change_interpolation_mode)
         self.btn_show_playlist.clicked.connect(self._toggle_playlist_window)
         self.btn_prev_playlist.clicked.connect(self._play_previous_video)
         self.btn_next_playlist.clicked.connect(self._play_next_video)
@@ -867,16 +1419,21 @@ class ModernVideoPlayer(QWidget):
         self.mini_player_widget.closing.connect(self._show_main_from_mini)
         self.mini_player_widget.btn_play_pause.clicked.connect(self._toggle_play_pause)
         self.mini_player_widget.btn_stop.clicked.connect(self._stop_video)
-        self.mini_player_widget.position_slider.sliderMoved.connect(self._set_position)
+        self.mini_player_widget.position_slider.sliderMoved.connect(lambda value: self._on_slider_moved(self.mini_player_widget.position_slider, value))
+        self.mini_player_widget.position_slider.sliderReleased.connect(lambda: self._on_slider_released(self.mini_player_widget.position_slider))
 
         self.volume_slider.valueChanged.connect(self._set_volume)
-        self.position_slider.sliderMoved.connect(self._set_position)
+        self.position_slider.sliderMoved.connect(lambda value: self._on_slider_moved(self.position_slider, value))
+        self.position_slider.sliderReleased.connect(lambda: self._on_slider_released(self.position_slider))
         
         # --- PERUBAHAN UTAMA: Menghubungkan sinyal dari thread video ---
         self.video_thread.frame_ready.connect(self._update_frame)
         self.video_thread.position_changed.connect(self._update_position)
         self.video_thread.duration_changed.connect(self._update_duration)
         self.video_thread.playback_finished.connect(self._handle_media_status_changed)
+        self.audio_player.positionChanged.connect(self._feed_audio_clock)
+        self.audio_player.playbackStateChanged.connect(self._feed_audio_clock)
+        self.audio_player.playbackRateChanged.connect(self._feed_audio_clock)
 
         self.audio_output.volumeChanged.connect(self._sync_main_volume_slider)
         self.playlist_widget.play_requested.connect(self._load_and_play_from_playlist)
@@ -886,6 +1443,7 @@ class ModernVideoPlayer(QWidget):
         self.position_slider.hover_leave.connect(self.thumbnail_preview.hide)
         self.thumbnail_generator.thumbnail_ready.connect(self._update_thumbnail)
         self.request_thumbnail.connect(self.thumbnail_generator.generate, Qt.ConnectionType.QueuedConnection)
+        self.thumbnail_packet_index_changed.connect(self.thumbnail_generator.set_packet_index, Qt.ConnectionType.QueuedConnection)
 
     # --- PERUBAHAN UTAMA: Slot untuk menampilkan frame video ---
     @pyqtSlot(QImage)
@@ -1004,14 +1562,31 @@ class ModernVideoPlayer(QWidget):
         title = os.path.basename(file_path)
         self.current_media_info = {'path': file_path, 'title': title}
         self.video_thread.load_video(file_path)
+        self._start_packet_index(file_path)
         
         self.setWindowTitle(f"Macan Player - {title}")
         self._update_control_states()
         self._add_to_history(file_path, title)
         
         # Cek subtitle otomatis
-        srt_path = os.path.splitext(file_path)[0] + ".srt"
-        if os.path.exists(srt_path): self._load_srt_file(srt_path)
+        subtitle_path = find_sibling_subtitle(file_path)
+        if subtitle_path: self._load_srt_file(subtitle_path)
+
+    def _start_packet_index(self, video_path):
+        """Bangun/muat indeks keyframe di background; seek & thumbnail memakainya begitu siap."""
+        if self.packet_index_worker:
+            self.packet_index_worker.index_ready.disconnect(self._on_packet_index_ready)
+            self.packet_index_worker.cancel()
+            self.packet_index_worker.finished.connect(self.packet_index_worker.deleteLater)
+        self.thumbnail_packet_index_changed.emit(None)
+        self.packet_index_worker = PacketIndexWorker(video_path, self.index_cache_dir, parent=self)
+        self.packet_index_worker.index_ready.connect(self._on_packet_index_ready)
+        self.packet_index_worker.start(QThread.Priority.LowestPriority)
+
+    def _on_packet_index_ready(self, packet_index):
+        if packet_index.video_path == self.current_media_info.get('path'):
+            self.video_thread.packet_index = packet_index
+            self.thumbnail_packet_index_changed.emit(packet_index)
 
     def _load_and_play_from_playlist(self, file_path):
         self._load_video_file(file_path)
@@ -1044,31 +1619,17 @@ class ModernVideoPlayer(QWidget):
         else: self.playlist_widget.show()
 
     def _open_srt_dialog(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Pilih Subtitle", "", "SRT Files (*.srt)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Pilih Subtitle", "", SUBTITLE_FILE_FILTER)
         if file_path: self._load_srt_file(file_path)
 
-    def _time_to_ms(self, t):
-        return (t.hour() * 3600 + t.minute() * 60 + t.second()) * 1000 + t.msec()
-
     def _load_srt_file(self, file_path):
-        subs = []
         try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f: content = f.read()
-            subtitle_blocks = content.strip().replace('\r\n', '\n').split('\n\n')
-            for block in subtitle_blocks:
-                lines = block.split('\n')
-                if len(lines) >= 3:
-                    time_match = re.match(r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})', lines[1])
-                    if time_match:
-                        start_time = QTime.fromString(time_match.group(1), "hh:mm:ss,zzz")
-                        end_time = QTime.fromString(time_match.group(2), "hh:mm:ss,zzz")
-                        subs.append({'start_ms': self._time_to_ms(start_time), 'end_ms': self._time_to_ms(end_time), 'text': "\n".join(lines[2:]).strip()})
-            
-            self.video_thread.set_subtitles(subs)
-            QMessageBox.information(self, "Sukses", f"{len(subs)} baris subtitle dimuat.")
+            store = load_subtitles(file_path)
+            self.video_thread.set_subtitles(store)
+            QMessageBox.information(self, "Sukses", f"{len(store)} baris subtitle dimuat.")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Gagal memuat subtitle: {e}")
-            self.video_thread.set_subtitles([])
+            self.video_thread.set_subtitles(None)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
@@ -1112,6 +1673,8 @@ class ModernVideoPlayer(QWidget):
         self.video_thread.pause()
         self.video_thread.seek(0)
         self.audio_player.stop()
+        self.audio_clock.reset()
+        self.video_thread.av_offset_ms = None
         self._update_play_pause_icon(False)
         self._update_time_label(0, self.video_thread.duration_ms)
         self.position_slider.setValue(0)
@@ -1139,19 +1702,68 @@ class ModernVideoPlayer(QWidget):
         self.audio_player.setPlaybackRate(new_speed)
         self.btn_speed.setText(f"{new_speed}x")
 
+    def _change_interpolation_mode(self):
+        interpolator = self.video_thread.interpolator
+        modes = FrameInterpolator.MODES
+        interpolator.mode = modes[(modes.index(interpolator.mode) + 1) % len(modes)]
+        self._update_interpolation_button()
+
+    def _update_interpolation_button(self):
+        mode = self.video_thread.interpolator.mode
+        self.btn_interpolation.setText("60 FPS" if mode != "off" else "Asli FPS")
+        labels = {"off": "mati", "blend": "blend", "flow": "optical flow"}
+        self.btn_interpolation.setToolTip(f"Force 60 FPS (Sekarang: {labels[mode]})")
+
     def _update_position(self, position):
         if not self.position_slider.isSliderDown():
             self.position_slider.setValue(position)
         self._update_time_label(position, self.video_thread.duration_ms)
         self.mini_player_widget.update_position(position)
 
+    def _playback_stats_tooltip(self):
+        offset = self.video_thread.av_offset_ms
+        tooltip = "A/V: audio tidak aktif" if offset is None else f"A/V: {offset:+.1f} ms (+ = video mendahului audio)"
+        seek_summary = self.video_thread.seek_engine.summary()
+        if seek_summary: tooltip += f"\n{seek_summary}"
+        interpolator = self.video_thread.interpolator
+        output_fps = interpolator.output_fps()
+        if output_fps is not None:
+            tooltip += f"\nKeluaran: {output_fps:.1f} fps"
+            cost_ms = interpolator.cost_ms.get(interpolator.last_mode)
+            if interpolator.last_mode and interpolator.is_active(self.video_thread.fps * self.video_thread.playback_rate):
+                tooltip += f", interpolasi {interpolator.last_mode}" + (f" {cost_ms:.1f} ms/frame" if cost_ms is not None else "")
+                if interpolator.mode == "flow" and interpolator.flow_cost_ms is not None:
+                    tooltip += f", optical flow {interpolator.flow_cost_ms:.1f} ms/pasangan (thread decode)"
+        return tooltip
+
+    def _feed_audio_clock(self, *args):
+        # Dipanggil di thread GUI setiap posisi/status audio berubah; thread video hanya membaca AudioClock
+        is_playing = self.audio_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+        self.audio_clock.update(self.audio_player.position(), is_playing and not self.audio_player.source().isEmpty(),
+                                self.audio_player.playbackRate())
+
     def _update_duration(self, duration):
         self.position_slider.setRange(0, duration)
         self.mini_player_widget.update_duration(duration)
 
+    def _on_slider_moved(self, slider, position):
+        if not slider.isSliderDown():
+            self._set_position(position) # Klik langsung di slider: seek akurat
+            return
+        # Drag: preview cepat di keyframe terdekat, audio menunggu slider dilepas
+        if not self.video_thread.scrubbing: self.video_thread.begin_scrub()
+        self.video_thread.seek(position, precise=False)
+        self._update_time_label(position, self.video_thread.duration_ms)
+
+    def _on_slider_released(self, slider):
+        if not self.video_thread.scrubbing: return
+        self._set_position(slider.value())
+        self.video_thread.end_scrub()
+
     def _set_position(self, position):
         self.video_thread.seek(position)
         self.audio_player.setPosition(position)
+        self.audio_clock.seek(position)
 
     def _set_volume(self, value):
         self.audio_output.setVolume(value / 100.0)
@@ -1234,6 +1846,10 @@ class ModernVideoPlayer(QWidget):
         else: super().keyPressEvent(event)
 
     def eventFilter(self, source, event):
+        if source is self.time_label and event.type() == QEvent.Type.ToolTip:
+            # Statistik hanya dirangkai saat tooltip akan tampil, bukan di setiap update posisi
+            QToolTip.showText(event.globalPos(), self._playback_stats_tooltip(), self.time_label)
+            return True
         if source is self.video_widget:
             if not self.is_fullscreen:
                 if event.type() == QEvent.Type.Enter:
@@ -1262,8 +1878,23 @@ class ModernVideoPlayer(QWidget):
         self.history_window.close()
         
         # --- PERUBAHAN UTAMA: Hentikan thread dengan bersih ---
+        if self.packet_index_worker:
+            self.packet_index_worker.cancel()
+            self.packet_index_worker.wait()
         self.video_thread.stop_thread()
         self.video_thread.wait()
+        print(f"Frame video: {self.video_thread.presented_frames} tampil, {self.video_thread.dropped_frames} dibuang karena terlambat")
+        if self.video_thread.av_offset_ms is not None:
+            print(f"Selisih A/V rata-rata: {self.video_thread.av_offset_ms:+.1f} ms")
+        seek_summary = self.video_thread.seek_engine.summary()
+        if seek_summary: print(seek_summary)
+        interpolator = self.video_thread.interpolator
+        if interpolator.interpolated_frames or interpolator.repeated_frames:
+            costs = ", ".join(f"{mode} {cost:.1f} ms/frame" for mode, cost in interpolator.cost_ms.items() if cost is not None)
+            if interpolator.flow_cost_ms is not None:
+                costs += f"; optical flow {interpolator.flow_cost_ms:.1f} ms/pasangan untuk {interpolator.flow_pairs} pasangan"
+            print(f"Interpolasi: {interpolator.interpolated_frames} frame sintetis, {interpolator.repeated_frames} diulang"
+                  f" (anggaran {interpolator.budget_ms:.1f} ms; {costs or 'belum ada biaya terukur'})")
         self.thumbnail_thread.quit()
         self.thumbnail_thread.wait()
         self._stop_video() # Untuk menghapus file audio temp
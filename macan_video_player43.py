@@ -1,25 +1,26 @@
 import sys
 import os
-import re
 import threading
 import json
 import time
 import subprocess
+from collections import deque
 # --- PERUBAHAN: tempfile tidak lagi dibutuhkan untuk audio ---
 # import tempfile
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
     QFileDialog, QLineEdit, QLabel, QSlider, QMessageBox, QListWidget, QListWidgetItem,
-    QAbstractItemView, QDialog
+    QAbstractItemView, QDialog, QToolTip
 )
 # --- PERUBAHAN UTAMA: Impor baru untuk video sink ---
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput, QVideoSink
+from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput, QVideoSink, QVideoFrame, QVideoFrameFormat
 from PyQt6.QtCore import (
     QUrl, Qt, QTime, QEvent, QSize, QTimer, pyqtSignal, QObject,
-    QThread, pyqtSlot
+    QThread, pyqtSlot, QRect, QPoint
 )
-from PyQt6.QtGui import QIcon, QPixmap, QImage
+from PyQt6.QtGui import QIcon, QPixmap, QImage, QPainter, QColor
 import numpy as np
+from macan_subtitles import load_subtitles, find_sibling_subtitle, SUBTITLE_FILE_FILTER, SubtitleBurner
 
 # --- PERUBAHAN UTAMA: Pustaka moviepy tidak lagi diperlukan untuk playback ---
 try:
@@ -98,6 +99,222 @@ class ThumbnailGenerator(QObject):
 # --- IMPLEMENTASI FITUR BARU: THUMBNAIL PREVIEW (SELESAI) ---
 
 
+class VideoFrameConverter:
+    """
+    Konversi QVideoFrame ke QImage RGB888 dengan tepat satu konversi warna.
+    Plane frame di-map langsung sebagai view NumPy (tanpa toImage()), lalu cv2 menulis hasil
+    konversinya langsung ke buffer milik QImage tampilan (QImage memiliki datanya sendiri,
+    jadi aman dikirim antar thread). Format yang tidak dikenal memakai toImage() sebagai cadangan.
+    Konversi YUV bawaan cv2 hanya BT.601 limited range; frame BT.709/BT.2020 atau full range
+    dikonversi dengan matriks YCbCr->RGB yang sesuai lewat cv2.transform. ColorSpace_Undefined
+    mengikuti Qt: BT.709 untuk tinggi frame di atas 576 baris (HD), BT.601 untuk SD.
+    """
+    # Koefisien (Kr, Kb) per standar warna
+    COLOR_COEFFICIENTS = {'BT601': (0.299, 0.114), 'BT709': (0.2126, 0.0722), 'BT2020': (0.2627, 0.0593)}
+
+    def __init__(self):
+        pixel_format = QVideoFrameFormat.PixelFormat
+        # Format -> (fungsi konversi, kode cv2 untuk BT.601 limited, urutan chroma V sebelum U)
+        self._converters = {
+            pixel_format.Format_NV12: (self._from_semi_planar, cv2.COLOR_YUV2RGB_NV12, False),
+            pixel_format.Format_NV21: (self._from_semi_planar, cv2.COLOR_YUV2RGB_NV21, True),
+            pixel_format.Format_YUV420P: (self._from_planar, cv2.COLOR_YUV2RGB_I420, False),
+            pixel_format.Format_YV12: (self._from_planar, cv2.COLOR_YUV2RGB_YV12, True),
+            pixel_format.Format_BGRA8888: (self._from_packed, cv2.COLOR_BGRA2RGB, None),
+            pixel_format.Format_BGRX8888: (self._from_packed, cv2.COLOR_BGRA2RGB, None),
+            pixel_format.Format_RGBA8888: (self._from_packed, cv2.COLOR_RGBA2RGB, None),
+            pixel_format.Format_RGBX8888: (self._from_packed, cv2.COLOR_RGBA2RGB, None),
+        }
+        color_space = QVideoFrameFormat.ColorSpace
+        self._color_spaces = {
+            color_space.ColorSpace_BT601: 'BT601',
+            color_space.ColorSpace_BT709: 'BT709',
+            color_space.ColorSpace_BT2020: 'BT2020',
+        }
+        self._matrices = {} # (standar, full range, V sebelum U) -> matriks 3x4
+        self._planar_buffer = None # Buffer I420 kontigu, dipakai ulang untuk plane U/V yang terpisah
+        self._ycc_buffer = None # Buffer YCbCr 4:4:4 untuk jalur matriks
+        self.mapped_frames = 0
+        self.fallback_frames = 0
+
+    @staticmethod
+    def _plane(frame, plane, rows, cols, channels=1):
+        """View NumPy (tanpa copy) atas plane yang sedang di-map, mengikuti stride baris aslinya."""
+        ptr = frame.bits(plane)
+        ptr.setsize(frame.mappedBytes(plane))
+        stride = frame.bytesPerLine(plane)
+        if channels == 1:
+            return np.ndarray((rows, cols), np.uint8, buffer=ptr, strides=(stride, 1))
+        return np.ndarray((rows, cols, channels), np.uint8, buffer=ptr, strides=(stride, channels, 1))
+
+    @staticmethod
+    def image_view(image):
+        """View NumPy (h, w, 3) yang bisa ditulis atas buffer QImage RGB888, termasuk padding baris."""
+        ptr = image.bits()
+        ptr.setsize(image.sizeInBytes())
+        return np.ndarray((image.height(), image.width(), 3), np.uint8, buffer=ptr, strides=(image.bytesPerLine(), 3, 1))
+
+    def _matrix(self, standard, full_range, chroma_swapped):
+        """Matriks 3x4 [Y, C1, C2, 1] -> RGB untuk cv2.transform, dengan offset range di kolom terakhir."""
+        key = (standard, full_range, chroma_swapped)
+        matrix = self._matrices.get(key)
+        if matrix is None:
+            kr, kb = self.COLOR_COEFFICIENTS[standard]
+            kg = 1.0 - kr - kb
+            y_scale, c_scale, y_offset = (1.0, 1.0, 0) if full_range else (255 / 219, 255 / 224, 16)
+            rows = [(y_scale, 0.0, c_scale * 2 * (1 - kr)),
+                    (y_scale, -c_scale * 2 * kb * (1 - kb) / kg, -c_scale * 2 * kr * (1 - kr) / kg),
+                    (y_scale, c_scale * 2 * (1 - kb), 0.0)]
+            matrix = np.array([[a, cb, cr, -(a * y_offset + (cb + cr) * 128)] for a, cb, cr in rows], np.float32)
+            if chroma_swapped: matrix[:, [1, 2]] = matrix[:, [2, 1]]
+            self._matrices[key] = matrix
+        return matrix
+
+    def _ycc(self, w, h):
+        if self._ycc_buffer is None or self._ycc_buffer.shape != (h, w, 3):
+            self._ycc_buffer = np.empty((h, w, 3), np.uint8)
+        return self._ycc_buffer
+
+    def _from_semi_planar(self, frame, w, h, code, dst, matrix=None):
+        y = self._plane(frame, 0, h, w)
+        uv = self._plane(frame, 1, h // 2, w // 2, 2)
+        if matrix is None:
+            cv2.cvtColorTwoPlane(y, uv, code, dst=dst)
+            return
+        ycc = self._ycc(w, h)
+        ycc[..., 0] = y
+        ycc[..., 1:] = cv2.resize(uv, (w, h), interpolation=cv2.INTER_LINEAR)
+        cv2.transform(ycc, matrix, dst=dst)
+
+    def _from_planar(self, frame, w, h, code, dst, matrix=None):
+        if matrix is not None:
+            ycc = self._ycc(w, h)
+            ycc[..., 0] = self._plane(frame, 0, h, w)
+            for plane in (1, 2):
+                ycc[..., plane] = cv2.resize(self._plane(frame, plane, h // 2, w // 2), (w, h), interpolation=cv2.INTER_LINEAR)
+            cv2.transform(ycc, matrix, dst=dst)
+            return
+        # cv2 butuh I420/YV12 dalam satu buffer kontigu; plane disalin apa adanya (1.5 byte/piksel)
+        if self._planar_buffer is None or self._planar_buffer.shape != (h * 3 // 2, w):
+            self._planar_buffer = np.empty((h * 3 // 2, w), np.uint8)
+        buffer = self._planar_buffer
+        buffer[:h] = self._plane(frame, 0, h, w)
+        chroma = buffer[h:].reshape(2, h // 2, w // 2)
+        chroma[0] = self._plane(frame, 1, h // 2, w // 2)
+        chroma[1] = self._plane(frame, 2, h // 2, w // 2)
+        cv2.cvtColor(buffer, code, dst=dst)
+
+    def _from_packed(self, frame, w, h, code, dst, matrix=None):
+        cv2.cvtColor(self._plane(frame, 0, h, w, 4), code, dst=dst)
+
+    def _yuv_matrix(self, frame, chroma_swapped):
+        """None untuk BT.601 limited range (jalur cepat cv2), matriks untuk standar lain, atau False jika tidak didukung."""
+        surface_format = frame.surfaceFormat()
+        color_space = surface_format.colorSpace()
+        if color_space == QVideoFrameFormat.ColorSpace.ColorSpace_Undefined:
+            standard = 'BT709' if frame.height() > 576 else 'BT601' # Sama seperti tebakan Qt
+        else:
+            standard = self._color_spaces.get(color_space)
+        if standard is None: return False # Mis. AdobeRgb: serahkan ke toImage()
+        full_range = surface_format.colorRange() == QVideoFrameFormat.ColorRange.ColorRange_Full
+        if standard == 'BT601' and not full_range: return None
+        return self._matrix(standard, full_range, chroma_swapped)
+
+    def to_image(self, frame):
+        """Kembalikan (QImage RGB888, view NumPy yang bisa ditulis atas buffer QImage tersebut)."""
+        converter = self._converters.get(frame.pixelFormat())
+        w, h = frame.width(), frame.height()
+        matrix = None
+        if converter is not None and converter[2] is not None:
+            matrix = self._yuv_matrix(frame, converter[2])
+            if matrix is False: converter = None
+        # Subsampling 4:2:0 dengan ukuran ganjil tidak didukung cv2, serahkan ke Qt
+        if converter is not None and w % 2 == 0 and h % 2 == 0 and frame.map(QVideoFrame.MapMode.ReadOnly):
+            image = QImage(w, h, QImage.Format.Format_RGB888)
+            rgb = self.image_view(image)
+            try:
+                convert, code, _ = converter
+                convert(frame, w, h, code, rgb, matrix)
+            finally:
+                frame.unmap()
+            self.mapped_frames += 1
+            return image, rgb
+        self.fallback_frames += 1
+        image = frame.toImage().convertToFormat(QImage.Format.Format_RGB888)
+        return image, self.image_view(image)
+
+
+class FrameMailbox:
+    """
+    Antrian frame berkapasitas tetap antara thread GUI dan FrameProcessor. Saat penuh, frame
+    tertua dibuang: pipeline yang tertinggal melompat ke frame terbaru, bukan menumpuk antrean.
+    """
+    def __init__(self, capacity=2):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._frames = deque()
+        self._scheduled = False # Sudah ada wake yang antre / worker sedang mengosongkan antrean
+        self.generation = 0 # Naik setiap clear(), hasil proses frame lama diabaikan
+        self.received = 0
+        self.dropped = 0
+        self.presented = 0
+
+    def post(self, frame, position_ms, subtitle_store):
+        """Masukkan frame; True jika worker perlu dibangunkan."""
+        with self._lock:
+            self.received += 1
+            if len(self._frames) >= self.capacity:
+                self._frames.popleft()
+                self.dropped += 1
+            self._frames.append((frame, position_ms, subtitle_store, self.generation))
+            if self._scheduled: return False
+            self._scheduled = True
+            return True
+
+    def take(self):
+        with self._lock:
+            if not self._frames:
+                self._scheduled = False
+                return None
+            return self._frames.popleft()
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.generation += 1
+
+
+class FrameProcessor(QObject):
+    """
+    Pipeline per-frame (map + konversi warna + burn-in subtitle) di thread tersendiri.
+    Thread GUI hanya menerima QImage yang sudah jadi lewat frame_ready.
+    """
+    frame_ready = pyqtSignal(QImage, int) # image, generation
+
+    def __init__(self, mailbox, converter, subtitle_burner, parent=None):
+        super().__init__(parent)
+        self.mailbox = mailbox
+        self.converter = converter
+        self.subtitle_burner = subtitle_burner
+
+    @pyqtSlot()
+    def process_pending(self):
+        while True:
+            item = self.mailbox.take()
+            if item is None: return
+            frame, position_ms, subtitle_store, generation = item
+            try:
+                image, rgb = self.converter.to_image(frame)
+                # Render subtitle jika ada (langsung di buffer RGB, hanya area subtitle yang disentuh)
+                if subtitle_store:
+                    self.subtitle_burner.burn(rgb, subtitle_store, position_ms, 'RGB')
+            except Exception as e:
+                print(f"Error saat memproses frame: {e}")
+                continue
+            self.frame_ready.emit(image, generation)
+
+
+
 # --- MODIFIKASI DIMULAI: Membuat slider yang bisa diklik DAN mendeteksi hover ---
 class ClickableSlider(QSlider):
     """
@@ -136,9 +353,74 @@ class ClickableSlider(QSlider):
 # Kelas ini tidak lagi diperlukan karena QMediaPlayer dan QVideoSink
 # akan menangani pemutaran dan pengambilan frame.
 
+class VideoSurface(QWidget):
+    """
+    Permukaan video berbasis paintEvent. Widget hanya menyimpan QImage frame terakhir dan
+    menggambarnya ke persegi letterbox yang dihitung ulang saat ukuran widget/frame berubah;
+    skala dikerjakan QPainter saat menggambar, tanpa QPixmap baru dan tanpa relayout per frame.
+    Jendela utama dan mini memakai QImage yang sama (implicit sharing, tanpa copy).
+    """
+    def __init__(self, placeholder="", parent=None):
+        super().__init__(parent)
+        self.placeholder = placeholder
+        self.smooth_scaling = True
+        self._image = None
+        self._target_rect = QRect()
+        self._bar_rects = [] # Area di luar target_rect (bar hitam letterbox/pillarbox)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+    def set_smooth_scaling(self, smooth):
+        """True = bilinear (SmoothPixmapTransform), False = nearest neighbour yang lebih murah."""
+        self.smooth_scaling = smooth
+        self.update()
+
+    def set_frame(self, image):
+        previous = self._image
+        self._image = image
+        if previous is None or previous.size() != image.size():
+            self._update_target_rect()
+            self.update()
+        else:
+            self.update(self._target_rect)
+
+    def clear(self):
+        self._image = None
+        self._update_target_rect()
+        self.update()
+
+    def _update_target_rect(self):
+        bounds = self.rect()
+        if self._image is None or self._image.isNull():
+            self._target_rect, self._bar_rects = QRect(), [bounds]
+            return
+        size = self._image.size().scaled(bounds.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        x, y = (bounds.width() - size.width()) // 2, (bounds.height() - size.height()) // 2
+        self._target_rect = QRect(QPoint(x, y), size)
+        # Cukup dua bar: kiri/kanan (pillarbox) atau atas/bawah (letterbox)
+        self._bar_rects = [QRect(0, 0, x, bounds.height()), QRect(x + size.width(), 0, bounds.width() - x - size.width(), bounds.height()),
+                           QRect(0, 0, bounds.width(), y), QRect(0, y + size.height(), bounds.width(), bounds.height() - y - size.height())]
+        self._bar_rects = [rect for rect in self._bar_rects if not rect.isEmpty()]
+
+    def resizeEvent(self, event):
+        self._update_target_rect()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        black = QColor(0, 0, 0)
+        for rect in self._bar_rects:
+            painter.fillRect(rect, black)
+        if self._image is None:
+            if self.placeholder:
+                painter.setPen(QColor(236, 240, 241))
+                painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.placeholder)
+            return
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self.smooth_scaling)
+        painter.drawImage(self._target_rect, self._image)
+
 class MiniPlayerWindow(QWidget):
     """
-    Jendela pemutar mini. Sekarang menggunakan QLabel untuk menampilkan frame.
+    Jendela pemutar mini. Frame digambar lewat VideoSurface, berbagi QImage dengan jendela utama.
     """
     closing = pyqtSignal()
 
@@ -164,9 +446,7 @@ class MiniPlayerWindow(QWidget):
 
         self.setStyleSheet("background-color: #1c1c1c; color: #ecf0f1;")
 
-        self.video_widget = QLabel("Mini Player")
-        self.video_widget.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.video_widget.setStyleSheet("background-color: black;")
+        self.video_widget = VideoSurface("Mini Player")
 
         self.position_slider = ClickableSlider(Qt.Orientation.Horizontal)
         self.position_slider.setRange(0, 0)
@@ -208,8 +488,7 @@ class MiniPlayerWindow(QWidget):
     @pyqtSlot(QImage)
     def update_frame(self, image):
         """Slot untuk menerima frame baru dari player utama."""
-        pixmap = QPixmap.fromImage(image)
-        self.video_widget.setPixmap(pixmap.scaled(self.video_widget.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.video_widget.set_frame(image)
 
     def _set_volume(self, value):
         self.audio_output.setVolume(value / 100.0)
@@ -431,6 +710,7 @@ class HistoryWindow(QDialog):
 
 class ModernVideoPlayer(QWidget):
     request_thumbnail = pyqtSignal(str, int, float)
+    wake_frame_processor = pyqtSignal()
 
     def __init__(self):
         super().__init__()
@@ -448,7 +728,8 @@ class ModernVideoPlayer(QWidget):
         self.current_theme_index = 0
         self.history = []
         self.current_media_info = {}
-        self.subtitles = [] # --- BARU: State untuk subtitle ---
+        self.subtitle_store = None # --- BARU: State untuk subtitle (CueStore) ---
+        self.smooth_scaling = True # Kualitas skala video (bilinear / nearest), tombol Q
 
         self.playlist_widget = PlaylistWidget()
         self.history_window = HistoryWindow(self.history, self)
@@ -497,6 +778,16 @@ class ModernVideoPlayer(QWidget):
         self.subtitle_font_size = 24
         self.subtitle_color = (255, 255, 255, 220) # RGBA
         self.subtitle_outline_color = (0, 0, 0, 220) # RGBA
+        self.subtitle_burner = SubtitleBurner(self.subtitle_font_path, self.subtitle_font_size,
+                                              self.subtitle_color, self.subtitle_outline_color)
+
+        # Konversi frame + burn-in subtitle berjalan di thread sendiri, bukan di thread GUI
+        self.frame_mailbox = FrameMailbox()
+        self.frame_converter = VideoFrameConverter()
+        self.frame_thread = QThread()
+        self.frame_processor = FrameProcessor(self.frame_mailbox, self.frame_converter, self.subtitle_burner)
+        self.frame_processor.moveToThread(self.frame_thread)
+        self.frame_thread.start(QThread.Priority.HighPriority)
 
 
     def _setup_themes(self):
@@ -584,6 +875,7 @@ class ModernVideoPlayer(QWidget):
             self.history = config.get('history', [])
             self.history_window.history_data = self.history
             self.history_window.populate_list()
+            self.smooth_scaling = config.get('smooth_scaling', True)
         except (FileNotFoundError, json.JSONDecodeError): pass
 
     def _save_config(self):
@@ -591,7 +883,8 @@ class ModernVideoPlayer(QWidget):
             'last_volume': int(self.audio_output.volume() * 100), # Ambil volume dari audio_output
             'playlist': self.playlist_widget.get_playlist_data(),
             'theme': self.theme_names[self.current_theme_index],
-            'history': self.history
+            'history': self.history,
+            'smooth_scaling': self.smooth_scaling
         }
         try:
             with open(self.config_path, "w") as f: json.dump(config, f, indent=4)
@@ -604,10 +897,11 @@ class ModernVideoPlayer(QWidget):
         if hasattr(sys, "_MEIPASS"): icon_path = os.path.join(sys._MEIPASS, icon_path)
         if os.path.exists(icon_path): self.setWindowIcon(QIcon(icon_path))
 
-        self.video_widget = QLabel()
+        self.video_widget = VideoSurface()
         self.video_widget.setObjectName("video_widget")
-        self.video_widget.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.video_widget.installEventFilter(self)
+        self.video_widget.set_smooth_scaling(self.smooth_scaling)
+        self.mini_player_widget.video_widget.set_smooth_scaling(self.smooth_scaling)
 
         self.splash_label = QLabel(self.video_widget)
         splash_path = "splash.png"
@@ -639,6 +933,7 @@ class ModernVideoPlayer(QWidget):
         self.position_slider = ClickableSlider(Qt.Orientation.Horizontal)
         self.position_slider.setRange(0, 0)
         self.time_label = QLabel("00:00 / 00:00")
+        self.time_label.installEventFilter(self) # Tooltip statistik dibangun saat diminta
 
         self.btn_prev_playlist = QPushButton()
         if qta: self.btn_prev_playlist.setIcon(qta.icon('fa5s.step-backward'))
@@ -750,79 +1045,26 @@ class ModernVideoPlayer(QWidget):
         self.position_slider.hover_leave.connect(self.thumbnail_preview.hide)
         self.thumbnail_generator.thumbnail_ready.connect(self._update_thumbnail)
         self.request_thumbnail.connect(self.thumbnail_generator.generate, Qt.ConnectionType.QueuedConnection)
+        self.wake_frame_processor.connect(self.frame_processor.process_pending, Qt.ConnectionType.QueuedConnection)
+        self.frame_processor.frame_ready.connect(self._present_frame)
 
     # --- PERUBAHAN UTAMA: Slot baru untuk memproses frame dari QVideoSink ---
     @pyqtSlot("QVideoFrame")
     def process_frame(self, frame):
         if not frame.isValid():
             return
+        # Cukup titipkan frame (salinan QVideoFrame hanya menambah refcount), proses di FrameProcessor
+        position_ms = frame.startTime() // 1000 if frame.startTime() >= 0 else self.player.position()
+        if self.frame_mailbox.post(frame, position_ms, self.subtitle_store):
+            self.wake_frame_processor.emit()
 
-        # Konversi QVideoFrame ke QImage
-        qt_image = frame.toImage()
-        # Pastikan formatnya bisa di-handle oleh OpenCV
-        qt_image = qt_image.convertToFormat(QImage.Format.Format_RGB888)
-
-        # Konversi QImage ke array NumPy (frame OpenCV)
-        h, w, _ = qt_image.height(), qt_image.width(), 3
-        bytes_per_line = 3 * w
-        ptr = qt_image.bits()
-        ptr.setsize(h * bytes_per_line)
-        np_frame_rgb = np.frombuffer(ptr, np.uint8).reshape((h, w, 3))
-
-        # Render subtitle jika ada
-        if self.subtitles:
-            # Konversi RGB ke BGR untuk fungsi draw_subtitle
-            np_frame_bgr = cv2.cvtColor(np_frame_rgb, cv2.COLOR_RGB2BGR)
-            modified_frame_bgr = self.draw_subtitle(np_frame_bgr, self.player.position())
-            # Konversi kembali ke RGB untuk ditampilkan
-            np_frame_rgb = cv2.cvtColor(modified_frame_bgr, cv2.COLOR_BGR2RGB)
-
-        # Tampilkan frame yang sudah dimodifikasi
-        final_image = QImage(np_frame_rgb.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-        self.video_widget.setPixmap(QPixmap.fromImage(final_image).scaled(self.video_widget.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+    def _present_frame(self, image, generation):
+        if generation != self.frame_mailbox.generation: return # Frame dari sebelum stop/ganti video
+        self.frame_mailbox.presented += 1
+        self.video_widget.set_frame(image)
 
         if self.mini_player_widget.isVisible():
-             self.mini_player_widget.update_frame(final_image)
-
-    def draw_subtitle(self, frame, current_pos_ms):
-        """Merender teks subtitle ke frame video menggunakan Pillow."""
-        text_to_draw = ""
-        for sub in self.subtitles:
-            if sub['start_ms'] <= current_pos_ms <= sub['end_ms']:
-                text_to_draw = sub['text']
-                break
-
-        if not text_to_draw:
-            return frame
-
-        try:
-            pil_img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            draw = ImageDraw.Draw(pil_img, "RGBA")
-
-            try:
-                font = ImageFont.truetype(self.subtitle_font_path, self.subtitle_font_size)
-            except IOError:
-                font = ImageFont.load_default()
-
-            text_bbox = draw.textbbox((0, 0), text_to_draw, font=font, align="center")
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-
-            img_width, img_height = pil_img.size
-            x = (img_width - text_width) / 2
-            y = img_height - text_height - 30
-
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    if dx != 0 or dy != 0:
-                        draw.text((x+dx, y+dy), text_to_draw, font=font, fill=self.subtitle_outline_color, align="center")
-
-            draw.text((x, y), text_to_draw, font=font, fill=self.subtitle_color, align="center")
-
-            return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-        except Exception as e:
-            print(f"Error saat merender subtitle: {e}")
-            return frame
+             self.mini_player_widget.update_frame(image)
 
     def _show_thumbnail_preview(self, x_pos):
         video_path = self.current_media_info.get('path', '')
@@ -911,7 +1153,7 @@ class ModernVideoPlayer(QWidget):
     def _load_video_file(self, file_path_or_url):
         self.setWindowTitle(f"Macan Player - Memuat...")
         self._stop_video()
-        self.subtitles = [] # Reset subtitle
+        self.subtitle_store = None # Reset subtitle
 
         is_url = "://" in file_path_or_url
         if is_url:
@@ -923,9 +1165,9 @@ class ModernVideoPlayer(QWidget):
             title = os.path.basename(file_path_or_url)
             path_for_history = file_path_or_url
             # Cek subtitle otomatis
-            srt_path = os.path.splitext(file_path_or_url)[0] + ".srt"
-            if os.path.exists(srt_path):
-                self._load_srt_file(srt_path)
+            subtitle_path = find_sibling_subtitle(file_path_or_url)
+            if subtitle_path:
+                self._load_srt_file(subtitle_path)
 
         self.current_media_info = {'path': path_for_history, 'title': title}
         self.player.setSource(source)
@@ -966,30 +1208,16 @@ class ModernVideoPlayer(QWidget):
         else: self.playlist_widget.show()
 
     def _open_srt_dialog(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Pilih Subtitle", "", "SRT Files (*.srt)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Pilih Subtitle", "", SUBTITLE_FILE_FILTER)
         if file_path: self._load_srt_file(file_path)
 
-    def _time_to_ms(self, t):
-        return (t.hour() * 3600 + t.minute() * 60 + t.second()) * 1000 + t.msec()
-
     def _load_srt_file(self, file_path):
-        subs = []
         try:
-            with open(file_path, 'r', encoding='utf-8-sig') as f: content = f.read()
-            subtitle_blocks = content.strip().replace('\r\n', '\n').split('\n\n')
-            for block in subtitle_blocks:
-                lines = block.split('\n')
-                if len(lines) >= 3:
-                    time_match = re.match(r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})', lines[1])
-                    if time_match:
-                        start_time = QTime.fromString(time_match.group(1), "hh:mm:ss,zzz")
-                        end_time = QTime.fromString(time_match.group(2), "hh:mm:ss,zzz")
-                        subs.append({'start_ms': self._time_to_ms(start_time), 'end_ms': self._time_to_ms(end_time), 'text': "\n".join(lines[2:]).strip()})
-            self.subtitles = subs
-            QMessageBox.information(self, "Sukses", f"{len(subs)} baris subtitle dimuat.")
+            self.subtitle_store = load_subtitles(file_path)
+            QMessageBox.information(self, "Sukses", f"{len(self.subtitle_store)} baris subtitle dimuat.")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Gagal memuat subtitle: {e}")
-            self.subtitles = []
+            self.subtitle_store = None
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
@@ -1022,7 +1250,8 @@ class ModernVideoPlayer(QWidget):
 
     def _stop_video(self):
         self.player.stop()
-        self.subtitles = []
+        self.subtitle_store = None
+        self.frame_mailbox.clear()
         self._update_time_label(0, 0)
         self.position_slider.setValue(0)
         # Hapus frame terakhir dari tampilan
@@ -1050,6 +1279,10 @@ class ModernVideoPlayer(QWidget):
         self._update_time_label(position, self.player.duration())
         self.mini_player_widget.update_position(position)
 
+    def _playback_stats_tooltip(self):
+        mailbox = self.frame_mailbox
+        return f"Frame: {mailbox.presented} tampil, {mailbox.dropped} dibuang dari {mailbox.received}"
+
     def _update_duration(self, duration):
         self.position_slider.setRange(0, duration)
         self.mini_player_widget.update_duration(duration)
@@ -1166,8 +1399,16 @@ class ModernVideoPlayer(QWidget):
             self._skip_forward()
         elif key == Qt.Key.Key_Left:
             self._skip_backward()
+        elif key == Qt.Key.Key_Q:
+            self._toggle_scaling_quality()
         else:
             super().keyPressEvent(event)
+
+    def _toggle_scaling_quality(self):
+        self.smooth_scaling = not self.smooth_scaling
+        self.video_widget.set_smooth_scaling(self.smooth_scaling)
+        self.mini_player_widget.video_widget.set_smooth_scaling(self.smooth_scaling)
+        self.video_widget.setToolTip(f"Skala video: {'halus (bilinear)' if self.smooth_scaling else 'cepat (nearest)'} - tekan Q untuk ganti")
     
     def mouseMoveEvent(self, event):
         # Tampilkan kontrol dan reset timer saat mouse bergerak
@@ -1178,6 +1419,10 @@ class ModernVideoPlayer(QWidget):
         super().mouseMoveEvent(event)
 
     def eventFilter(self, source, event):
+        if source is self.time_label and event.type() == QEvent.Type.ToolTip:
+            # Statistik hanya dirangkai saat tooltip akan tampil, bukan di setiap update posisi
+            QToolTip.showText(event.globalPos(), self._playback_stats_tooltip(), self.time_label)
+            return True
         if source is self.video_widget:
             if not self.is_fullscreen:
                 if event.type() == QEvent.Type.Enter:
@@ -1207,6 +1452,12 @@ class ModernVideoPlayer(QWidget):
         # Hentikan thread thumbnail
         self.thumbnail_thread.quit()
         self.thumbnail_thread.wait()
+        self.frame_mailbox.clear()
+        self.frame_thread.quit()
+        self.frame_thread.wait()
+        converter, mailbox = self.frame_converter, self.frame_mailbox
+        print(f"Frame video: {converter.mapped_frames} di-map langsung, {converter.fallback_frames} lewat toImage()")
+        print(f"Frame video: {mailbox.presented} tampil, {mailbox.dropped} dibuang dari {mailbox.received} frame masuk")
         
         self.player.stop()
 
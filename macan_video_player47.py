@@ -1,23 +1,32 @@
 import sys
 import os
-import re
 import threading
 import json
 import time
+import math
 import subprocess
+import struct
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
     QFileDialog, QLineEdit, QLabel, QSlider, QMessageBox, QListWidget, QListWidgetItem,
-    QAbstractItemView, QDialog, QStackedLayout, QGraphicsView, QGraphicsScene, QGraphicsTextItem
+    QAbstractItemView, QDialog, QStackedLayout, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
 )
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtCore import (
     QUrl, Qt, QTime, QEvent, QSize, QTimer, pyqtSignal, QObject,
-    QThread, pyqtSlot, QRectF
+    QThread, pyqtSlot, QRectF, QRect
+)
+from PyQt6.QtGui import (
+    QIcon, QPixmap, QImage, QFont, QColor, QPainter, QTextDocument, QTextCursor, QTextCharFormat
 )
-from PyQt6.QtGui import QIcon, QPixmap, QImage, QFont, QColor
 import numpy as np
+from macan_subtitles import (
+    load_subtitles, load_embedded_subtitles, find_subtitle_candidates, speech_activity_envelope, estimate_subtitle_sync,
+    SubtitleSearchIndex
+)
+from macan_media import ThumbnailCache, PacketIndex, RangeReadAheadProxy
 
 # Pustaka untuk thumbnail tetap menggunakan OpenCV
 try:
@@ -59,34 +68,339 @@ class ThumbnailPreviewWidget(QWidget):
         else:
             self.label.setText("Gagal")
 
+class ThumbnailRequestMailbox:
+    """
+    Kotak surat satu slot untuk request thumbnail (latest-wins). GUI menimpa slot dengan
+    posisi hover terbaru, worker hanya mengambil isi slot saat itu, dan decode yang sedang
+    berjalan dibatalkan begitu ada request yang lebih baru.
+    Di belakang slot utama ada jalur prefetch spekulatif yang hanya dikerjakan saat slot
+    utama kosong, dan ikut dibatalkan bersama cancel().
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = None # (video_path, timestamp_ms, request_id)
+        self._prefetch = [] # [(video_path, timestamp_ms, prefetch_generation)]
+        self._wake_pending = False
+        self.latest_id = 0
+        self.prefetch_generation = 0
+        self.dropped = 0
+        self.served = 0
+        self.prefetched = 0
+
+    def _needs_wake(self):
+        if self._wake_pending: return False
+        self._wake_pending = True
+        return True
+
+    def post(self, video_path, timestamp_ms):
+        """Simpan request terbaru. Return True jika worker perlu dibangunkan."""
+        with self._lock:
+            self.latest_id += 1
+            if self._pending is not None: self.dropped += 1
+            self._pending = (video_path, timestamp_ms, self.latest_id)
+            return self._needs_wake()
+
+    def post_prefetch(self, video_path, timestamps):
+        """Ganti daftar prefetch dengan prediksi terbaru. Return True jika worker perlu dibangunkan."""
+        with self._lock:
+            self.prefetch_generation += 1
+            self._prefetch = [(video_path, ts, self.prefetch_generation) for ts in reversed(timestamps)]
+            return bool(self._prefetch) and self._needs_wake()
+
+    def take_next(self):
+        """Ambil request utama, atau item prefetch jika slot utama kosong.
+        Return (is_prefetch, request), atau None jika tidak ada pekerjaan lagi."""
+        with self._lock:
+            if self._pending is not None:
+                request, self._pending = self._pending, None
+                return False, request
+            if self._prefetch:
+                return True, self._prefetch.pop()
+            # Worker akan tidur; post berikutnya harus membangunkannya lagi
+            self._wake_pending = False
+            return None
+
+    def cancel(self):
+        """Buang request tertunda, prefetch, dan batalkan decode yang sedang berjalan."""
+        with self._lock:
+            if self._pending is not None: self.dropped += 1
+            self._pending = None
+            self._prefetch = []
+            self.latest_id += 1
+            self.prefetch_generation += 1
+
+    def is_superseded(self, request_id):
+        return request_id != self.latest_id
+
+    def is_prefetch_stale(self, generation):
+        # Prefetch mengalah pada request utama yang sedang menunggu
+        return generation != self.prefetch_generation or self._pending is not None
+
+    def mark_dropped(self):
+        with self._lock: self.dropped += 1
+
+    def mark_served(self):
+        with self._lock: self.served += 1
+
+    def mark_prefetched(self):
+        with self._lock: self.prefetched += 1
+
+class CapturePool:
+    """
+    Pool handle cv2.VideoCapture yang tetap terbuka, dipakai hanya dari thread thumbnail.
+    Membuka container (apalagi MKV besar di NAS) jauh lebih mahal daripada seek + decode,
+    jadi handle disimpan per path dengan eviksi LRU dan batas jumlah handle terbuka.
+    """
+    def __init__(self, max_handles=3):
+        self.max_handles = max_handles
+        self._handles = OrderedDict() # path -> (cap, (size, mtime_ns))
+
+    @staticmethod
+    def _file_identity(path):
+        if "://" in path: return None
+        st = os.stat(path)
+        return (st.st_size, st.st_mtime_ns)
+
+    def acquire(self, path, source=None):
+        """Handle untuk path; source (mis. URL proxy lokal) dipakai saat membuka handle baru."""
+        identity = self._file_identity(path)
+        entry = self._handles.get(path)
+        if entry is not None:
+            cap, cached_identity = entry
+            if cached_identity == identity and cap.isOpened():
+                self._handles.move_to_end(path)
+                return cap
+            # File berubah sejak handle dibuka, buang handle lama
+            self.invalidate(path)
+
+        cap = cv2.VideoCapture(source or path)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        self._handles[path] = (cap, identity)
+        while len(self._handles) > self.max_handles:
+            oldest_path = next(iter(self._handles))
+            self.invalidate(oldest_path)
+        return cap
+
+    def invalidate(self, path=None):
+        """Tutup handle untuk path tertentu, atau semua handle jika path kosong."""
+        paths = [path] if path else list(self._handles.keys())
+        for p in paths:
+            entry = self._handles.pop(p, None)
+            if entry is not None:
+                entry[0].release()
+
+class PacketIndexWorker(QThread):
+    """Memuat PacketIndex dari disk, atau membangunnya di background jika belum ada."""
+    index_ready = pyqtSignal(object)
+
+    def __init__(self, video_path, cache_dir, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.cache_dir = cache_dir
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            index = PacketIndex.load_or_build(self.video_path, self.cache_dir, lambda: self._cancelled)
+            if index is not None and not self._cancelled:
+                self.index_ready.emit(index)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Gagal membangun indeks keyframe: {e}")
+
 class ThumbnailGenerator(QObject):
-    thumbnail_ready = pyqtSignal(QPixmap, float)
+    thumbnail_ready = pyqtSignal(QPixmap, int)
 
-    @pyqtSlot(str, int, float)
-    def generate(self, video_path, timestamp_ms, request_time):
-        if not video_path or not os.path.exists(video_path) or timestamp_ms < 0:
-            self.thumbnail_ready.emit(QPixmap(), request_time)
+    def __init__(self, cache, mailbox, parent=None):
+        super().__init__(parent)
+        self.capture_pool = CapturePool()
+        self.stream_proxy = RangeReadAheadProxy()
+        self.cache = cache
+        self.mailbox = mailbox
+        self.packet_index = None
+
+    @pyqtSlot(str)
+    def invalidate_source(self, video_path):
+        self.capture_pool.invalidate(video_path)
+        if "://" in video_path: self.stream_proxy.release(video_path)
+
+    @staticmethod
+    def _source_available(video_path):
+        return "://" in video_path or os.path.exists(video_path)
+
+    @pyqtSlot(object)
+    def set_packet_index(self, packet_index):
+        self.packet_index = packet_index
+
+    def _decode_thumbnail(self, video_path, timestamp_ms, should_abort, max_width=320):
+        """Decode satu frame, perkecil ke ukuran thumbnail, dan kembalikan sebagai JPEG.
+        Berhenti lebih awal (return None) jika should_abort() bernilai True."""
+        source = None
+        if "://" in video_path:
+            # Stream jaringan dibuka lewat proxy lokal agar hanya byte di sekitar frame yang diunduh
+            source = self.stream_proxy.local_url(video_path)
+        cap = self.capture_pool.acquire(video_path, source)
+        if cap is None: return None
+        if self.packet_index and self.packet_index.video_path == video_path:
+            # Seek langsung ke keyframe terdekat: tidak perlu decode maju sepanjang GOP
+            timestamp_ms = self.packet_index.nearest_keyframe(timestamp_ms)
+        cap.set(cv2.CAP_PROP_POS_MSEC, timestamp_ms)
+        if should_abort() or not cap.grab(): return None
+        if should_abort(): return None
+        ret, frame = cap.retrieve()
+        if not ret: return None
+        h, w = frame.shape[:2]
+        if w > max_width:
+            frame = cv2.resize(frame, (max_width, int(h * max_width / w)), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        return encoded.tobytes() if ok else None
+
+    @pyqtSlot()
+    def process_pending(self):
+        # Hanya request terbaru yang diproses, request lama di antaranya sudah ditimpa di mailbox
+        job = self.mailbox.take_next()
+        while job is not None:
+            is_prefetch, request = job
+            if is_prefetch: self._prefetch(*request)
+            else: self._generate(*request)
+            job = self.mailbox.take_next()
+
+    def _prefetch(self, video_path, timestamp_ms, generation):
+        """Decode spekulatif ke cache saja, tanpa memancarkan hasil ke GUI."""
+        should_abort = lambda: self.mailbox.is_prefetch_stale(generation)
+        if should_abort() or not self._source_available(video_path): return
+        try:
+            key = self.cache.make_key(video_path, timestamp_ms)
+            if self.cache.get(key) is not None: return
+            data = self._decode_thumbnail(video_path, self.cache.bucket_timestamp(timestamp_ms), should_abort)
+            if data and not should_abort():
+                self.cache.put(key, data)
+                self.mailbox.mark_prefetched()
+        except Exception as e:
+            print(f"Kesalahan saat prefetch thumbnail: {e}")
+            self.capture_pool.invalidate(video_path)
+
+    def _generate(self, video_path, timestamp_ms, request_id):
+        if not video_path or not self._source_available(video_path) or timestamp_ms < 0:
+            self.thumbnail_ready.emit(QPixmap(), request_id)
             return
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                self.thumbnail_ready.emit(QPixmap(), request_time)
-                return
-            cap.set(cv2.CAP_PROP_POS_MSEC, timestamp_ms)
-            ret, frame = cap.read()
-            cap.release()
-            if ret:
-                rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_image.shape
-                bytes_per_line = ch * w
-                qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-                pixmap = QPixmap.fromImage(qt_image)
-                self.thumbnail_ready.emit(pixmap, request_time)
-            else:
-                self.thumbnail_ready.emit(QPixmap(), request_time)
+            key = self.cache.make_key(video_path, timestamp_ms)
+            data = self.cache.get(key)
+            if data is None:
+                data = self._decode_thumbnail(video_path, self.cache.bucket_timestamp(timestamp_ms),
+                                              lambda: self.mailbox.is_superseded(request_id))
+                # Decode yang sudah selesai tetap disimpan (put mengabaikan None dari decode yang dibatalkan),
+                # supaya hover kembali ke posisi ini tidak membayar decode penuh lagi
+                self.cache.put(key, data)
+                if self.mailbox.is_superseded(request_id):
+                    self.mailbox.mark_dropped()
+                    return
+            pixmap = QPixmap()
+            if data: pixmap.loadFromData(data, "JPG")
+            self.mailbox.mark_served()
+            self.thumbnail_ready.emit(pixmap, request_id)
         except Exception as e:
             print(f"Kesalahan saat generate thumbnail dengan OpenCV: {e}")
-            self.thumbnail_ready.emit(QPixmap(), request_time)
+            # Handle bisa dalam kondisi rusak setelah error, buka ulang pada request berikutnya
+            self.capture_pool.invalidate(video_path)
+            self.thumbnail_ready.emit(QPixmap(), request_id)
+
+class Storyboard:
+    """
+    Sprite sheet berisi N frame yang diambil merata sepanjang video, plus indeks timestamp-nya.
+    Karena sampel berjarak sama, lookup cukup dengan aritmatika (O(1)), tanpa seek/decode.
+    Tile yang gagal di-decode ditandai tidak valid; untuk posisi itu pemanggil memakai live decode.
+    """
+    def __init__(self, video_path, sheet_image, timestamps, tile_size, columns, duration_ms, valid_tiles):
+        self.video_path = video_path
+        self.sheet_image = sheet_image # QImage, dikonversi ke QPixmap di thread GUI
+        self.sheet_pixmap = None
+        self.timestamps = timestamps
+        self.tile_size = tile_size
+        self.columns = columns
+        self.duration_ms = duration_ms
+        self.valid_tiles = valid_tiles # bytearray, 1 = tile berisi frame asli
+
+    def has_tile(self, timestamp_ms):
+        return bool(self.valid_tiles[self.tile_index(timestamp_ms)])
+
+    def tile_index(self, timestamp_ms):
+        count = len(self.timestamps)
+        index = int(timestamp_ms * count / self.duration_ms)
+        return max(0, min(count - 1, index))
+
+    def tile_rect(self, index):
+        w, h = self.tile_size
+        return QRect((index % self.columns) * w, (index // self.columns) * h, w, h)
+
+    def thumbnail(self, timestamp_ms):
+        if self.sheet_pixmap is None:
+            self.sheet_pixmap = QPixmap.fromImage(self.sheet_image)
+        return self.sheet_pixmap.copy(self.tile_rect(self.tile_index(timestamp_ms)))
+
+class StoryboardWorker(QThread):
+    """Membangun Storyboard di background dengan prioritas rendah saat file lokal dibuka."""
+    storyboard_ready = pyqtSignal(object)
+
+    def __init__(self, video_path, tile_count=100, tile_width=160, columns=10, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.tile_count = tile_count
+        self.tile_width = tile_width # Tinggi tile mengikuti aspect ratio frame pertama
+        self.columns = columns
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            if not cap.isOpened(): return
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+            if fps <= 0 or frame_count <= 0: return
+            duration_ms = frame_count / fps * 1000.0
+
+            tile_w, tile_h = self.tile_width, None
+            rows = (self.tile_count + self.columns - 1) // self.columns
+            sheet = None
+            valid_tiles = bytearray(self.tile_count)
+            timestamps = []
+            for i in range(self.tile_count):
+                if self._cancelled: return
+                # Ambil frame di tengah setiap interval
+                timestamp_ms = (i + 0.5) * duration_ms / self.tile_count
+                timestamps.append(int(timestamp_ms))
+                cap.set(cv2.CAP_PROP_POS_MSEC, timestamp_ms)
+                ret, frame = cap.read()
+                if not ret: continue
+                if sheet is None:
+                    # 4:3, ultrawide, dan portrait tidak dipipihkan: tinggi tile dari aspect ratio sumber
+                    frame_h, frame_w = frame.shape[:2]
+                    tile_h = max(1, round(tile_w * frame_h / frame_w))
+                    sheet = np.zeros((rows * tile_h, self.columns * tile_w, 3), dtype=np.uint8)
+                y, x = (i // self.columns) * tile_h, (i % self.columns) * tile_w
+                tile = cv2.resize(frame, (tile_w, tile_h), interpolation=cv2.INTER_AREA)
+                sheet[y:y + tile_h, x:x + tile_w] = cv2.cvtColor(tile, cv2.COLOR_BGR2RGB)
+                valid_tiles[i] = 1
+            if sheet is None: return # Tidak ada satu frame pun yang bisa di-decode
+
+            h, w, ch = sheet.shape
+            # copy() agar QImage memiliki buffer sendiri, terlepas dari array NumPy
+            sheet_image = QImage(sheet.data, w, h, ch * w, QImage.Format.Format_RGB888).copy()
+            if not self._cancelled:
+                self.storyboard_ready.emit(Storyboard(self.video_path, sheet_image, timestamps, (tile_w, tile_h),
+                                                     self.columns, duration_ms, valid_tiles))
+        except Exception as e:
+            print(f"Gagal membuat storyboard: {e}")
+        finally:
+            cap.release()
 
 # --- SLIDER KUSTOM (TIDAK DIUBAH) ---
 class ClickableSlider(QSlider):
@@ -96,6 +410,20 @@ class ClickableSlider(QSlider):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setMouseTracking(True)
+        # Kecepatan hover dalam piksel/detik (bertanda: positif = ke kanan), dihaluskan EMA
+        self.hover_velocity = 0.0
+        self._last_hover = None # (x, waktu monotonic)
+
+    def _track_hover_velocity(self, x):
+        now = time.monotonic()
+        if self._last_hover is not None:
+            last_x, last_time = self._last_hover
+            dt = now - last_time
+            if dt > 0.2:
+                self.hover_velocity = 0.0 # Kursor sempat diam, mulai ulang estimasi
+            elif dt > 0:
+                self.hover_velocity = 0.6 * self.hover_velocity + 0.4 * ((x - last_x) / dt)
+        self._last_hover = (x, now)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -108,10 +436,13 @@ class ClickableSlider(QSlider):
         super().mousePressEvent(event)
 
     def mouseMoveEvent(self, event):
+        self._track_hover_velocity(event.pos().x())
         self.hover_move.emit(event.pos().x())
         super().mouseMoveEvent(event)
 
     def leaveEvent(self, event):
+        self.hover_velocity = 0.0
+        self._last_hover = None
         self.hover_leave.emit()
         super().leaveEvent(event)
 
@@ -231,38 +562,242 @@ class MiniPlayerWindow(QWidget):
         self.closing.emit()
         super().closeEvent(event)
 
-# --- Kelas Parser SRT ---
-class SRTParser:
-    def __init__(self, srt_file_path):
-        self.subtitles = []
+class SubtitleLoader(QThread):
+    """
+    Cari dan parse file subtitle di background agar pemutaran video tidak menunggu (pencarian
+    sidecar bisa menyentuh share jaringan). Tanpa file sidecar, track subtitle yang tertanam di
+    container video diekstrak dengan ffmpeg (hasilnya di-cache).
+    """
+    subtitle_ready = pyqtSignal(object)
+
+    def __init__(self, video_path, parent=None, cache_dir=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.cache_dir = cache_dir
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            # Indeks folder di-cache, jadi berpindah episode tidak men-scan ulang share jaringan
+            candidates = find_subtitle_candidates(self.video_path)
+            if self._cancelled: return
+            subtitle_path = candidates[0]['path'] if candidates else None
+            if subtitle_path:
+                languages = ", ".join(c['language'] or '?' for c in candidates)
+                print(f"File subtitle ditemukan: {subtitle_path} ({len(candidates)} kandidat: {languages})")
+                store = load_subtitles(subtitle_path, lambda: self._cancelled)
+            else:
+                print("Tidak ada file subtitle (.srt/.vtt/.ass/.ssa) yang cocok, mencoba subtitle tertanam.")
+                store = load_embedded_subtitles(self.video_path, self.cache_dir, is_cancelled=lambda: self._cancelled)
+        except (OSError, ValueError) as e:
+            print(f"Gagal membaca atau parse file subtitle: {e}")
+            return
+        if store is None: return
+        if store.skipped_blocks:
+            print(f"{store.skipped_blocks} blok subtitle rusak dilewati: {store.source_path}")
+        if not self._cancelled:
+            self.subtitle_ready.emit(store)
+
+class SubtitleSyncWorker(QThread):
+    """Hitung offset (dan drift) subtitle terhadap audio video di background."""
+    sync_finished = pyqtSignal(object, str) # (offset_ms, scale, confidence) atau None, pesan error
+
+    def __init__(self, video_path, store, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.store = store
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        started = time.perf_counter()
         try:
-            with open(srt_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self._parse(content)
+            activity = speech_activity_envelope(self.video_path, is_cancelled=lambda: self._cancelled)
+            if self._cancelled: return
+            if activity is None:
+                self.sync_finished.emit(None, "Audio video tidak dapat dibaca.")
+                return
+            result = estimate_subtitle_sync(activity, self.store, estimate_drift=True)
+        except (OSError, ValueError, RuntimeError) as e:
+            if not self._cancelled: self.sync_finished.emit(None, f"Gagal menganalisis audio: {e}")
+            return
         except Exception as e:
-            print(f"Gagal membaca atau parse file SRT: {e}")
-
-    def _time_to_ms(self, time_str):
-        h, m, s, ms = map(int, re.split('[:,]', time_str))
-        return (h * 3600 + m * 60 + s) * 1000 + ms
-
-    def _parse(self, content):
-        # Regex untuk menemukan blok subtitle: nomor, waktu, dan teks
-        pattern = re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)\n\n', re.DOTALL)
-        matches = pattern.findall(content)
-        for match in matches:
-            start_time_str, end_time_str, text = match[1], match[2], match[3]
-            self.subtitles.append({
-                'start_ms': self._time_to_ms(start_time_str),
-                'end_ms': self._time_to_ms(end_time_str),
-                'text': text.strip()
-            })
-
-    def get_subtitle(self, position_ms):
-        for sub in self.subtitles:
-            if sub['start_ms'] <= position_ms <= sub['end_ms']:
-                return sub['text']
-        return None
+            # Jalan terakhir: tanpa sync_finished tombol sinkronisasi tetap nonaktif selamanya
+            if not self._cancelled: self.sync_finished.emit(None, f"Kesalahan tak terduga saat sinkronisasi: {e!r}")
+            return
+        print(f"Analisis sinkronisasi subtitle selesai dalam {time.perf_counter() - started:.1f} detik")
+        if not self._cancelled:
+            self.sync_finished.emit(result, "")
+
+class SubtitleIndexWorker(QThread):
+    """Perbarui indeks pencarian subtitle (muat dari disk, indeks file baru/berubah) di background."""
+    index_updated = pyqtSignal(int, int) # jumlah diindeks ulang, jumlah dibuang
+
+    def __init__(self, index, entries, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.entries = entries
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        started = time.perf_counter()
+        result = self.index.refresh(self.entries, lambda: self._cancelled)
+        if result is None: return
+        print(f"Indeks subtitle: {len(self.index)} file, {result[0]} diindeks ulang, {result[1]} dibuang "
+              f"({time.perf_counter() - started:.1f} detik)")
+        self.index_updated.emit(*result)
+
+class SubtitleScheduler(QObject):
+    """
+    Penjadwal subtitle berbasis event. Alih-alih lookup di setiap positionChanged, satu QTimer
+    single-shot dipasang untuk batas cue berikutnya (mulai atau selesai), dihitung dari posisi
+    dan kecepatan putar saat ini. Timer dipasang ulang saat seek, pause, dan ganti kecepatan.
+    """
+    cues_changed = pyqtSignal(tuple) # indeks cue yang aktif, urut waktu mulai
+    SEEK_TOLERANCE_MS = 500 # Selisih posisi melebihi ini dianggap seek
+    REPORT_LAG_MS = 250 # positionChanged bisa sedikit tertinggal dari jam pemutaran
+
+    def __init__(self, player, parent=None):
+        super().__init__(parent)
+        self.player = player
+        self.store = None
+        self.active_ids = ()
+        self._anchor = (0, time.monotonic(), 0.0) # (posisi ms, waktu monotonic, kecepatan efektif)
+        self._target_ms = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._on_boundary)
+        player.playbackStateChanged.connect(lambda _: self.resync())
+        player.playbackRateChanged.connect(lambda _: self.resync())
+
+    def set_store(self, store):
+        self.store = store
+        self.resync()
+
+    def clear(self):
+        """Sembunyikan subtitle sampai resync berikutnya (mis. saat video dihentikan)."""
+        self._timer.stop()
+        self._target_ms = None
+        if self.active_ids:
+            self.active_ids = ()
+            self.cues_changed.emit(())
+
+    def resync(self, position_ms=None):
+        """Tampilkan cue untuk posisi sekarang lalu pasang timer untuk batas berikutnya."""
+        self._timer.stop()
+        self._target_ms = None
+        if position_ms is None: position_ms = self.player.position()
+        ids = self.store.active_cue_ids(position_ms) if self.store else ()
+        if ids != self.active_ids:
+            self.active_ids = ids
+            self.cues_changed.emit(ids)
+        playing = self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+        rate = self.player.playbackRate() if playing else 0.0
+        self._anchor = (position_ms, time.monotonic(), rate)
+        if not self.store or rate <= 0: return
+        target_ms = self.store.next_change_ms(position_ms)
+        if target_ms == float('inf'): return
+        self._target_ms = target_ms
+        self._timer.start(max(0, math.ceil((target_ms - position_ms) / rate)))
+
+    def _on_boundary(self):
+        position_ms = self.player.position()
+        if self._target_ms is not None and 0 <= self._target_ms - position_ms <= self.REPORT_LAG_MS:
+            position_ms = self._target_ms
+        self.resync(position_ms)
+
+    def current_position_ms(self):
+        """Posisi pemutaran perkiraan, diekstrapolasi dari titik sinkron terakhir."""
+        anchor_ms, anchor_time, rate = self._anchor
+        return anchor_ms + (time.monotonic() - anchor_time) * 1000 * rate
+
+    def check_position(self, position_ms):
+        """Murah untuk dipanggil tiap positionChanged: hanya mendeteksi seek dari luar scheduler."""
+        if abs(position_ms - self.current_position_ms()) > self.SEEK_TOLERANCE_MS:
+            self.resync(position_ms)
+
+class SubtitlePixmapCache:
+    """
+    LRU pixmap subtitle yang sudah dirender (teks + outline + kotak latar). Kunci =
+    (indeks cue, font, ukuran font, lebar viewport), dan isinya dibuang saat jendela di-resize.
+    Hanya dipakai dari thread GUI.
+    """
+    def __init__(self, max_entries=48):
+        self.max_entries = max_entries
+        self._pixmaps = OrderedDict() # kunci -> QPixmap
+
+    def get(self, key):
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None: self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        self._pixmaps[key] = pixmap
+        self._pixmaps.move_to_end(key)
+        while len(self._pixmaps) > self.max_entries:
+            self._pixmaps.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._pixmaps
+
+    def clear(self):
+        self._pixmaps.clear()
+
+class SubtitlePrerenderer(QObject):
+    """Merender cue yang akan datang ke QImage di thread terpisah; GUI tinggal mengubahnya ke QPixmap."""
+    image_ready = pyqtSignal(object, QImage)
+
+    @staticmethod
+    def render_image(text, font, max_width, device_pixel_ratio=1.0, padding=8, radius=5):
+        """Render teks (HTML sederhana seperti <i>) di tengah kotak latar semi-transparan, dengan outline hitam."""
+        document = QTextDocument()
+        document.setDocumentMargin(0)
+        document.setDefaultFont(font)
+        document.setHtml(f"<div align='center' style='color: white;'>{text.replace(chr(10), '<br>')}</div>")
+        document.setTextWidth(min(document.idealWidth(), max(1, max_width - 2 * padding)))
+        # Salinan hitam untuk outline: digambar bergeser 1px ke 8 arah di bawah teks utama
+        outline = document.clone()
+        cursor = QTextCursor(outline)
+        cursor.select(QTextCursor.SelectionType.Document)
+        outline_format = QTextCharFormat()
+        outline_format.setForeground(QColor(0, 0, 0))
+        cursor.mergeCharFormat(outline_format)
+
+        width = math.ceil(document.size().width()) + 2 * padding
+        height = math.ceil(document.size().height()) + 2 * padding
+        image = QImage(int(width * device_pixel_ratio), int(height * device_pixel_ratio), QImage.Format.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(device_pixel_ratio)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 153))
+        painter.drawRoundedRect(QRectF(0, 0, width, height), radius, radius)
+        for dx, dy in ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+            painter.save()
+            painter.translate(padding + dx, padding + dy)
+            outline.drawContents(painter)
+            painter.restore()
+        painter.translate(padding, padding)
+        document.drawContents(painter)
+        painter.end()
+        return image
+
+    @pyqtSlot(object)
+    def render_batch(self, jobs):
+        # jobs: [(kunci cache, teks, QFont, lebar maksimum, device pixel ratio)]
+        for key, text, font, max_width, device_pixel_ratio in jobs:
+            self.image_ready.emit(key, self.render_image(text, font, max_width, device_pixel_ratio))
 
 # --- Kelas YouTubeDLWorker, PlaylistWidget, HistoryWindow tidak diubah ---
 class YouTubeDLWorker(QObject):
@@ -285,6 +820,7 @@ class YouTubeDLWorker(QObject):
 
 class PlaylistWidget(QWidget):
     play_requested = pyqtSignal(str)
+    playlist_changed = pyqtSignal()
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Macan Player - Playlist")
@@ -369,6 +905,55 @@ class PlaylistWidget(QWidget):
         except (FileNotFoundError, json.JSONDecodeError): config = {}
         config['playlist'] = self.playlist
         with open(config_path, "w") as f: json.dump(config, f, indent=4)
+        self.playlist_changed.emit()
+
+class SubtitleSearchDialog(QDialog):
+    """Cari kutipan di subtitle semua film pustaka; pilih hasil untuk memutar film di cue tersebut."""
+    result_selected = pyqtSignal(dict)
+    def __init__(self, search_index, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Cari Dialog Film")
+        self.setGeometry(1100, 100, 420, 500)
+        self.search_index = search_index
+        self._setup_ui()
+        self._connect_signals()
+    def _setup_ui(self):
+        self.main_layout = QVBoxLayout(self)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Ketik kutipan dialog...")
+        self.list_widget = QListWidget()
+        self.status_label = QLabel()
+        self.main_layout.addWidget(self.search_input)
+        self.main_layout.addWidget(self.list_widget)
+        self.main_layout.addWidget(self.status_label)
+    def _connect_signals(self):
+        self.search_input.textChanged.connect(self._run_search)
+        self.search_input.returnPressed.connect(self._select_first)
+        self.list_widget.itemActivated.connect(self._on_item_selected)
+    def set_indexing(self, running):
+        if running: self.status_label.setText("Memperbarui indeks subtitle...")
+        else: self._run_search()
+    def _run_search(self):
+        query = self.search_input.text()
+        started = time.perf_counter()
+        results = self.search_index.search(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.list_widget.clear()
+        for result in results:
+            start = QTime(0, 0, 0).addMSecs(result['start_ms']).toString('hh:mm:ss')
+            text = " ".join(result['text'].split())
+            list_item = QListWidgetItem(f"{result['title']}  [{start}]  {text}")
+            list_item.setToolTip(result['subtitle'])
+            list_item.setData(Qt.ItemDataRole.UserRole, result)
+            self.list_widget.addItem(list_item)
+        if query.strip():
+            self.status_label.setText(f"{len(results)} hasil dalam {elapsed_ms:.1f} ms ({len(self.search_index)} file subtitle)")
+        else:
+            self.status_label.setText(f"{len(self.search_index)} file subtitle terindeks")
+    def _select_first(self):
+        if self.list_widget.count(): self._on_item_selected(self.list_widget.item(0))
+    def _on_item_selected(self, item):
+        self.result_selected.emit(item.data(Qt.ItemDataRole.UserRole))
 
 class HistoryWindow(QDialog):
     history_item_selected = pyqtSignal(dict)
@@ -420,7 +1005,10 @@ class HistoryWindow(QDialog):
 
 
 class ModernVideoPlayer(QWidget):
-    request_thumbnail = pyqtSignal(str, int, float)
+    wake_thumbnail_worker = pyqtSignal()
+    invalidate_thumbnail_source = pyqtSignal(str)
+    thumbnail_packet_index_changed = pyqtSignal(object)
+    prerender_subtitles = pyqtSignal(object)
 
     def __init__(self):
         super().__init__()
@@ -438,12 +1026,21 @@ class ModernVideoPlayer(QWidget):
         self.current_media_info = {}
 
         # --- TAMBAHKAN INI ---
-        self.srt_parser = None
-        self.current_subtitle_text = ""
+        self.subtitle_store = None
+        self.subtitle_source_store = None # Store asli dari file, sebelum dikoreksi auto-sync
+        self.subtitle_loader = None
+        self.subtitle_sync_worker = None
+        self._detached_workers = set() # Worker lama yang dibatalkan tapi thread-nya belum selesai
+        self.subtitle_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "subtitles")
+        self.subtitle_search_index = SubtitleSearchIndex(os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "search"))
+        self.subtitle_index_worker = None
+        self.subtitle_index_pending = False # Pustaka berubah saat indeks sedang dibangun, jalankan sekali lagi
+        self.pending_seek_ms = None # Posisi tujuan setelah media selesai dimuat (hasil pencarian subtitle)
         # ---------------------
 
         self.playlist_widget = PlaylistWidget()
         self.history_window = HistoryWindow(self.history, self)
+        self.subtitle_search_dialog = SubtitleSearchDialog(self.subtitle_search_index, self)
         self.controls_hide_timer = QTimer(self)
         self.controls_hide_timer.setInterval(2500)
         self.controls_hide_timer.setSingleShot(True)
@@ -452,12 +1049,15 @@ class ModernVideoPlayer(QWidget):
         self.mini_player_widget = MiniPlayerWindow(self)
 
         self._setup_thumbnail_feature()
+        self._setup_subtitle_prerender()
         self._setup_themes()
         self._load_config()
         self._setup_ui()
         self._connect_signals()
         self._apply_theme(self.theme_names[self.current_theme_index])
 
+        self._refresh_subtitle_index()
+
         self.setAcceptDrops(True)
         self.video_widget.setAcceptDrops(True)
         self.setMouseTracking(True)
@@ -467,11 +1067,27 @@ class ModernVideoPlayer(QWidget):
         # --- PERBAIKAN: Gunakan setVideoOutput untuk PyQt6 ---
         self.player.setVideoOutput(self.video_widget)
 
+    def _setup_subtitle_prerender(self):
+        self.subtitle_pixmap_cache = SubtitlePixmapCache()
+        self.subtitle_prerender_pending = set()
+        self.subtitle_generation = 0 # Naik setiap store subtitle berganti, hasil render lama diabaikan
+        self.subtitle_render_thread = QThread(self)
+        self.subtitle_prerenderer = SubtitlePrerenderer()
+        self.subtitle_prerenderer.moveToThread(self.subtitle_render_thread)
+        self.subtitle_render_thread.start(QThread.Priority.LowPriority)
+
     def _setup_thumbnail_feature(self):
-        self.last_thumbnail_request_time = 0.0
+        self.thumbnail_mailbox = ThumbnailRequestMailbox()
+        self.storyboard = None
+        self.storyboard_worker = None
+        self.packet_index = None
+        self.packet_index_worker = None
+        self.index_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "index")
         self.thumbnail_preview = ThumbnailPreviewWidget()
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "thumbnails")
+        self.thumbnail_cache = ThumbnailCache(cache_dir)
         self.thumbnail_thread = QThread()
-        self.thumbnail_generator = ThumbnailGenerator()
+        self.thumbnail_generator = ThumbnailGenerator(self.thumbnail_cache, self.thumbnail_mailbox)
         self.thumbnail_generator.moveToThread(self.thumbnail_thread)
         self.thumbnail_thread.start()
 
@@ -479,6 +1095,7 @@ class ModernVideoPlayer(QWidget):
         self.player = QMediaPlayer()
         self.audio_output = QAudioOutput()
         self.player.setAudioOutput(self.audio_output)
+        self.subtitle_scheduler = SubtitleScheduler(self.player, self)
 
     def _setup_themes(self):
         self.themes = {
@@ -601,12 +1218,11 @@ class ModernVideoPlayer(QWidget):
         self.subtitle_view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.subtitle_view.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
 
-        # 2. Buat item teks untuk subtitle
-        self.subtitle_text_item = QGraphicsTextItem()
-        font = QFont("Arial", 20, QFont.Weight.Bold)
-        self.subtitle_text_item.setFont(font)
-        self.subtitle_text_item.setDefaultTextColor(QColor("white"))
-        self.subtitle_scene.addItem(self.subtitle_text_item)
+        # 2. Buat item pixmap untuk subtitle (cue dirender lebih dulu, tampil cukup tukar pixmap)
+        self.subtitle_font = QFont("Arial", 20, QFont.Weight.Bold)
+        self.subtitle_item = QGraphicsPixmapItem()
+        self.subtitle_item.hide()
+        self.subtitle_scene.addItem(self.subtitle_item)
 
         # 3. Ganti layout video biasa dengan QStackedLayout
         self.video_container = QWidget()
@@ -646,6 +1262,9 @@ class ModernVideoPlayer(QWidget):
         if qta: self.btn_show_playlist.setIcon(qta.icon('fa5s.list'))
         self.btn_show_history = QPushButton()
         if qta: self.btn_show_history.setIcon(qta.icon('fa5s.history'))
+        self.btn_search_subtitle = QPushButton()
+        self.btn_search_subtitle.setToolTip("Cari dialog di semua film")
+        if qta: self.btn_search_subtitle.setIcon(qta.icon('fa5s.search'))
 
         self.position_slider = ClickableSlider(Qt.Orientation.Horizontal)
         self.position_slider.setRange(0, 0)
@@ -660,6 +1279,11 @@ class ModernVideoPlayer(QWidget):
         self.btn_stop = QPushButton()
         if qta: self.btn_stop.setIcon(qta.icon('fa5s.stop'))
         self.btn_speed = QPushButton(f"{self.playback_speeds[self.current_speed_index]}x")
+        self.btn_sync_subtitle = QPushButton()
+        self.btn_sync_subtitle.setToolTip("Sinkronkan subtitle otomatis dengan audio")
+        if qta: self.btn_sync_subtitle.setIcon(qta.icon('fa5s.closed-captioning'))
+        else: self.btn_sync_subtitle.setText("Sync")
+        self.btn_sync_subtitle.setEnabled(False)
         self.btn_mute = QPushButton()
         self.volume_slider = QSlider(Qt.Orientation.Horizontal)
         self.volume_slider.setRange(0, 100)
@@ -696,8 +1320,10 @@ class ModernVideoPlayer(QWidget):
         bottom_controls_layout.addWidget(self.btn_open)
         bottom_controls_layout.addWidget(self.btn_toggle_url_bar)
         bottom_controls_layout.addWidget(self.btn_speed)
+        bottom_controls_layout.addWidget(self.btn_sync_subtitle)
         bottom_controls_layout.addWidget(self.btn_show_playlist)
         bottom_controls_layout.addWidget(self.btn_show_history)
+        bottom_controls_layout.addWidget(self.btn_search_subtitle)
         bottom_controls_layout.addWidget(self.btn_mute)
         bottom_controls_layout.addWidget(self.volume_slider)
         bottom_controls_layout.addWidget(self.btn_mini_player)
@@ -730,6 +1356,7 @@ class ModernVideoPlayer(QWidget):
         self.btn_fullscreen.clicked.connect(self._toggle_fullscreen)
         self.btn_mute.clicked.connect(self._toggle_mute)
         self.btn_speed.clicked.connect(self._change_playback_speed)
+        self.btn_sync_subtitle.clicked.connect(self._auto_sync_subtitles)
         self.btn_show_playlist.clicked.connect(self._toggle_playlist_window)
         self.btn_prev_playlist.clicked.connect(self._play_previous_video)
         self.btn_next_playlist.clicked.connect(self._play_next_video)
@@ -738,6 +1365,9 @@ class ModernVideoPlayer(QWidget):
         self.history_window.history_item_selected.connect(self._play_from_history)
         self.history_window.delete_selected_requested.connect(self._delete_history_item)
         self.history_window.clear_all_requested.connect(self._clear_all_history_data)
+        self.btn_search_subtitle.clicked.connect(self._show_subtitle_search)
+        self.subtitle_search_dialog.result_selected.connect(self._play_search_result)
+        self.playlist_widget.playlist_changed.connect(self._refresh_subtitle_index)
 
         self.btn_mini_player.clicked.connect(self._show_mini_player)
         self.mini_player_widget.closing.connect(self._show_main_from_mini)
@@ -749,6 +1379,9 @@ class ModernVideoPlayer(QWidget):
         self.position_slider.sliderMoved.connect(self._set_position)
 
         self.player.positionChanged.connect(self._update_position)
+        self.subtitle_scheduler.cues_changed.connect(self._show_subtitle_cues)
+        self.prerender_subtitles.connect(self.subtitle_prerenderer.render_batch, Qt.ConnectionType.QueuedConnection)
+        self.subtitle_prerenderer.image_ready.connect(self._on_subtitle_prerendered)
         self.player.durationChanged.connect(self._update_duration)
         self.player.playbackStateChanged.connect(self._update_play_pause_icon)
         self.player.mediaStatusChanged.connect(self._handle_media_status_changed)
@@ -758,14 +1391,17 @@ class ModernVideoPlayer(QWidget):
         self.controls_hide_timer.timeout.connect(self._hide_controls)
 
         self.position_slider.hover_move.connect(self._show_thumbnail_preview)
-        self.position_slider.hover_leave.connect(self.thumbnail_preview.hide)
+        self.position_slider.hover_leave.connect(self._hide_thumbnail_preview)
         self.thumbnail_generator.thumbnail_ready.connect(self._update_thumbnail)
-        self.request_thumbnail.connect(self.thumbnail_generator.generate, Qt.ConnectionType.QueuedConnection)
+        self.wake_thumbnail_worker.connect(self.thumbnail_generator.process_pending, Qt.ConnectionType.QueuedConnection)
+        self.invalidate_thumbnail_source.connect(self.thumbnail_generator.invalidate_source, Qt.ConnectionType.QueuedConnection)
+        self.thumbnail_packet_index_changed.connect(self.thumbnail_generator.set_packet_index, Qt.ConnectionType.QueuedConnection)
 
     def _show_thumbnail_preview(self, x_pos):
         video_path = self.current_media_info.get('path', '')
         is_url = "://" in video_path
-        if not self.player.hasVideo() or self.player.duration() <= 0 or is_url or not os.path.exists(video_path): return
+        if not self.player.hasVideo() or self.player.duration() <= 0: return
+        if not is_url and not os.path.exists(video_path): return
         value = self.position_slider.minimum() + (self.position_slider.maximum() - self.position_slider.minimum()) * x_pos / self.position_slider.width()
         timestamp_ms = int(value)
         global_slider_pos = self.position_slider.mapToGlobal(self.position_slider.rect().topLeft())
@@ -775,37 +1411,162 @@ class ModernVideoPlayer(QWidget):
         if not self.thumbnail_preview.isVisible():
             self.thumbnail_preview.show()
             self.thumbnail_preview.label.setText("Memuat...")
-        current_time = time.time()
-        if current_time - self.last_thumbnail_request_time > 0.1:
-            self.last_thumbnail_request_time = current_time
-            self.request_thumbnail.emit(video_path, timestamp_ms, current_time)
-
-    @pyqtSlot(QPixmap, float)
-    def _update_thumbnail(self, pixmap, request_time):
-        if request_time == self.last_thumbnail_request_time and self.thumbnail_preview.isVisible():
+        # Shift ditahan = minta frame persis, selain itu pakai storyboard jika sudah siap
+        exact_frame = bool(QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier)
+        storyboard = self.storyboard
+        if not exact_frame and storyboard and storyboard.video_path == video_path and storyboard.has_tile(timestamp_ms):
+            self.thumbnail_mailbox.cancel() # Abaikan hasil live decode yang masih tertunda
+            self.thumbnail_preview.set_thumbnail(storyboard.thumbnail(timestamp_ms))
+            return
+        # Worker hanya dibangunkan jika sedang tidur, jadi antrean event tidak pernah menumpuk
+        if self.thumbnail_mailbox.post(video_path, timestamp_ms):
+            self.wake_thumbnail_worker.emit()
+        if self.thumbnail_mailbox.post_prefetch(video_path, self._predict_prefetch_timestamps(timestamp_ms)):
+            self.wake_thumbnail_worker.emit()
+
+    def _predict_prefetch_timestamps(self, timestamp_ms, horizons=(0.15, 0.3, 0.45, 0.6)):
+        """Perkirakan posisi hover beberapa saat ke depan berdasarkan arah dan kecepatan kursor."""
+        slider = self.position_slider
+        ms_per_px = (slider.maximum() - slider.minimum()) / max(1, slider.width())
+        velocity_ms = slider.hover_velocity * ms_per_px # ms timeline per detik
+        bucket_ms = self.thumbnail_cache.bucket_ms
+        current_bucket = self.thumbnail_cache.bucket_timestamp(timestamp_ms)
+        if abs(velocity_ms) < bucket_ms:
+            # Kursor nyaris diam: siapkan bucket tetangga di kedua sisi
+            candidates = [current_bucket + bucket_ms, current_bucket - bucket_ms]
+        else:
+            candidates = [self.thumbnail_cache.bucket_timestamp(int(timestamp_ms + velocity_ms * h)) for h in horizons]
+        timestamps = []
+        for ts in candidates:
+            if ts != current_bucket and slider.minimum() <= ts <= slider.maximum() and ts not in timestamps:
+                timestamps.append(ts)
+        return timestamps
+
+    def _hide_thumbnail_preview(self):
+        self.thumbnail_mailbox.cancel()
+        self.thumbnail_preview.hide()
+
+    def _start_storyboard(self, video_path):
+        self._cancel_storyboard()
+        self.storyboard_worker = StoryboardWorker(video_path, parent=self)
+        self.storyboard_worker.storyboard_ready.connect(self._on_storyboard_ready)
+        self.storyboard_worker.start(QThread.Priority.LowestPriority)
+
+    def _cancel_storyboard(self):
+        self.storyboard = None
+        if self.storyboard_worker:
+            self.storyboard_worker.storyboard_ready.disconnect(self._on_storyboard_ready)
+            self._detach_worker(self.storyboard_worker)
+            self.storyboard_worker = None
+
+    def _on_storyboard_ready(self, storyboard):
+        if storyboard.video_path == self.current_media_info.get('path'):
+            self.storyboard = storyboard
+
+    def _start_packet_index(self, video_path):
+        self._cancel_packet_index()
+        self.packet_index_worker = PacketIndexWorker(video_path, self.index_cache_dir, parent=self)
+        self.packet_index_worker.index_ready.connect(self._on_packet_index_ready)
+        self.packet_index_worker.start(QThread.Priority.LowestPriority)
+
+    def _cancel_packet_index(self):
+        if self.packet_index is not None:
+            self.packet_index = None
+            self.thumbnail_packet_index_changed.emit(None)
+        if self.packet_index_worker:
+            self.packet_index_worker.index_ready.disconnect(self._on_packet_index_ready)
+            self._detach_worker(self.packet_index_worker)
+            self.packet_index_worker = None
+
+    def _on_packet_index_ready(self, packet_index):
+        if packet_index.video_path == self.current_media_info.get('path'):
+            self.packet_index = packet_index
+            self.thumbnail_packet_index_changed.emit(packet_index)
+
+    @pyqtSlot(QPixmap, int)
+    def _update_thumbnail(self, pixmap, request_id):
+        if not self.thumbnail_mailbox.is_superseded(request_id) and self.thumbnail_preview.isVisible():
             self.thumbnail_preview.set_thumbnail(pixmap)
 
     def _show_history_window(self):
         self.history_window.populate_list()
         self.history_window.exec()
     def _add_to_history(self, path, title):
+        is_new = not any(item.get('path') == path for item in self.history)
         self.history = [item for item in self.history if item.get('path') != path]
         self.history.append({'path': path, 'title': title})
         if len(self.history) > 50: self.history = self.history[-50:]
+        if is_new: self._refresh_subtitle_index()
+    def _show_subtitle_search(self):
+        # Buka dialog sekaligus cek ulang file subtitle yang berubah sejak indeks terakhir
+        self._refresh_subtitle_index()
+        self.subtitle_search_dialog.show()
+        self.subtitle_search_dialog.raise_()
+        self.subtitle_search_dialog.search_input.setFocus()
+    def _refresh_subtitle_index(self):
+        if self.subtitle_index_worker:
+            self.subtitle_index_pending = True
+            return
+        self.subtitle_index_pending = False
+        entries = [(item['path'], item.get('title', os.path.basename(item['path'])))
+                   for item in self.playlist_widget.get_playlist_data() + self.history if item.get('path')]
+        self.subtitle_index_worker = SubtitleIndexWorker(self.subtitle_search_index, entries, parent=self)
+        self.subtitle_index_worker.finished.connect(self._on_subtitle_index_finished)
+        self.subtitle_search_dialog.set_indexing(True)
+        self.subtitle_index_worker.start(QThread.Priority.LowestPriority)
+    def _on_subtitle_index_finished(self):
+        worker, self.subtitle_index_worker = self.subtitle_index_worker, None
+        worker.deleteLater()
+        self.subtitle_search_dialog.set_indexing(False)
+        if self.subtitle_index_pending: self._refresh_subtitle_index()
+    def _play_search_result(self, result):
+        if result['video'] == self.current_media_info.get('path') and self.player.mediaStatus() != QMediaPlayer.MediaStatus.NoMedia:
+            self._set_position(result['start_ms'])
+            return
+        self._load_video_file(result['video'])
+        self.pending_seek_ms = result['start_ms']
     def _play_from_history(self, item):
         path = item.get('path')
         if not path: return
         self._load_video_file(path)
     def _load_subtitle_file(self, video_path):
-        self.srt_parser = None
-        self.subtitle_text_item.setHtml("") # Kosongkan subtitle lama
-        base_name, _ = os.path.splitext(video_path)
-        srt_path = base_name + ".srt"
-        if os.path.exists(srt_path):
-            print(f"File subtitle ditemukan: {srt_path}")
-            self.srt_parser = SRTParser(srt_path)
-        else:
-            print("Tidak ada file subtitle (.srt) yang cocok.")
+        self.subtitle_loader = SubtitleLoader(video_path, parent=self, cache_dir=self.subtitle_cache_dir)
+        self.subtitle_loader.subtitle_ready.connect(self._set_subtitle_store)
+        self.subtitle_loader.start(QThread.Priority.LowPriority)
+
+    def _cancel_subtitle_loader(self):
+        if self.subtitle_loader:
+            self.subtitle_loader.subtitle_ready.disconnect(self._set_subtitle_store)
+            self._detach_worker(self.subtitle_loader)
+            self.subtitle_loader = None
+
+    def _detach_worker(self, worker):
+        # Thread yang dibatalkan baru berhenti di cek pembatalan berikutnya; referensinya disimpan
+        # agar closeEvent bisa menunggunya dan QThread tidak dihancurkan saat masih berjalan
+        worker.cancel()
+        self._detached_workers.add(worker)
+        worker.finished.connect(self._on_detached_worker_finished)
+        if worker.isFinished():
+            self._detached_workers.discard(worker)
+            worker.deleteLater()
+
+    def _on_detached_worker_finished(self):
+        worker = self.sender()
+        if worker in self._detached_workers:
+            self._detached_workers.discard(worker)
+            worker.deleteLater()
+
+    def _set_subtitle_store(self, store, synced=False):
+        if not synced:
+            self._cancel_subtitle_sync()
+            self.subtitle_source_store = store
+        self.subtitle_store = store
+        video_path = self.current_media_info.get('path', '')
+        self.btn_sync_subtitle.setEnabled(bool(store) and "://" not in video_path and self.subtitle_sync_worker is None)
+        self.subtitle_generation += 1
+        self.subtitle_pixmap_cache.clear()
+        self.subtitle_prerender_pending.clear()
+        self.subtitle_scheduler.set_store(store)
     def _delete_history_item(self, index):
         if 0 <= index < len(self.history):
             del self.history[index]
@@ -814,6 +1575,8 @@ class ModernVideoPlayer(QWidget):
     def _clear_all_history_data(self):
         self.history.clear()
         self.history_window.populate_list()
+        # Riwayat dihapus, thumbnail film yang pernah ditonton ikut dihapus
+        self.thumbnail_cache.clear()
         self._save_config()
 
     def _show_mini_player(self):
@@ -858,11 +1621,20 @@ class ModernVideoPlayer(QWidget):
     def _load_video_file(self, file_path_or_url):
         self.setWindowTitle(f"Macan Player - Memuat...")
         self._stop_video()
+        self.pending_seek_ms = None
         
         is_url = "://" in file_path_or_url
+        self._release_previous_source(file_path_or_url)
+        self._cancel_storyboard()
+        self._cancel_packet_index()
+        # Juga untuk URL: cue file lama dan loader/sync yang masih berjalan tidak boleh ikut terbawa
+        self._set_subtitle_store(None) # sekaligus membatalkan auto-sync
+        self._cancel_subtitle_loader()
         # --- TAMBAHKAN INI ---
         if not is_url:
             self._load_subtitle_file(file_path_or_url)
+            self._start_storyboard(file_path_or_url)
+            self._start_packet_index(file_path_or_url)
     # ---------------------
         source = QUrl(file_path_or_url) if is_url else QUrl.fromLocalFile(file_path_or_url)
         title = self.current_media_info.get('title', os.path.basename(file_path_or_url))
@@ -914,11 +1686,19 @@ class ModernVideoPlayer(QWidget):
         self.worker.finished.connect(self._on_youtube_dl_finished)
         self.thread.start()
 
+    def _release_previous_source(self, new_path):
+        # Sumber berganti: tutup handle thumbnail milik file sebelumnya
+        previous_path = self.current_media_info.get('path', '')
+        if previous_path and previous_path != new_path:
+            self.invalidate_thumbnail_source.emit(previous_path)
+
     def _on_youtube_dl_finished(self, video_url, title, error):
         if error or not video_url:
             QMessageBox.critical(self, "Error URL", error or "URL tidak valid.")
             self.setWindowTitle("Macan Player")
             return
+        # Harus sebelum current_media_info ditimpa, kalau tidak _load_video_file tidak lagi tahu sumber lama
+        self._release_previous_source(video_url)
         self.current_media_info = {'path': video_url, 'title': title}
         self._load_video_file(video_url)
 
@@ -934,8 +1714,7 @@ class ModernVideoPlayer(QWidget):
         self.position_slider.setValue(0)
         self._update_control_states()
         # --- TAMBAHKAN INI ---
-        self.subtitle_text_item.setHtml("")
-        self.current_subtitle_text = ""
+        self.subtitle_scheduler.clear()
     # ---------------------
 
     def _skip_forward(self):
@@ -956,45 +1735,107 @@ class ModernVideoPlayer(QWidget):
             self._update_time_label(position, self.player.duration())
             self.mini_player_widget.update_position(position)
 
-    # --- LOGIKA SUBTITLE SEKARANG ADA DI LUAR BLOK 'IF' ---
-        if self.srt_parser:
-            subtitle_text = self.srt_parser.get_subtitle(position)
-        # Tampilkan HTML dengan outline sederhana untuk keterbacaan
-        # text-shadow tidak didukung penuh, jadi kita pakai trik
-        display_html = ""
-        if subtitle_text:
-            # Ganti \n dengan <br> untuk baris baru
-            subtitle_text = subtitle_text.replace('\n', '<br>')
-            # Trik untuk outline: gambar teks 4x dengan offset kecil warna hitam, lalu teks putih di atasnya
-            style = "color: white; background-color: rgba(0, 0, 0, 0.6); padding: 5px; border-radius: 5px;"
-            display_html = f"<div style='{style}'>{subtitle_text}</div>"
-
-        # Hanya update jika teksnya berubah untuk efisiensi
-        if display_html != self.current_subtitle_text:
-            self.current_subtitle_text = display_html
-            self.subtitle_text_item.setHtml(f"<center>{display_html}</center>")
-
-            # Posisikan ulang teks di bawah tengah
+        # Subtitle diurus SubtitleScheduler; di sini hanya deteksi seek yang murah
+        self.subtitle_scheduler.check_position(position)
+
+    def _auto_sync_subtitles(self):
+        video_path = self.current_media_info.get('path', '')
+        if not self.subtitle_source_store or not video_path or "://" in video_path: return
+        self._cancel_subtitle_sync()
+        self.btn_sync_subtitle.setEnabled(False)
+        self.setWindowTitle(f"Macan Player - Menyinkronkan subtitle...")
+        self.subtitle_sync_worker = SubtitleSyncWorker(video_path, self.subtitle_source_store, parent=self)
+        self.subtitle_sync_worker.sync_finished.connect(self._on_subtitle_sync_finished)
+        self.subtitle_sync_worker.start(QThread.Priority.LowPriority)
+
+    def _cancel_subtitle_sync(self):
+        if self.subtitle_sync_worker:
+            self.subtitle_sync_worker.sync_finished.disconnect(self._on_subtitle_sync_finished)
+            self._detach_worker(self.subtitle_sync_worker)
+            self.subtitle_sync_worker = None
+
+    def _on_subtitle_sync_finished(self, result, error):
+        worker, self.subtitle_sync_worker = self.subtitle_sync_worker, None
+        worker.finished.connect(worker.deleteLater)
+        self.setWindowTitle(f"Macan Player - {self.current_media_info.get('title', '')}")
+        self.btn_sync_subtitle.setEnabled(bool(self.subtitle_source_store))
+        if result is None:
+            QMessageBox.warning(self, "Sinkronisasi Gagal", error)
+            return
+        offset_ms, scale, confidence = result
+        if confidence < 4.0:
+            QMessageBox.information(self, "Sinkronisasi Subtitle", "Tidak ditemukan offset yang meyakinkan, subtitle tidak diubah.")
+            return
+        self._set_subtitle_store(self.subtitle_source_store.shifted(offset_ms, scale), synced=True)
+        drift_text = f", skala {scale:.4f}" if scale != 1.0 else ""
+        QMessageBox.information(self, "Sinkronisasi Subtitle", f"Subtitle digeser {offset_ms / 1000:+.2f} detik{drift_text}.")
+
+    def _subtitle_cache_key(self, cue_ids):
+        return (cue_ids, self.subtitle_font.family(), self.subtitle_font.pointSize(), self.subtitle_view.viewport().width())
+
+    def _subtitle_text(self, cue_ids):
+        return "\n".join(self.subtitle_store.cue_text(i) for i in cue_ids)
+
+    def _subtitle_pixmap(self, cue_ids):
+        key = self._subtitle_cache_key(cue_ids)
+        pixmap = self.subtitle_pixmap_cache.get(key)
+        if pixmap is None:
+            # Belum sempat di-pre-render (mis. tepat setelah seek): render langsung sekali ini
+            image = SubtitlePrerenderer.render_image(self._subtitle_text(cue_ids), self.subtitle_font,
+                                                     key[3] * 0.9, self.devicePixelRatioF())
+            pixmap = QPixmap.fromImage(image)
+            self.subtitle_pixmap_cache.put(key, pixmap)
+        return pixmap
+
+    def _show_subtitle_cues(self, cue_ids):
+        if cue_ids and self.subtitle_store:
+            self.subtitle_item.setPixmap(self._subtitle_pixmap(cue_ids))
+            self.subtitle_item.show()
+            # Posisikan ulang subtitle di bawah tengah
             self._reposition_subtitle()
+        else:
+            self.subtitle_item.hide()
+        self._prerender_upcoming_subtitles()
+
+    def _prerender_upcoming_subtitles(self, count=4):
+        if not self.subtitle_store: return
+        device_pixel_ratio = self.devicePixelRatioF()
+        jobs = []
+        for cue_ids in self.subtitle_store.upcoming_cue_ids(self.subtitle_scheduler.current_position_ms(), count):
+            key = self._subtitle_cache_key(cue_ids)
+            if key in self.subtitle_pixmap_cache or key in self.subtitle_prerender_pending: continue
+            self.subtitle_prerender_pending.add(key)
+            jobs.append(((self.subtitle_generation, key), self._subtitle_text(cue_ids), QFont(self.subtitle_font),
+                         key[3] * 0.9, device_pixel_ratio))
+        if jobs: self.prerender_subtitles.emit(jobs)
+
+    def _on_subtitle_prerendered(self, tag, image):
+        generation, key = tag
+        self.subtitle_prerender_pending.discard(key)
+        # Abaikan hasil untuk store lama atau lebar viewport yang sudah berubah
+        if generation != self.subtitle_generation or key[3] != self.subtitle_view.viewport().width(): return
+        self.subtitle_pixmap_cache.put(key, QPixmap.fromImage(image))
 
     def _reposition_subtitle(self):
-        if not self.subtitle_text_item.toPlainText():
+        if not self.subtitle_item.isVisible():
             return
     # Sesuaikan ukuran scene dengan view
         self.subtitle_scene.setSceneRect(QRectF(self.subtitle_view.rect())) # <-- UBAH DI SINI
 
-    # Posisikan teks di bawah tengah
-        text_rect = self.subtitle_text_item.boundingRect()
+    # Posisikan subtitle di bawah tengah
+        subtitle_rect = self.subtitle_item.boundingRect()
         view_rect = self.subtitle_view.viewport().rect()
 
-        x = (view_rect.width() - text_rect.width()) / 2
-        y = view_rect.height() - text_rect.height() - 20 # 20px dari bawah
-        self.subtitle_text_item.setPos(x, y)
+        x = (view_rect.width() - subtitle_rect.width()) / 2
+        y = view_rect.height() - subtitle_rect.height() - 20 # 20px dari bawah
+        self.subtitle_item.setPos(x, y)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-    # Panggil reposition saat jendela diubah ukurannya
-        self._reposition_subtitle()
+    # Lebar viewport berubah: pixmap lama tidak terpakai lagi, render ulang cue yang sedang tampil
+        self.subtitle_pixmap_cache.clear()
+        self.subtitle_prerender_pending.clear()
+        self._show_subtitle_cues(self.subtitle_scheduler.active_ids)
 
     def _update_duration(self, duration):
         self.position_slider.setRange(0, duration)
@@ -1002,6 +1843,7 @@ class ModernVideoPlayer(QWidget):
 
     def _set_position(self, position):
         self.player.setPosition(position)
+        self.subtitle_scheduler.resync(position)
 
     def _set_volume(self, value):
         self.audio_output.setVolume(value / 100.0)
@@ -1057,6 +1899,9 @@ class ModernVideoPlayer(QWidget):
         self.mini_player_widget.update_play_pause_icon(is_playing)
 
     def _handle_media_status_changed(self, status):
+        if self.pending_seek_ms is not None and status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia):
+            position, self.pending_seek_ms = self.pending_seek_ms, None
+            self._set_position(position)
         if status == QMediaPlayer.MediaStatus.EndOfMedia:
             current_index = self.playlist_widget.get_current_index()
             playlist_data = self.playlist_widget.get_playlist_data()
@@ -1113,8 +1958,22 @@ class ModernVideoPlayer(QWidget):
         self.playlist_widget.close()
         self.mini_player_widget.close()
         self.history_window.close()
+        self.subtitle_search_dialog.close()
+        self.subtitle_index_pending = False
+        for worker in (self.storyboard_worker, self.packet_index_worker, self.subtitle_loader, self.subtitle_sync_worker,
+                       self.subtitle_index_worker, *self._detached_workers):
+            if worker:
+                worker.cancel()
+                worker.wait()
         self.thumbnail_thread.quit()
         self.thumbnail_thread.wait()
+        self.subtitle_render_thread.quit()
+        self.subtitle_render_thread.wait()
+        # Thread sudah berhenti, aman menutup handle dari thread utama
+        self.thumbnail_generator.capture_pool.invalidate()
+        self.thumbnail_generator.stream_proxy.close()
+        mailbox = self.thumbnail_mailbox
+        print(f"Thumbnail: {mailbox.served} dilayani, {mailbox.dropped} dibuang, {mailbox.prefetched} di-prefetch")
         self.player.stop()
         event.accept()
 
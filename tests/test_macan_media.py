@@ -0,0 +1,198 @@
+"""Tes macan_media: cache thumbnail disk dan proxy Range lokal terhadap server asal http.server."""
+import os
+import re
+import sys
+import time
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+import http.client
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from array import array
+from macan_media import ThumbnailCache, RangeReadAheadProxy, PacketIndex
+
+BLOCK_SIZE = 512 * 1024 # Ukuran blok default StreamSegmentFetcher
+
+
+class _OriginHandler(BaseHTTPRequestHandler):
+    """Server asal minimal yang hanya melayani Range request (seperti CDN video)."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        data = self.server.payload
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if not match:
+            self.send_error(400)
+            return
+        start = int(match.group(1))
+        end = min(int(match.group(2)), len(data) - 1) if match.group(2) else len(data) - 1
+        with self.server.lock: self.server.ranges.append((start, end))
+        body = data[start:end + 1]
+        self.send_response(206)
+        self.send_header('Content-Range', f"bytes {start}-{end}/{len(data)}")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThumbnailCacheDiskTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+
+    def test_disk_eviction_is_lru_down_to_low_water(self):
+        # Tanpa cache memori, supaya get() selalu membaca (dan menyentuh) entri disk
+        cache = ThumbnailCache(self.cache_dir, memory_budget=0, disk_budget=100)
+        keys = [f"http://host/video.mp4|{i}" for i in range(11)]
+        for key in keys[:10]: cache.put(key, b'x' * 10)
+        self.assertIsNotNone(cache.get(keys[0])) # keys[0] jadi yang terbaru dipakai
+        cache.put(keys[10], b'y' * 10)
+        # 110 byte > 100: dibuang dari yang paling lama dipakai sampai <= 90 byte
+        self.assertEqual(len(os.listdir(self.cache_dir)), 9)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNone(cache.get(keys[2]))
+        self.assertIsNotNone(cache.get(keys[3]))
+
+    def test_disk_index_order_survives_reload(self):
+        cache = ThumbnailCache(self.cache_dir, memory_budget=0, disk_budget=1000)
+        for i in range(3): cache.put(f"http://host/v|{i}", b'z' * 10)
+        reloaded = ThumbnailCache(self.cache_dir, memory_budget=0, disk_budget=1000)
+        self.assertEqual(reloaded.get("http://host/v|1"), b'z' * 10)
+        self.assertEqual(reloaded._disk_size, 30)
+
+
+class PacketIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir, True)
+        self.video_path = os.path.join(self.work_dir, "video.ts")
+        with open(self.video_path, 'wb') as f: f.write(b'\0' * 16)
+        self.index_path = PacketIndex.cache_path(os.path.join(self.work_dir, "index"), self.video_path)
+
+    def _saved_bytes(self):
+        PacketIndex(self.video_path, array('q', [0, 40000, 80000]), array('q', [0])).save(self.index_path)
+        with open(self.index_path, 'rb') as f: return f.read()
+
+    def test_round_trip(self):
+        self._saved_bytes()
+        index = PacketIndex.load(self.index_path, self.video_path)
+        self.assertEqual(list(index.pts_us), [0, 40000, 80000])
+        self.assertEqual(index.frames_between(0, 80), 2)
+
+    def test_corrupt_files_are_deleted_and_rejected(self):
+        data = self._saved_bytes()
+        old_version = data.replace(PacketIndex.MAGIC, b'MVPIDX1\0', 1)
+        for corrupt in (data[:10], data[:24 + 12], data[:-8], old_version):
+            with open(self.index_path, 'wb') as f: f.write(corrupt)
+            self.assertIsNone(PacketIndex.load(self.index_path, self.video_path))
+            self.assertFalse(os.path.exists(self.index_path))
+
+    @unittest.skipIf(os.name == 'nt', "ffprobe palsu memakai skrip shell")
+    def test_build_is_relative_to_stream_start(self):
+        # ffprobe palsu: stream .ts yang dimulai di 1.4 detik, paket dalam urutan decode
+        bin_dir = os.path.join(self.work_dir, "bin")
+        os.makedirs(bin_dir)
+        script = os.path.join(bin_dir, "ffprobe")
+        with open(script, 'w') as f:
+            f.write('#!/bin/sh\n'
+                    'case "$*" in\n'
+                    '  *stream=start_time*) echo "1.400000" ;;\n'
+                    '  *) printf "1.400000,K__\\n1.480000,___\\n1.440000,___\\n1.520000,K__\\n" ;;\n'
+                    'esac\n')
+        os.chmod(script, 0o755)
+        old_path = os.environ['PATH']
+        os.environ['PATH'] = bin_dir + os.pathsep + old_path
+        self.addCleanup(os.environ.__setitem__, 'PATH', old_path)
+        index = PacketIndex.build(self.video_path)
+        self.assertEqual(list(index.pts_us), [0, 40000, 80000, 120000])
+        self.assertEqual(index.keyframe_before(100), 0.0)
+        self.assertEqual(index.nearest_keyframe(110), 120.0)
+
+
+class RangeReadAheadProxyTest(unittest.TestCase):
+    def setUp(self):
+        self.payload = os.urandom(BLOCK_SIZE * 4 + 1234)
+        self.origin = ThreadingHTTPServer(('127.0.0.1', 0), _OriginHandler)
+        self.origin.daemon_threads = True
+        self.origin.payload = self.payload
+        self.origin.ranges = []
+        self.origin.lock = threading.Lock()
+        threading.Thread(target=self.origin.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.origin.server_address[1]}/video.mp4"
+        self.proxy = RangeReadAheadProxy()
+        self.local_url = self.proxy.local_url(self.url)
+        self.assertIsNotNone(self.local_url)
+
+    def tearDown(self):
+        self.proxy.close()
+        self.origin.shutdown()
+        self.origin.server_close()
+
+    def _get(self, range_header=None):
+        parts = urlsplit(self.local_url)
+        connection = http.client.HTTPConnection(parts.netloc, timeout=10)
+        try:
+            connection.request('GET', parts.path, headers={'Range': range_header} if range_header else {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+    def _fetcher(self):
+        return self.proxy.fetcher_for(urlsplit(self.local_url).path.lstrip('/'))
+
+    def _wait_for_blocks(self, fetcher, indices, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(i in fetcher._blocks for i in indices): return True
+            time.sleep(0.01)
+        return False
+
+    def test_range_read_spanning_blocks(self):
+        start, end = BLOCK_SIZE - 100, BLOCK_SIZE + 100
+        status, headers, body = self._get(f"bytes={start}-{end}")
+        self.assertEqual(status, 206)
+        self.assertEqual(headers['Content-Range'], f"bytes {start}-{end}/{len(self.payload)}")
+        self.assertEqual(body, self.payload[start:end + 1])
+
+    def test_suffix_and_unsatisfiable_ranges(self):
+        status, _, body = self._get("bytes=-500")
+        self.assertEqual(status, 206)
+        self.assertEqual(body, self.payload[-500:])
+        status, headers, _ = self._get(f"bytes={len(self.payload)}-")
+        self.assertEqual(status, 416)
+        self.assertEqual(headers['Content-Range'], f"bytes */{len(self.payload)}")
+
+    def test_read_ahead_blocks_are_served_from_cache(self):
+        fetcher = self._fetcher()
+        status, _, _ = self._get("bytes=0-99")
+        self.assertEqual(status, 206)
+        self.assertTrue(self._wait_for_blocks(fetcher, range(1, fetcher.read_ahead + 1)))
+        with self.origin.lock: origin_requests = len(self.origin.ranges)
+        # Blok 1 sudah diambil lebih dulu oleh read-ahead: tidak boleh ada request baru ke server asal
+        status, _, body = self._get(f"bytes={BLOCK_SIZE + 10}-{BLOCK_SIZE + 20}")
+        self.assertEqual(body, self.payload[BLOCK_SIZE + 10:BLOCK_SIZE + 21])
+        with self.origin.lock:
+            new_ranges = self.origin.ranges[origin_requests:]
+        self.assertNotIn((BLOCK_SIZE, 2 * BLOCK_SIZE - 1), new_ranges)
+
+    def test_closed_stream_returns_503(self):
+        fetcher = self._fetcher()
+        fetcher.close()
+        with self.assertRaises(OSError):
+            fetcher.get_block(3)
+        status, _, _ = self._get("bytes=0-99")
+        self.assertEqual(status, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
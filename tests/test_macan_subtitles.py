@@ -0,0 +1,96 @@
+"""Tes macan_subtitles: parser SRT/WebVTT dan lookup cue CueStore."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from macan_subtitles import CueStore, load_subtitles, parse_srt
+
+
+def _store(*cues):
+    store = CueStore()
+    for start, end, text in cues:
+        store.add(start, end, text)
+    return store.finalize()
+
+
+class LoadSubtitlesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _load(self, data, name='film.srt'):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return load_subtitles(path)
+
+    def test_crlf_dan_bom(self):
+        data = "1\r\n00:00:01,000 --> 00:00:02,500\r\nHalo\r\n\r\n2\r\n00:00:03,000 --> 00:00:04,000\r\nDunia\r\n\r\n"
+        store = self._load(b'\xef\xbb\xbf' + data.encode('utf-8'))
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.active_cues(1000), ['Halo'])
+        self.assertEqual(store.get_subtitle(3500), 'Dunia')
+        self.assertEqual(store.skipped_blocks, 0)
+
+    def test_vtt_dengan_bom_terdeteksi(self):
+        data = "WEBVTT\r\n\r\n00:01.000 --> 00:02.000\r\n<v Budi>Halo\r\n"
+        store = self._load(b'\xef\xbb\xbf' + data.encode('utf-8'), name='film.txt')
+        self.assertEqual(store.active_cues(1500), ['Halo'])
+        self.assertEqual(store.skipped_blocks, 0)
+
+    def test_cue_terakhir_tanpa_baris_kosong(self):
+        store = self._load(b"1\n00:00:01,000 --> 00:00:02,000\nSatu\n\n2\n00:00:05,000 --> 00:00:06,000\nTerakhir")
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get_subtitle(5500), 'Terakhir')
+
+    def test_blok_rusak_dilewati(self):
+        lines = [
+            "1\n", "00:00:01,000 --> 00:00:02,000\n", "Baik\n", "\n",
+            "2\n", "00:00:xx,000 --> 00:00:04,000\n", "Waktu rusak\n", "\n",
+            "sampah tanpa baris waktu\n", "\n",
+            "4\n", "00:00:05,000 --> 00:00:06,000\n", "Baik lagi\n",
+        ]
+        store = CueStore()
+        parse_srt(lines, store)
+        store.finalize()
+        self.assertEqual([store.cue_text(i) for i in range(len(store))], ['Baik', 'Baik lagi'])
+        self.assertEqual(store.skipped_blocks, 2)
+
+
+class CueStoreLookupTest(unittest.TestCase):
+    def test_cue_tumpang_tindih(self):
+        store = _store((1000, 4000, 'A'), (2000, 3000, 'B'), (3500, 5000, 'C'))
+        self.assertEqual(store.active_cues(1500), ['A'])
+        self.assertEqual(store.active_cues(2500), ['A', 'B'])
+        self.assertEqual(store.active_cues(3000), ['A']) # Waktu selesai eksklusif
+        self.assertEqual(store.active_cues(3700), ['A', 'C'])
+        self.assertEqual(store.next_change_ms(2500), 3000)
+
+    def test_cue_tidak_terurut_diurutkan(self):
+        store = _store((5000, 6000, 'Dua'), (1000, 2000, 'Satu'))
+        self.assertEqual(store.get_subtitle(1500), 'Satu')
+        self.assertEqual(store.get_subtitle(5500), 'Dua')
+
+    def test_playback_maju_lalu_seek_mundur(self):
+        store = _store((1000, 4000, 'A'), (2000, 3000, 'B'), (6000, 7000, 'C'))
+        expected = {0: [], 1500: ['A'], 2500: ['A', 'B'], 3500: ['A'], 5000: [], 6500: ['C'], 8000: []}
+        # Maju per 100 ms (jalur kursor), lalu lompat mundur ke tiap titik (jalur binary search)
+        for position in range(0, 8100, 100):
+            if position in expected:
+                self.assertEqual(store.active_cues(position), expected[position], position)
+            else:
+                store.active_cues(position)
+        for position in sorted(expected, reverse=True):
+            self.assertEqual(store.active_cues(position), expected[position], position)
+        store.active_cues(6500)
+        self.assertEqual(store.active_cues(2500), ['A', 'B'])
+        self.assertEqual(store.active_cues(500), [])
+
+
+if __name__ == '__main__':
+    unittest.main()